@@ -0,0 +1,153 @@
+"""Compara planos de consulta e latência antes/depois dos índices de filtro
+
+Gera um catálogo sintético em um banco SQLite temporário, executa as rotas
+de leitura pelo test client do Flask sem os índices da migração 2 e depois
+de ``upgrade_schema()``, e imprime o EXPLAIN QUERY PLAN de cada SELECT
+emitido junto com a mediana de latência.
+
+    python benchmarks/bench_indexes.py --contents 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event, text
+from src.models.db import db
+from src.models.content import Content, ContentStreaming
+from src.models.migrations import SchemaVersion, upgrade_schema
+from src.routes.caching import init_response_cache
+from src.routes.content import content_bp
+from src.routes.streaming import streaming_bp
+
+SCENARIOS = [
+    ('listagem paginada', '/api/content?limit=50'),
+    ('filtro por tipo', '/api/content?type=anime&limit=50'),
+    ('filtro por plataforma', '/api/content?streaming_ids=3&limit=50'),
+    ('estatísticas', '/api/content/stats'),
+]
+
+def make_app(db_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    # Mede as consultas, não o cache de respostas
+    app.config['RESPONSE_CACHE_SIZE'] = 0
+    init_response_cache(app)
+    app.register_blueprint(content_bp, url_prefix='/api')
+    app.register_blueprint(streaming_bp, url_prefix='/api')
+    db.init_app(app)
+    return app
+
+def populate(contents, platforms=8, seed=42):
+    rng = random.Random(seed)
+    db.session.execute(
+        text('INSERT INTO streaming_platform (id, name, active) VALUES (:id, :name, 1)'),
+        [{'id': i, 'name': f'Plataforma {i}'} for i in range(1, platforms + 1)]
+    )
+    types = ['movie', 'movie', 'series', 'anime']
+    rows = [{
+        'id': i,
+        'title': f'Título {rng.randrange(10 ** 6):06d}',
+        'type': rng.choice(types),
+        'is_active': rng.random() > 0.1,
+    } for i in range(1, contents + 1)]
+    db.session.execute(
+        text('INSERT INTO content (id, title, type, is_active) VALUES (:id, :title, :type, :is_active)'),
+        rows
+    )
+    links = [{'content_id': i, 'streaming_id': sid}
+             for i in range(1, contents + 1)
+             for sid in rng.sample(range(1, platforms + 1), rng.randint(1, 3))]
+    db.session.execute(
+        text('INSERT INTO content_streaming (content_id, streaming_id, available) VALUES (:content_id, :streaming_id, 1)'),
+        links
+    )
+    db.session.commit()
+
+def drop_filter_indexes():
+    for model in (Content, ContentStreaming):
+        for index in model.__table__.indexes:
+            db.session.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+    db.session.query(SchemaVersion).delete()
+    db.session.commit()
+
+def capture_statements(client, url):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+def query_plans(statements):
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        plans = []
+        for statement, parameters in statements:
+            rows = cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+            plans.append([row[-1] for row in rows])
+        return plans
+    finally:
+        connection.close()
+
+def measure(client, url, repeat):
+    client.get(url)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def run_phase(label, client, repeat):
+    print(f'\n=== {label}')
+    results = {}
+    for name, url in SCENARIOS:
+        plans = query_plans(capture_statements(client, url))
+        results[name] = measure(client, url, repeat)
+        print(f'\n{name} ({url}): {results[name]:.2f} ms')
+        for plan in plans:
+            for step in plan:
+                print(f'    {step}')
+            print('    --')
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--contents', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'))
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            populate(args.contents)
+            drop_filter_indexes()
+            db.session.execute(text('ANALYZE'))
+            before = run_phase('sem índices', client, args.repeat)
+
+            upgrade_schema()
+            db.session.execute(text('ANALYZE'))
+            after = run_phase('com índices (upgrade_schema)', client, args.repeat)
+
+    print('\n=== resumo (mediana, ms)')
+    for name, _ in SCENARIOS:
+        print(f'{name:<24} {before[name]:>9.2f} -> {after[name]:>9.2f}')
+
+if __name__ == '__main__':
+    main()
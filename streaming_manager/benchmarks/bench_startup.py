@@ -0,0 +1,164 @@
+"""Tempo de inicialização: import, criação do app e primeira requisição
+
+Cada medição roda em um processo novo, sobre uma cópia do banco indicado
+(migrada antes, como num deploy), e mede:
+
+- em processo: ``import main``, ``main.app`` (criação) e a primeira
+  requisição a ``--path`` pelo test client;
+- com gunicorn (``--gunicorn``), com e sem ``--preload``: do lançamento até
+  a primeira resposta de ``/api/health`` e até todos os ``--workers``
+  estarem prontos, e o tempo da primeira requisição a ``--path``.
+
+    python benchmarks/bench_startup.py --database src/database/app.db --gunicorn --workers 4
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Roda no processo filho; imprime os tempos em JSON
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {src!r})
+import main
+imported = time.perf_counter()
+app = main.app
+created = time.perf_counter()
+response = app.test_client().get({path!r})
+response.get_data()
+first = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (first - created) * 1000,
+    'total_ms': (first - started) * 1000,
+    'status': response.status_code,
+}}))
+'''
+
+def in_process(env, path):
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD.format(src=SRC_DIR, path=path)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def fetch(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+# Hook do gunicorn: cada worker pronto anota o instante em que subiu
+HOOKS = '''
+import time
+def post_worker_init(worker):
+    with open({path!r}, 'a') as ready:
+        ready.write(f'{{time.time()}}\\n')
+'''
+
+def gunicorn_boot(env, path, workers, preload, tmp, timeout=60):
+    """Milissegundos até a primeira resposta, até todos os workers e da 1ª requisição"""
+    port = free_port()
+    ready_path = os.path.join(tmp, f'ready-{port}')
+    hooks_path = os.path.join(tmp, f'hooks-{port}.py')
+    with open(hooks_path, 'w') as hooks:
+        hooks.write(HOOKS.format(path=ready_path))
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '--chdir', SRC_DIR, '-c', hooks_path,
+               '-b', f'127.0.0.1:{port}', '--log-level', 'warning']
+    if preload:
+        command.append('--preload')
+    command.append('main:app')  # também funciona em versões anteriores ao factory, para comparar
+
+    launched = time.time()
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    try:
+        base = f'http://127.0.0.1:{port}'
+        first_health = None
+        deadline = started + timeout
+        while first_health is None:
+            if process.poll() is not None or time.perf_counter() > deadline:
+                raise RuntimeError(f'gunicorn não subiu: {process.stderr.read()[-2000:]}')
+            try:
+                fetch(base + '/api/health', timeout=1)
+                first_health = time.perf_counter()
+            except OSError:
+                time.sleep(0.01)
+
+        # Com --preload o app é criado uma vez no master; sem ele cada
+        # worker importa e cria o seu
+        ready = []
+        while len(ready) < workers and time.perf_counter() < deadline:
+            time.sleep(0.01)
+            if os.path.exists(ready_path):
+                with open(ready_path) as lines:
+                    ready = [float(line) for line in lines if line.strip()]
+
+        request_started = time.perf_counter()
+        status = fetch(base + path)
+        first_request = time.perf_counter() - request_started
+        return {
+            'first_health_ms': (first_health - started) * 1000,
+            'all_workers_ms': (max(ready) - launched) * 1000,
+            'first_request_ms': first_request * 1000,
+            'status': status,
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+def summarize(samples):
+    keys = [key for key in samples[0] if key != 'status']
+    summary = {key: round(statistics.median(sample[key] for sample in samples), 1) for key in keys}
+    summary['status'] = sorted({sample['status'] for sample in samples})
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default=os.path.join(SRC_DIR, 'database', 'app.db'),
+                        help='Banco SQLite copiado para cada medição')
+    parser.add_argument('--path', default='/api/content?limit=50')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--gunicorn', action='store_true', help='Mede também o boot do gunicorn')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'startup.db')
+        shutil.copy(args.database, database)
+        env = {**os.environ, 'DATABASE_URL': f'sqlite:///{database}', 'PYTHONDONTWRITEBYTECODE': '1'}
+        subprocess.run([sys.executable, os.path.join(SRC_DIR, 'manage.py'), 'migrate'],
+                       env=env, stdout=subprocess.DEVNULL, check=True)
+
+        in_process(env, args.path)  # aquece o cache de disco e os .pyc existentes
+        report['in_process'] = summarize([in_process(env, args.path) for _ in range(args.repeat)])
+        print(f"in_process: {report['in_process']}", file=sys.stderr)
+
+        if args.gunicorn:
+            for preload in (False, True):
+                name = f'gunicorn_{args.workers}w' + ('_preload' if preload else '')
+                report[name] = summarize([gunicorn_boot(env, args.path, args.workers, preload, tmp)
+                                          for _ in range(args.repeat)])
+                print(f'{name}: {report[name]}', file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
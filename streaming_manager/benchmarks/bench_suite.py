@@ -0,0 +1,231 @@
+"""Suíte de benchmarks das rotas da API com relatório em JSON
+
+Gera um catálogo sintético (``catalog.py``) em um SQLite temporário e mede,
+pelo test client do Flask, listagem filtrada, busca, estatísticas, leitura
+por id e escritas de admin. Para cada cenário o relatório traz p50/p95 de
+latência, consultas SQL por requisição e pico de memória (tracemalloc, em
+uma passada separada para não distorcer as latências). O cache de respostas
+fica desligado e nenhum ETag é enviado: mede-se o trabalho real.
+
+    python benchmarks/bench_suite.py --links 100000 -o atual.json
+    python benchmarks/bench_suite.py --links 100000 --compare atual.json
+
+Com ``--compare`` o processo termina com código 1 se algum p95 ou número de
+consultas piorar além de ``--threshold``.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from src.config import ProductionConfig
+from src.main import create_app
+from src.models.content import Content, StreamingPlatform, db
+from src.models.migrations import upgrade_schema
+from src.routes.auth import ADMIN_USERNAME
+
+from catalog import WORDS, generate_catalog
+
+def make_app(db_path):
+    """App de ``create_app`` (JSON, cache, métricas e rotas reais) sobre ``db_path``
+
+    Parte da configuração de testes (sem rate limit, imagens locais) com o
+    pool e os pragmas de produção; o cache de respostas fica desligado.
+    """
+    return create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'SQLALCHEMY_ENGINE_OPTIONS': ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS,
+        'RESPONSE_CACHE_SIZE': 0,
+        'IMAGE_CACHE_DIR': os.path.join(os.path.dirname(db_path), 'images'),
+    })
+
+def build_scenarios(rng, content_ids, platform_ids):
+    """(nome, método, função que gera (url, corpo) a cada requisição)"""
+    def get(url):
+        return lambda: (url, None)
+
+    def random_get():
+        return f'/api/content/{rng.choice(content_ids)}', None
+
+    def similar_get():
+        return f'/api/content/{rng.choice(content_ids)}?include=similar', None
+
+    def search():
+        return f'/api/content?search={rng.choice(WORDS).lower()}&limit=50', None
+
+    def create():
+        return '/api/content', {
+            'title': f'Benchmark {rng.randrange(10 ** 9)}',
+            'type': 'movie',
+            'year': 2024,
+            'genre': 'Drama',
+            'streaming_ids': rng.sample(platform_ids, 2)
+        }
+
+    def update():
+        return f'/api/content/{rng.choice(content_ids)}', {
+            'genre': rng.choice(['Drama', 'Comédia']),
+            'streaming_ids': rng.sample(platform_ids, rng.randint(1, 3))
+        }
+
+    def toggle():
+        return f'/api/content/{rng.choice(content_ids)}/toggle', None
+
+    return [
+        ('listagem', 'GET', get('/api/content?limit=50')),
+        ('listagem filtrada', 'GET', get(f'/api/content?type=movie&streaming_ids={platform_ids[0]}&limit=50')),
+        ('listagem por gênero', 'GET', get('/api/content?genre=drama&limit=50')),
+        ('busca', 'GET', search),
+        ('facetas', 'GET', get(f'/api/content?facets=true&type=movie&streaming_ids={platform_ids[0]}&limit=50')),
+        ('estatísticas', 'GET', get('/api/content/stats')),
+        ('leitura por id', 'GET', random_get),
+        ('leitura com similares', 'GET', similar_get),
+        ('criação', 'POST', create),
+        ('atualização', 'PUT', update),
+        ('ativar/desativar', 'PATCH', toggle),
+    ]
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+def run_scenario(client, headers, method, next_request, repeat, counter):
+    latencies = []
+    queries = []
+    statuses = set()
+    for _ in range(repeat):
+        url, body = next_request()
+        counter.count = 0
+        started = time.perf_counter()
+        response = client.open(url, method=method, json=body, headers=headers if method != 'GET' else None)
+        response.get_data()
+        latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+        statuses.add(response.status_code)
+    return latencies, queries, statuses
+
+def peak_memory(client, headers, method, next_request, repeat):
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            url, body = next_request()
+            client.open(url, method=method, json=body, headers=headers if method != 'GET' else None).get_data()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def run_suite(links, platforms, seed, repeat, warmup, memory_repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'))
+        client = app.test_client()
+        with app.app_context():
+            upgrade_schema()
+            catalog = generate_catalog(links, platforms=platforms, seed=seed)
+            headers = {'Authorization': f'Bearer {create_access_token(identity=ADMIN_USERNAME)}'}
+            content_ids = [content_id for (content_id,) in db.session.query(Content.id)]
+            platform_ids = [platform_id for (platform_id,) in db.session.query(StreamingPlatform.id).order_by(StreamingPlatform.id)]
+            engine = db.engine
+
+        # As requisições rodam fora do app context acima: cada uma ganha o
+        # seu, como em produção (``g`` não vaza entre requisições)
+        counter = QueryCounter()
+        event.listen(engine, 'before_cursor_execute', counter)
+        rng = random.Random(seed)
+        results = {}
+        try:
+            for name, method, next_request in build_scenarios(rng, content_ids, platform_ids):
+                run_scenario(client, headers, method, next_request, warmup, counter)
+                latencies, queries, statuses = run_scenario(client, headers, method, next_request, repeat, counter)
+                peak = peak_memory(client, headers, method, next_request, memory_repeat)
+                results[name] = {
+                    'method': method,
+                    'requests': repeat,
+                    'status': sorted(statuses),
+                    'p50_ms': round(statistics.median(latencies), 3),
+                    'p95_ms': round(percentile(latencies, 0.95), 3),
+                    'mean_ms': round(statistics.fmean(latencies), 3),
+                    'queries_per_request': round(statistics.fmean(queries), 2),
+                    'peak_memory_kb': round(peak / 1024, 1),
+                }
+                print(f'{name:<22} p50 {results[name]["p50_ms"]:>9.2f} ms  p95 {results[name]["p95_ms"]:>9.2f} ms  '
+                      f'{results[name]["queries_per_request"]:>6} consultas  {results[name]["peak_memory_kb"]:>9} KiB',
+                      file=sys.stderr)
+        finally:
+            event.remove(engine, 'before_cursor_execute', counter)
+            engine.dispose()
+
+    return {
+        'meta': {
+            'catalog': catalog,
+            'repeat': repeat,
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'sqlite': sqlite3.sqlite_version,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'scenarios': results,
+    }
+
+def compare(report, baseline, threshold):
+    """Lista as regressões de p95 e de consultas por requisição"""
+    regressions = []
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * threshold:
+            regressions.append(f'{name}: p95 {previous["p95_ms"]} -> {current["p95_ms"]} ms')
+        if current['queries_per_request'] > previous['queries_per_request']:
+            regressions.append(f'{name}: consultas {previous["queries_per_request"]} -> {current["queries_per_request"]}')
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--links', type=int, default=100000, help='Vínculos conteúdo/plataforma (ex.: 1000, 100000, 1000000)')
+    parser.add_argument('--platforms', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--memory-repeat', type=int, default=5)
+    parser.add_argument('--output', '-o', help='Arquivo do relatório JSON (padrão: stdout)')
+    parser.add_argument('--compare', help='Relatório anterior para detectar regressões')
+    parser.add_argument('--threshold', type=float, default=1.25, help='Piora tolerada no p95 (1.25 = +25%%)')
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.links, args.platforms, args.seed, args.repeat, args.warmup, args.memory_repeat)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline:
+            regressions = compare(report, json.load(baseline), args.threshold)
+        for regression in regressions:
+            print(f'REGRESSÃO {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Gerador de catálogo sintético para os benchmarks
+
+Parte das plataformas reais de ``init_data.py`` (completando com plataformas
+sintéticas quando ``platforms`` for maior) e gera conteúdos e vínculos em
+lotes com executemany, então catálogos de 1M de vínculos cabem na memória.
+O mesmo ``seed`` sempre gera o mesmo catálogo.
+
+    python benchmarks/catalog.py /tmp/catalogo.db --links 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from src.init_data import init_streaming_platforms
+from src.models.catalog import rebuild_change_log
+from src.models.content import Content, ContentStreaming, StreamingPlatform, db
+from src.models.search import ensure_search_index, rebuild_search_index
+from src.models.similar import rebuild_similar_index
+from src.models.stats import is_materialized, rebuild_stats
+
+WORDS = (
+    'Amor', 'Noite', 'Céu', 'Ação', 'Coração', 'Estrela', 'Sombra', 'Guerra', 'Cidade', 'Mar',
+    'Fogo', 'Lua', 'Sertão', 'Herói', 'Segredo', 'Caminho', 'Última', 'Grande', 'Perdido', 'Rei',
+    'Dragão', 'Tempo', 'Verão', 'Inverno', 'Sonho', 'Missão', 'Ilha', 'Futuro', 'Lenda', 'Vingança',
+)
+GENRES = ('Ação', 'Aventura', 'Animação', 'Comédia', 'Drama', 'Documentário', 'Fantasia',
+          'Ficção Científica', 'Romance', 'Suspense', 'Terror', 'Thriller')
+TYPES = ('movie', 'movie', 'series', 'anime')
+LINKS_PER_CONTENT = 2
+DEFAULT_BATCH_SIZE = 10000
+
+def seed_platforms(platforms):
+    """Plataformas de ``init_data.py`` mais sintéticas até chegar a ``platforms``"""
+    init_streaming_platforms()
+    existing = StreamingPlatform.query.count()
+    for number in range(existing + 1, platforms + 1):
+        db.session.add(StreamingPlatform(name=f'Plataforma {number}', color='#333333'))
+    db.session.commit()
+    return [platform_id for (platform_id,) in db.session.query(StreamingPlatform.id).order_by(StreamingPlatform.id)]
+
+def _title(rng):
+    words = rng.sample(WORDS, rng.randint(1, 3))
+    return f'{" ".join(words)} {rng.randrange(10 ** 5):05d}'
+
+def generate_catalog(links, platforms=8, seed=42, batch_size=DEFAULT_BATCH_SIZE, inactive_ratio=0.1):
+    """Gera ~``links`` vínculos (``links / 2`` conteúdos) e retorna o resumo
+
+    Cada conteúdo recebe de 1 a 3 plataformas (média 2), 5% dos vínculos
+    indisponíveis e ``last_checked`` espalhado pelos últimos 30 dias. O
+    índice de busca, os contadores materializados e o registro de alterações
+    são reconstruídos no fim.
+    """
+    rng = random.Random(seed)
+    platform_ids = seed_platforms(platforms)
+    contents = max(1, links // LINKS_PER_CONTENT)
+    first_id = (db.session.query(db.func.max(Content.id)).scalar() or 0) + 1
+    now = datetime.utcnow()
+
+    content_table = Content.__table__
+    link_table = ContentStreaming.__table__
+    total_links = 0
+    started = time.perf_counter()
+    for start in range(first_id, first_id + contents, batch_size):
+        content_rows = []
+        link_rows = []
+        for content_id in range(start, min(start + batch_size, first_id + contents)):
+            content_rows.append({
+                'id': content_id,
+                'title': _title(rng),
+                'year': rng.randint(1950, 2025),
+                'type': rng.choice(TYPES),
+                'genre': ', '.join(rng.sample(GENRES, rng.randint(1, 2))),
+                'poster_url': f'https://img.example.com/posters/{content_id}.jpg',
+                'is_active': rng.random() >= inactive_ratio,
+                'created_at': now - timedelta(days=rng.randrange(3650)),
+            })
+            content_rows[-1]['updated_at'] = content_rows[-1]['created_at']
+            for streaming_id in rng.sample(platform_ids, min(len(platform_ids), rng.randint(1, 3))):
+                link_rows.append({
+                    'content_id': content_id,
+                    'streaming_id': streaming_id,
+                    'available': rng.random() >= 0.05,
+                    'last_checked': now - timedelta(seconds=rng.randrange(30 * 86400)),
+                })
+        db.session.execute(content_table.insert(), content_rows)
+        db.session.execute(link_table.insert(), link_rows)
+        db.session.commit()
+        total_links += len(link_rows)
+
+    if ensure_search_index():
+        rebuild_search_index()
+    if is_materialized():
+        rebuild_stats()
+    rebuild_change_log()
+    rebuild_similar_index()
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+
+    return {
+        'platforms': len(platform_ids),
+        'contents': contents,
+        'links': total_links,
+        'seed': seed,
+        'seconds': round(time.perf_counter() - started, 2),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database', help='Arquivo SQLite a criar/popular')
+    parser.add_argument('--links', type=int, default=100000)
+    parser.add_argument('--platforms', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from flask import Flask
+    from src.models.db import init_database
+    from src.models.migrations import upgrade_schema
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.abspath(args.database)}'
+    init_database(app)
+    with app.app_context():
+        upgrade_schema()
+        summary = generate_catalog(args.links, platforms=args.platforms, seed=args.seed)
+    print(summary)
+
+if __name__ == '__main__':
+    main()
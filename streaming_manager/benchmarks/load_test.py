@@ -0,0 +1,162 @@
+"""Teste de carga HTTP das rotas de leitura (WSGI x ASGI)
+
+Abre ``--concurrency`` conexões keep-alive contra um servidor já rodando e
+repete os caminhos pedidos durante ``--duration`` segundos, imprimindo
+requisições por segundo, percentis de latência e erros. Só usa a biblioteca
+padrão, então roda contra qualquer servidor:
+
+    gunicorn -w 4 --preload --chdir src "main:create_app()" -b 127.0.0.1:8000
+    uvicorn src.asgi:app --workers 4 --port 8001
+    python benchmarks/load_test.py http://127.0.0.1:8000 --concurrency 64
+    python benchmarks/load_test.py http://127.0.0.1:8001 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = [
+    '/api/content?limit=50',
+    '/api/content?type=anime&limit=50',
+    '/api/content/1',
+    '/api/streamings',
+]
+
+class Connection:
+    """Conexão HTTP/1.1 keep-alive mínima (Content-Length ou chunked)"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def get(self, path, headers):
+        if self.writer is None:
+            await self.open()
+        lines = [f'GET {path} HTTP/1.1', f'Host: {self.host}:{self.port}']
+        lines.extend(f'{name}: {value}' for name, value in headers.items())
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin1'))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('conexão fechada pelo servidor')
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in response_headers:
+            body = await self.reader.readexactly(int(response_headers['content-length']))
+        elif response_headers.get('transfer-encoding') == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                chunks.append(await self.reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            body = b''.join(chunks)
+        else:
+            body = await self.reader.read()
+            self.close()
+
+        if response_headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, len(body)
+
+async def worker(host, port, paths, headers, deadline, offset, results):
+    connection = Connection(host, port)
+    index = offset
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            status, size = await connection.get(path, headers)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            connection.close()
+            results['errors'] += 1
+            continue
+        results['latencies'].append(time.perf_counter() - started)
+        results['bytes'] += size
+        if status >= 400:
+            results['errors'] += 1
+    connection.close()
+
+async def run(base_url, paths, concurrency, duration, headers):
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    prefix = url.path.rstrip('/')
+    paths = [prefix + path for path in paths]
+
+    results = {'latencies': [], 'errors': 0, 'bytes': 0}
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        worker(host, port, paths, headers, deadline, offset, results)
+        for offset in range(concurrency)
+    ))
+    return results, time.perf_counter() - started
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def summarize(results, elapsed, concurrency):
+    latencies = sorted(results['latencies'])
+    if not latencies:
+        return {'requests': 0, 'errors': results['errors']}
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': results['errors'],
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'mb_per_second': round(results['bytes'] / elapsed / 1e6, 2),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base_url', help='ex.: http://127.0.0.1:8000')
+    parser.add_argument('--path', action='append', dest='paths',
+                        help='caminho a requisitar (repetível; padrão: rotas de leitura)')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--header', action='append', default=[],
+                        help='header extra "Nome: valor" (ex.: para testar If-None-Match)')
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    args = parser.parse_args(argv)
+
+    paths = args.paths or DEFAULT_PATHS
+    headers = dict(header.split(':', 1) for header in args.header)
+    headers = {name.strip(): value.strip() for name, value in headers.items()}
+
+    if args.warmup:
+        asyncio.run(run(args.base_url, paths, args.concurrency, args.warmup, headers))
+    results, elapsed = asyncio.run(run(args.base_url, paths, args.concurrency, args.duration, headers))
+    summary = summarize(results, elapsed, args.concurrency)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for key, value in summary.items():
+            print(f'{key:>20}: {value}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""Modo ASGI: leituras públicas com driver assíncrono, demais rotas via WSGI
+
+    uvicorn src.asgi:app --workers 2
+
+GET /api/content, /api/content/<id> e /api/streamings são atendidas no event
+loop com AsyncSession (aiosqlite ou asyncpg), reaproveitando a montagem das
+consultas, os ETags e o cache de respostas das rotas Flask. Todo o resto
+(escritas, autenticação, listagens em streaming, arquivos estáticos) segue
+para o app Flask em um pool de threads.
+"""
+import io
+import os
+import re
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from flask import jsonify, make_response, request
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from src.main import create_app
+from src.models.catalog import CatalogVersion
+from src.models.content import Content, StreamingPlatform
+from src.models.db import DEFAULT_SQLITE_PRAGMAS, apply_sqlite_pragmas, sqlite_read_only_url
+from src.models.search import search_index_available
+from src.models.similar import similar_statement
+from src.routes.caching import cache_key, catalog_etag, response_cache, set_catalog_headers, wants_ndjson
+from src.routes.content import (
+    batch_payload, build_batch, build_listing, content_detail, listing_payload, parse_fields, parse_ids, parse_include
+)
+from src.routes.metrics import instrument_engine
+from src.routes.serialization import ContentSerializer, parse_shape, wants_thumbnails
+from src.routes.streaming import build_streaming_list
+
+# Driver assíncrono de cada banco suportado
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+def async_database_url(config):
+    """URL do engine assíncrono: ASYNC_DATABASE_URL ou a do pool de leitura
+
+    Sem réplica configurada, um SQLite em arquivo é aberto em mode=ro.
+    Retorna None quando não há driver assíncrono (tudo vai para o Flask).
+    """
+    if config.get('ASYNC_DATABASE_URL'):
+        return make_url(config['ASYNC_DATABASE_URL'])
+
+    read_url = config.get('DATABASE_READ_URL')
+    url = make_url(read_url or config['SQLALCHEMY_DATABASE_URI'])
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        return None
+    if url.get_backend_name() == 'sqlite' and not read_url:
+        if url.database in (None, '', ':memory:'):
+            return None
+        url = sqlite_read_only_url(url)
+    return url.set(drivername=driver)
+
+def create_read_engine(config):
+    url = async_database_url(config)
+    if url is None:
+        return None
+    options = config.get('SQLALCHEMY_READ_ENGINE_OPTIONS', {})
+    engine = create_async_engine(url, pool_size=options.get('pool_size', 10))
+    if url.get_backend_name() == 'sqlite':
+        pragmas = {**DEFAULT_SQLITE_PRAGMAS, **config.get('SQLITE_PRAGMAS', {})}
+        apply_sqlite_pragmas(engine.sync_engine, pragmas, read_only=True)
+    if config.get('METRICS_ENABLED', True):
+        instrument_engine(engine.sync_engine)
+    return engine
+
+async def fetch_rows(session, statement, serializer):
+    """Versão assíncrona de ``content.fetch_rows``"""
+    rows = (await session.execute(statement)).all()
+    links = serializer.links_statement(rows)
+    return rows, (await session.execute(links)).all() if links is not None else []
+
+class ThreadedWsgiInstance(WsgiToAsgiInstance):
+    # O adaptador padrão roda todas as requisições WSGI na mesma thread
+    # (thread_sensitive); as rotas Flask não dependem disso, então usamos o
+    # pool de threads do event loop
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False)
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await ThreadedWsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+class AsyncCatalogApp:
+    """App ASGI que responde as leituras públicas sem passar pelo WSGI
+
+    Cada rota nativa tem o mesmo endpoint da rota Flask equivalente, então
+    ETag, chave do ``response_cache`` e headers (inclusive CORS, via
+    ``process_response``) são idênticos nos dois modos. Um handler pode
+    devolver None para delegar a requisição ao Flask.
+    """
+
+    def __init__(self, flask_app, engine=None):
+        self.flask_app = flask_app
+        self.wsgi = ThreadedWsgiToAsgi(flask_app)
+        self.engine = engine if engine is not None else create_read_engine(flask_app.config)
+        self.routes = (
+            (re.compile(r'/api/content'), 'content.get_content', self.list_content),
+            (re.compile(r'/api/content/(\d+)'), 'content.get_content_by_id', self.get_content),
+            (re.compile(r'/api/streamings'), 'streaming.get_streamings', self.list_streamings),
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] == 'GET' and self.engine is not None:
+            for pattern, endpoint, handler in self.routes:
+                match = pattern.fullmatch(scope['path'])
+                if match is None:
+                    continue
+                view_args = {'content_id': int(match.group(1))} if match.groups() else {}
+                if await self.dispatch(scope, send, endpoint, handler, view_args):
+                    return
+                break
+
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Descobre uma vez (consulta síncrona) se o índice FTS5 existe
+                with self.flask_app.app_context():
+                    search_index_available()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.engine is not None:
+                    await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def build_environ(self, scope):
+        instance = WsgiToAsgiInstance(self.flask_app)
+        instance.scope = scope
+        return instance.build_environ(scope, io.BytesIO())
+
+    async def dispatch(self, scope, send, endpoint, handler, view_args):
+        """Equivalente assíncrono de ``conditional_get`` + ``cached_response``"""
+        environ = self.build_environ(scope)
+        with self.flask_app.request_context(environ):
+            # before_request (métricas); after_request roda em process_response
+            self.flask_app.preprocess_request()
+            async with AsyncSession(self.engine) as session:
+                version = await session.scalar(
+                    select(CatalogVersion.version).where(CatalogVersion.id == 1)
+                ) or 0
+                etag = catalog_etag(version)
+
+                if request.if_none_match.contains(etag):
+                    response = self.flask_app.response_class(status=304)
+                else:
+                    key = cache_key(endpoint, view_args)
+                    entry = response_cache.get(key, version) if response_cache.enabled else None
+                    if entry is not None:
+                        body, mimetype = entry
+                        response = self.flask_app.response_class(body, mimetype=mimetype)
+                    else:
+                        try:
+                            response = await handler(session, **view_args)
+                        except Exception as e:
+                            response = make_response(jsonify({'error': str(e)}), 500)
+                        if response is None:
+                            return False
+                        if response.status_code == 200 and response_cache.enabled:
+                            response_cache.set(key, version, response.get_data(), response.mimetype)
+
+                if response.status_code in (200, 304):
+                    set_catalog_headers(response, etag)
+
+            response = self.flask_app.process_response(response)
+            headers = response.get_wsgi_headers(environ)
+            body = response.get_data()
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers.items()]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+        return True
+
+    async def list_content(self, session):
+        if 'ids' in request.args:
+            return await self.content_batch(session)
+
+        ndjson = wants_ndjson()
+        try:
+            listing = build_listing(request.args, select(Content), ndjson)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        # Listagens em streaming continuam no Flask (yield_per síncrono)
+        if listing.stream:
+            return None
+
+        rows, links = await fetch_rows(session, listing.statement, listing.serializer)
+        facet_results = {facet: (await session.execute(statement)).all() for facet, statement in listing.facets.items()}
+        return jsonify(listing_payload(rows, listing, links, facet_results))
+
+    async def content_batch(self, session):
+        try:
+            ids = parse_ids(request.args['ids'])
+            serializer = ContentSerializer(parse_fields(request.args.get('fields')),
+                                           parse_shape(request.args.get('shape')),
+                                           wants_thumbnails(request.args))
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        rows, links = await fetch_rows(session, build_batch(ids, select(Content), serializer), serializer)
+        return jsonify(batch_payload(rows, ids, serializer, links))
+
+    async def get_content(self, session, content_id):
+        try:
+            include = parse_include(request.args.get('include'))
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        content = await session.get(Content, content_id, options=[Content.eager_streamings()])
+        if content is None:
+            # A rota Flask monta a resposta de erro
+            return None
+        similar_rows = (await session.execute(similar_statement(content_id))).all() if 'similar' in include else ()
+        return jsonify(content_detail(content, include, wants_thumbnails(request.args), similar_rows))
+
+    async def list_streamings(self, session):
+        statement = build_streaming_list(request.args, select(StreamingPlatform))
+        streamings = (await session.scalars(statement)).all()
+        return jsonify([streaming.to_dict(wants_thumbnails(request.args)) for streaming in streamings])
+
+app = AsyncCatalogApp(create_app())
@@ -0,0 +1,141 @@
+"""Configurações do app, escolhidas por APP_CONFIG (production, development, testing)
+
+Os valores vêm das variáveis de ambiente (e do ``.env``) no momento em que
+este módulo é importado; ``create_app`` aplica a classe escolhida e, por
+cima, os ``overrides`` passados a ele.
+"""
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+load_dotenv(os.path.join(os.path.dirname(BASE_DIR), '.env'))
+
+def _flag(name, default):
+    return os.environ.get(name, default).lower() == 'true'
+
+def _database_url():
+    # DATABASE_URL pode apontar para outro SQLite ou PostgreSQL
+    url = os.environ.get('DATABASE_URL') or f"sqlite:///{os.path.join(BASE_DIR, 'database', 'app.db')}"
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+class Config:
+    SECRET_KEY = os.environ.get('FLASK_SECRET_KEY', 'your-production-secret-key-here')
+    DEBUG = False
+    TESTING = False
+
+    # Configuração JWT
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', SECRET_KEY)
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
+    JWT_ALGORITHM = 'HS256'
+
+    # Claims de tokens já verificados reaproveitados pelas rotas de admin (0 desabilita)
+    JWT_CACHE_SIZE = int(os.environ.get('JWT_CACHE_SIZE', '1024'))
+    JWT_CACHE_TTL = int(os.environ.get('JWT_CACHE_TTL', '300'))
+
+    # Rate limit (token bucket por IP): "N/segundos" para logins que falharam,
+    # para verify/logout (chamado a cada carga do frontend) e para as rotas de
+    # admin; backend memory (por processo), redis://... ou mod:Classe
+    RATE_LIMIT_ENABLED = _flag('RATE_LIMIT_ENABLED', 'true')
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_AUTH = os.environ.get('RATE_LIMIT_AUTH', '10/60')
+    RATE_LIMIT_SESSION = os.environ.get('RATE_LIMIT_SESSION', '300/60')
+    RATE_LIMIT_ADMIN = os.environ.get('RATE_LIMIT_ADMIN', '100/10')
+
+    CORS_ORIGINS = ['*']
+
+    SQLALCHEMY_DATABASE_URI = _database_url()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': _flag('DB_POOL_PRE_PING', 'false'),
+    }
+    # Pool somente leitura para as rotas GET (réplica ou o próprio SQLite em mode=ro)
+    DATABASE_READ_URL = os.environ.get('DATABASE_READ_URL')
+    SQLITE_READ_ONLY_POOL = _flag('SQLITE_READ_ONLY_POOL', 'false')
+    # Engine assíncrono do modo ASGI (padrão: aiosqlite/asyncpg sobre o banco de leitura)
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+    SQLALCHEMY_READ_ENGINE_OPTIONS = {'pool_size': int(os.environ.get('DB_READ_POOL_SIZE', '10'))}
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', '-64000')),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', '268435456')),
+        'busy_timeout': int(os.environ.get('DB_BUSY_TIMEOUT', '5000')),
+    }
+
+    # Estatísticas lidas de contadores mantidos pelas rotas de escrita
+    STATS_MATERIALIZED = _flag('STATS_MATERIALIZED', 'false')
+    # max-age das rotas de leitura (ETag + revalidação fazem o resto)
+    CATALOG_CACHE_MAX_AGE = int(os.environ.get('CATALOG_CACHE_MAX_AGE', '0'))
+    # Cache LRU em memória das respostas de leitura (0 desabilita)
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '256'))
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+    # Sincronização de disponibilidade (python src/manage.py sync-availability):
+    # sem provedor configurado o comando se recusa a rodar
+    AVAILABILITY_PROVIDER = os.environ.get('AVAILABILITY_PROVIDER') or None
+    AVAILABILITY_CONCURRENCY = int(os.environ.get('AVAILABILITY_CONCURRENCY', '8'))
+    AVAILABILITY_BATCH_SIZE = int(os.environ.get('AVAILABILITY_BATCH_SIZE', '500'))
+    AVAILABILITY_RATE_LIMITS = os.environ.get('AVAILABILITY_RATE_LIMITS', '')
+    AVAILABILITY_DEFAULT_RATE = float(os.environ.get('AVAILABILITY_DEFAULT_RATE', '5'))
+    AVAILABILITY_MAX_AGE_HOURS = float(os.environ.get('AVAILABILITY_MAX_AGE_HOURS', '24'))
+    # Vínculos cuja verificação falhou só voltam à fila depois disso
+    AVAILABILITY_RETRY_MINUTES = float(os.environ.get('AVAILABILITY_RETRY_MINUTES', '60'))
+
+    # Métricas por requisição em /api/metrics; requisições acima de SLOW_REQUEST_MS
+    # são logadas com a lista de consultas (0 desabilita o log)
+    METRICS_ENABLED = _flag('METRICS_ENABLED', 'true')
+    # Bearer token exigido por /api/metrics e /api/cache/stats (sem ele, 404)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', '500'))
+
+    # Encoder das respostas JSON: orjson (se instalado) ou json da stdlib
+    JSON_ENCODER = os.environ.get('JSON_ENCODER', 'orjson')
+
+    # Miniaturas em /api/images: buscador das imagens de origem (http, fake ou
+    # mod:Classe), cache em disco limitado em bytes e larguras geradas
+    IMAGE_FETCHER = os.environ.get('IMAGE_FETCHER', 'http')
+    IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR') or os.path.join(BASE_DIR, 'database', 'images')
+    IMAGE_CACHE_MAX_BYTES = int(os.environ.get('IMAGE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+    IMAGE_WIDTHS = tuple(int(width) for width in os.environ.get('IMAGE_WIDTHS', '160,320,640').split(','))
+    IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', '80'))
+
+    # Títulos parecidos guardados por conteúdo (?include=similar); mudar o valor
+    # exige python src/manage.py rebuild-similar
+    SIMILAR_COUNT = int(os.environ.get('SIMILAR_COUNT', '10'))
+
+class ProductionConfig(Config):
+    pass
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    JWT_SECRET_KEY = 'testing-secret-key-with-at-least-32-bytes'
+    RESPONSE_CACHE_SIZE = 0
+    SLOW_REQUEST_MS = 0
+    RATE_LIMIT_ENABLED = False
+    IMAGE_FETCHER = 'fake'
+    AVAILABILITY_PROVIDER = 'fake'
+
+CONFIGS = {
+    'production': ProductionConfig,
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+}
+
+def get_config(name=None):
+    """Classe de configuração por nome (padrão: APP_CONFIG ou production)"""
+    name = name or os.environ.get('APP_CONFIG', 'production')
+    if name not in CONFIGS:
+        raise ValueError(f'APP_CONFIG inválido: {name} (use {", ".join(CONFIGS)})')
+    return CONFIGS[name]
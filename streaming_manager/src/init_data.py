@@ -2,6 +2,7 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from src.models.catalog import bump_catalog_version
 from src.models.content import StreamingPlatform, db
 
 def init_streaming_platforms():
@@ -50,18 +51,27 @@ def init_streaming_platforms():
         }
     ]
     
+    created = []
     for platform_data in platforms:
         # Verificar se já existe
         existing = StreamingPlatform.query.filter_by(name=platform_data['name']).first()
         if not existing:
             platform = StreamingPlatform(**platform_data)
             db.session.add(platform)
+            created.append(platform)
     
+    if created:
+        db.session.flush()
+        bump_catalog_version(streamings=[platform.id for platform in created])
     db.session.commit()
     print(f"Inicializadas {len(platforms)} plataformas de streaming")
 
 if __name__ == '__main__':
-    from main import app
+    from src.main import create_app
+    from src.models.migrations import upgrade_schema
+
+    app = create_app()
     with app.app_context():
+        upgrade_schema()
         init_streaming_platforms()
 
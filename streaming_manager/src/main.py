@@ -1,68 +1,87 @@
+"""Application factory do Stream Manager
+
+    gunicorn -w 4 --preload --chdir src 'main:create_app()'
+
+Importar este módulo não cria o app nem toca no banco: ``create_app`` monta
+tudo sob demanda (``main:app`` continua funcionando, criado no primeiro
+acesso). Tabelas e migrações ficam a cargo de ``python src/manage.py migrate``,
+rodado uma vez por deploy, e não de cada worker.
+"""
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-from dotenv import load_dotenv
-load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
-from flask import Flask, send_from_directory, jsonify
-from flask_cors import CORS
-from flask_jwt_extended import JWTManager
-from datetime import timedelta
-from src.models.db import db
-from src.routes.content import content_bp
-from src.routes.streaming import streaming_bp
-from src.routes.auth import auth_bp
+from flask import Flask, jsonify
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'your-production-secret-key-here')
+def create_app(config=None, overrides=None):
+    """Monta o app Flask
 
-# Configuração JWT
-app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', app.config['SECRET_KEY'])
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
-app.config['JWT_ALGORITHM'] = 'HS256'
+    ``config`` é uma classe de ``src.config`` ou seu nome (padrão:
+    APP_CONFIG); ``overrides`` sobrescreve chaves depois dela.
+    """
+    # Imports aqui: ``import main`` fica barato para o gunicorn e para as
+    # ferramentas que só precisam de ``create_app``
+    from flask_cors import CORS
+    from flask_jwt_extended import JWTManager
+    from src.config import get_config
+    from src.models.db import init_database
+    from src.models.images import init_images
+    from src.routes.auth import auth_bp, init_token_cache
+    from src.routes.caching import init_response_cache, response_cache
+    from src.routes.content import content_bp
+    from src.routes.images import images_bp
+    from src.routes.metrics import init_metrics, metrics_bp, metrics_token_required
+    from src.routes.ratelimit import init_rate_limit
+    from src.routes.serialization import init_serialization
+    from src.routes.static_files import init_static_files
+    from src.routes.streaming import streaming_bp
 
-# Inicializar JWT
-jwt = JWTManager(app)
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config.from_object(config if isinstance(config, type) else get_config(config))
+    app.config.update(overrides or {})
 
-# Habilitar CORS para produção
-CORS(app, origins=["*"])
+    JWTManager(app)
+    CORS(app, origins=app.config['CORS_ORIGINS'])
 
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(content_bp, url_prefix='/api')
-app.register_blueprint(streaming_bp, url_prefix='/api')
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(content_bp, url_prefix='/api')
+    app.register_blueprint(streaming_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+    app.register_blueprint(images_bp, url_prefix='/api')
 
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+    init_serialization(app)
+    init_response_cache(app)
+    init_database(app)
+    init_metrics(app)
+    init_rate_limit(app)
+    init_token_cache(app)
+    init_images(app)
+    init_static_files(app)
 
-# Inicializar banco apenas se não estiver em produção sem variáveis de ambiente específicas
-try:
-    with app.app_context():
-        db.create_all()
-except Exception as e:
-    print(f"Database initialization error: {e}")
+    # Health check endpoint
+    @app.route('/api/health')
+    def health_check():
+        return jsonify({"status": "healthy", "message": "API is running"})
 
-# Health check endpoint
-@app.route('/api/health')
-def health_check():
-    return jsonify({"status": "healthy", "message": "API is running"})
+    @app.route('/api/cache/stats')
+    @metrics_token_required
+    def cache_stats():
+        return jsonify(response_cache.stats())
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
+    return app
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+def __getattr__(name):
+    # ``main:app`` (gunicorn, scripts antigos): cria o app no primeiro acesso
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    from src.models.migrations import upgrade_schema
+
+    app = create_app('development')
+    # Só o servidor de desenvolvimento cria/migra o banco sozinho
+    with app.app_context():
+        upgrade_schema()
+    app.run(host='0.0.0.0', port=5000, debug=True)
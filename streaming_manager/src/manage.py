@@ -0,0 +1,223 @@
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+def rebuild_search(args):
+    """Recria o índice de busca (FTS5) a partir da tabela content"""
+    from src.models.search import ensure_search_index, rebuild_search_index
+
+    if not ensure_search_index():
+        print('Banco sem suporte a FTS5: a busca continua usando ILIKE')
+        return 1
+    count = rebuild_search_index()
+    print(f'Índice de busca reconstruído com {count} conteúdos')
+    return 0
+
+def rebuild_similar(args):
+    """Recalcula os títulos parecidos de todo o catálogo"""
+    import time
+    from src.models.similar import rebuild_similar_index
+
+    started = time.perf_counter()
+    count = rebuild_similar_index()
+    print(f'Similares recalculados para {count} conteúdos em {time.perf_counter() - started:.1f} s')
+    return 0
+
+def refresh_similar(args):
+    """Aplica aos títulos parecidos as alterações do catálogo desde a última rodada"""
+    import json
+    import time
+    from src.models.similar import refresh_similar_index
+
+    while True:
+        report = refresh_similar_index()
+        print(json.dumps(report))
+        if not args.loop:
+            return 0
+        # Nada novo: espera antes da próxima rodada
+        if report['mode'] == 'unchanged':
+            time.sleep(args.interval)
+
+def rebuild_stats(args):
+    """Recalcula os contadores materializados de /api/content/stats"""
+    from src.models.stats import rebuild_stats as rebuild_counters
+
+    counters = rebuild_counters()
+    print(f"Estatísticas recalculadas: {counters.get('active', 0)} ativos, {counters.get('inactive', 0)} inativos")
+    return 0
+
+def migrate(args):
+    """Aplica as migrações de schema pendentes"""
+    from src.models.migrations import current_version, pending_migrations, upgrade_schema
+
+    if args.status:
+        print(f'Versão atual do schema: {current_version()}')
+        for version, name, _ in pending_migrations():
+            print(f'  pendente: {version} {name}')
+        return 0
+
+    applied = upgrade_schema()
+    for version, name in applied:
+        print(f'Aplicada migração {version} {name}')
+    print(f'Schema na versão {current_version()}')
+    return 0
+
+def init_db(args):
+    """Cria as tabelas, aplica as migrações e cadastra as plataformas padrão"""
+    from src.init_data import init_streaming_platforms
+
+    migrate(args)
+    init_streaming_platforms()
+    return 0
+
+def import_file(args):
+    """Importa um arquivo JSON Lines/CSV com upsert por title+year+type"""
+    from src.models.bulk import detect_format, import_catalog, read_records
+
+    fmt = args.format or detect_format(args.file)
+    with open(args.file, encoding='utf-8-sig', newline='') as stream:
+        report = import_catalog(
+            read_records(stream, fmt),
+            batch_size=args.batch_size,
+            partial=args.partial,
+            dry_run=args.dry_run
+        )
+
+    for error in report['errors']:
+        print(f"linha {error['line']}: {'; '.join(error['errors'])}", file=sys.stderr)
+    print(f"{report['total']} registros, {report['valid']} válidos, "
+          f"{report['inserted']} inseridos, {report['updated']} atualizados")
+    if not report['imported'] and not args.dry_run:
+        print('Nada foi importado (use --partial para gravar só as linhas válidas)', file=sys.stderr)
+        return 1
+    return 0
+
+def export_file(args):
+    """Exporta o catálogo completo sem carregá-lo na memória"""
+    from src.models.bulk import detect_format, export_catalog
+
+    fmt = args.format or detect_format(args.output)
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        for chunk in export_catalog(fmt, batch_size=args.batch_size):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+def sync_availability(args):
+    """Atualiza a disponibilidade dos vínculos mais desatualizados"""
+    import json
+    import time
+    from datetime import timedelta
+    from flask import current_app
+    from src.models.availability import availability_backlog, sync_from_config
+
+    max_age_hours = args.max_age_hours
+    if max_age_hours is None:
+        max_age_hours = current_app.config.get('AVAILABILITY_MAX_AGE_HOURS', 24)
+    if args.status:
+        print(json.dumps(availability_backlog(timedelta(hours=max_age_hours)), indent=2))
+        return 0
+
+    try:
+        sync = sync_from_config(
+            current_app.config,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            max_age=timedelta(hours=max_age_hours)
+        )
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    while True:
+        report = sync.run_once(limit=args.limit)
+        print(json.dumps(report))
+        if not args.loop:
+            return 0
+        # Fila vazia: espera antes da próxima rodada
+        if report['selected'] < (args.limit or sync.batch_size * 10):
+            time.sleep(args.interval)
+
+def compress_static(args):
+    """Gera as variantes .br/.gz do build do frontend servidas pelo app"""
+    from flask import current_app
+    from src.routes.static_files import available_encodings, compress_static as compress_files
+
+    root = args.dir or current_app.static_folder
+    if 'br' not in available_encodings():
+        print('Pacote brotli não instalado: gerando apenas .gz', file=sys.stderr)
+    for path, size, sizes in compress_files(root, min_size=args.min_size):
+        variants = ', '.join(f'{encoding} {compressed}' for encoding, compressed in sizes.items()) or 'sem variantes'
+        print(f'{path}: {size} bytes -> {variants}')
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Tarefas administrativas do Stream Manager')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('migrate', help='Aplica as migrações de schema pendentes')
+    command.add_argument('--status', action='store_true', help='Apenas lista as migrações pendentes')
+    command.set_defaults(func=migrate)
+
+    command = commands.add_parser('init-db', help='Prepara um banco novo (migrações + plataformas padrão)')
+    command.set_defaults(func=init_db, status=False)
+
+    command = commands.add_parser('import', help='Importa conteúdos de um arquivo JSON Lines ou CSV')
+    command.add_argument('file')
+    command.add_argument('--format', choices=['jsonl', 'csv'], help='Padrão: deduzido pela extensão')
+    command.add_argument('--batch-size', type=int, default=500)
+    command.add_argument('--partial', action='store_true', help='Grava as linhas válidas mesmo havendo erros')
+    command.add_argument('--dry-run', action='store_true', help='Apenas valida o arquivo')
+    command.set_defaults(func=import_file)
+
+    command = commands.add_parser('export', help='Exporta o catálogo para JSON Lines ou CSV')
+    command.add_argument('--output', '-o', help='Arquivo de saída (padrão: stdout)')
+    command.add_argument('--format', choices=['jsonl', 'csv'], help='Padrão: deduzido pela extensão')
+    command.add_argument('--batch-size', type=int, default=1000)
+    command.set_defaults(func=export_file)
+
+    command = commands.add_parser('sync-availability', help='Atualiza a disponibilidade dos vínculos mais antigos')
+    command.add_argument('--limit', type=int, help='Vínculos por rodada (padrão: 10 lotes)')
+    command.add_argument('--concurrency', type=int, help='Consultas simultâneas ao provedor')
+    command.add_argument('--batch-size', type=int, help='Resultados gravados por transação')
+    command.add_argument('--max-age-hours', type=float, help='Idade a partir da qual um vínculo vence')
+    command.add_argument('--loop', action='store_true', help='Continua rodando (worker em segundo plano)')
+    command.add_argument('--interval', type=float, default=60, help='Pausa com a fila vazia, em segundos')
+    command.add_argument('--status', action='store_true', help='Apenas mostra a fila de vínculos vencidos')
+    command.set_defaults(func=sync_availability)
+
+    command = commands.add_parser('compress-static', help='Pré-comprime (brotli/gzip) o build do frontend')
+    command.add_argument('--dir', help='Pasta do build (padrão: src/static)')
+    command.add_argument('--min-size', type=int, default=256, help='Arquivos menores ficam sem variantes')
+    command.set_defaults(func=compress_static)
+
+    command = commands.add_parser('rebuild-search', help='Reconstrói o índice de busca por título/gênero')
+    command.set_defaults(func=rebuild_search)
+
+    command = commands.add_parser('rebuild-stats', help='Recalcula os contadores de /api/content/stats')
+    command.set_defaults(func=rebuild_stats)
+
+    command = commands.add_parser('rebuild-similar', help='Recalcula os títulos parecidos de cada conteúdo')
+    command.set_defaults(func=rebuild_similar)
+
+    command = commands.add_parser('refresh-similar', help='Atualiza os títulos parecidos afetados por alterações')
+    command.add_argument('--loop', action='store_true', help='Continua rodando (worker em segundo plano)')
+    command.add_argument('--interval', type=float, default=10, help='Pausa sem alterações novas, em segundos')
+    command.set_defaults(func=refresh_similar)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    from main import create_app
+    app = create_app()
+    with app.app_context():
+        return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
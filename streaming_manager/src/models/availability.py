@@ -0,0 +1,323 @@
+import hashlib
+import importlib
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict, deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, or_
+from .db import db
+from .bulk import apply_availability
+from .content import Content, ContentStreaming, StreamingPlatform
+
+# Vínculo a verificar, com o que um provedor precisa para consultar a plataforma
+LinkCheck = namedtuple('LinkCheck', 'content_id streaming_id title year type platform')
+
+DEFAULT_MAX_AGE = timedelta(hours=24)
+# Espera antes de tentar de novo um vínculo cuja verificação falhou
+DEFAULT_RETRY_DELAY = timedelta(hours=1)
+
+class AvailabilityProvider(ABC):
+    """Interface dos provedores de disponibilidade
+
+    ``check`` recebe um ``LinkCheck`` e retorna se o conteúdo está disponível
+    na plataforma. É chamado em várias threads ao mesmo tempo e não deve
+    acessar o banco; uma exceção conta como falha e o vínculo só volta à
+    fila depois de ``retry_delay``.
+    """
+
+    @abstractmethod
+    def check(self, link):
+        ...
+
+class FakeProvider(AvailabilityProvider):
+    """Provedor local para testes e benchmarks
+
+    A resposta de cada vínculo é determinística (hash de ``seed`` com os ids),
+    disponível com probabilidade ``availability``; trocar ``seed`` simula
+    mudanças no catálogo das plataformas. ``latency`` (segundos) e
+    ``failure_rate`` imitam uma API externa.
+    """
+
+    def __init__(self, availability=0.9, latency=0.0, failure_rate=0.0, seed='fake'):
+        self.availability = float(availability)
+        self.latency = float(latency)
+        self.failure_rate = float(failure_rate)
+        self.seed = str(seed)
+        self._random = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def check(self, link):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate:
+            with self._lock:
+                failed = self._random.random() < self.failure_rate
+            if failed:
+                raise RuntimeError(f'Falha simulada em {link.platform}')
+        raw = f'{self.seed}:{link.content_id}:{link.streaming_id}'.encode('utf-8')
+        fraction = int.from_bytes(hashlib.sha1(raw).digest()[:8], 'big') / 2 ** 64
+        return fraction < self.availability
+
+PROVIDERS = {'fake': FakeProvider}
+
+def load_provider(spec, **options):
+    """Instancia um provedor registrado (``fake``) ou ``pacote.modulo:Classe``"""
+    if spec in PROVIDERS:
+        return PROVIDERS[spec](**options)
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise ValueError(f'Provedor desconhecido: {spec}')
+    return getattr(importlib.import_module(module_name), class_name)(**options)
+
+class TokenBucket:
+    """Limite de ``rate`` requisições por segundo com rajadas de até ``capacity``"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Tira uma ficha sem bloquear; retorna 0 ou quantos segundos faltam para a próxima"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+def parse_rate_limits(raw):
+    """Converte ``"1=5,2=0.5"`` em ``{1: 5.0, 2: 0.5}`` (plataforma -> req/s)"""
+    limits = {}
+    for item in (raw or '').split(','):
+        if not item.strip():
+            continue
+        streaming_id, _, rate = item.partition('=')
+        limits[int(streaming_id)] = float(rate)
+    return limits
+
+def _stale_filter(max_age, now=None):
+    cutoff = (now or datetime.utcnow()) - max_age
+    return or_(ContentStreaming.last_checked == None, ContentStreaming.last_checked < cutoff)
+
+def stale_links(limit, max_age=DEFAULT_MAX_AGE, now=None):
+    """Até ``limit`` vínculos vencidos, os nunca verificados e mais antigos primeiro
+
+    Vínculos com falha recente (``retry_after`` no futuro) ficam de fora, então
+    os que falham sempre não ocupam a frente da fila a cada rodada.
+    """
+    now = now or datetime.utcnow()
+    rows = db.session.query(
+        ContentStreaming.content_id, ContentStreaming.streaming_id,
+        Content.title, Content.year, Content.type, StreamingPlatform.name
+    ).join(Content, Content.id == ContentStreaming.content_id).join(
+        StreamingPlatform, StreamingPlatform.id == ContentStreaming.streaming_id
+    ).filter(
+        _stale_filter(max_age, now),
+        or_(ContentStreaming.retry_after == None, ContentStreaming.retry_after <= now)
+    ).order_by(
+        ContentStreaming.last_checked.asc().nulls_first()
+    ).limit(limit)
+    return [LinkCheck(*row) for row in rows]
+
+def availability_backlog(max_age=DEFAULT_MAX_AGE, now=None):
+    """Vínculos vencidos por plataforma, para dimensionar o sincronizador"""
+    rows = db.session.query(
+        ContentStreaming.streaming_id,
+        func.count(),
+        func.sum(case((ContentStreaming.last_checked == None, 1), else_=0)),
+        func.min(ContentStreaming.last_checked)
+    ).join(Content, Content.id == ContentStreaming.content_id).filter(
+        _stale_filter(max_age, now)
+    ).group_by(ContentStreaming.streaming_id)
+
+    by_streaming = {}
+    oldest = None
+    never_checked = 0
+    for streaming_id, count, unchecked, oldest_check in rows:
+        by_streaming[streaming_id] = count
+        never_checked += unchecked or 0
+        if oldest_check is not None and (oldest is None or oldest_check < oldest):
+            oldest = oldest_check
+
+    return {
+        'total': sum(by_streaming.values()),
+        'never_checked': never_checked,
+        'oldest_check': oldest.isoformat() if oldest else None,
+        'max_age_hours': max_age.total_seconds() / 3600,
+        'by_streaming': by_streaming
+    }
+
+class AvailabilitySync:
+    """Atualiza ``available``/``last_checked`` dos vínculos mais desatualizados
+
+    As consultas ao provedor rodam em ``concurrency`` threads, cada
+    plataforma limitada pelo seu token bucket (``rate_limits`` ou
+    ``default_rate`` req/s). A thread chamadora mantém uma fila por
+    plataforma e só entrega um vínculo a uma thread quando o bucket dele tem
+    ficha, então uma plataforma lenta não prende as threads das demais. Os
+    resultados são gravados na thread chamadora (que tem o contexto da
+    aplicação) em lotes de ``batch_size`` via ``apply_availability``: uma
+    transação por lote.
+    """
+
+    def __init__(self, provider, concurrency=8, batch_size=500, rate_limits=None,
+                 default_rate=5.0, max_age=DEFAULT_MAX_AGE, retry_delay=DEFAULT_RETRY_DELAY):
+        self.provider = provider
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.rate_limits = rate_limits or {}
+        self.default_rate = default_rate
+        self.max_age = max_age
+        self.retry_delay = retry_delay
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, streaming_id):
+        with self._lock:
+            if streaming_id not in self._buckets:
+                rate = self.rate_limits.get(streaming_id, self.default_rate)
+                self._buckets[streaming_id] = TokenBucket(rate)
+            return self._buckets[streaming_id]
+
+    def _check(self, link):
+        return bool(self.provider.check(link))
+
+    def _dispatch(self, queues, pending, executor):
+        """Entrega às threads livres os vínculos cujas plataformas têm ficha
+
+        Alterna as plataformas a cada vínculo. Retorna quantos segundos
+        faltam para a próxima ficha de uma plataforma sem ficha (None se
+        nenhuma ficou esperando).
+        """
+        next_token = None
+        progress = True
+        while progress and len(pending) < self.concurrency:
+            progress = False
+            for streaming_id in list(queues):
+                if len(pending) >= self.concurrency:
+                    break
+                pause = self.bucket(streaming_id).try_acquire()
+                if pause:
+                    next_token = pause if next_token is None else min(next_token, pause)
+                    continue
+                link = queues[streaming_id].popleft()
+                pending[executor.submit(self._check, link)] = link
+                progress = True
+                if not queues[streaming_id]:
+                    del queues[streaming_id]
+        return next_token
+
+    def _write_back(self, results, report):
+        changes = [{'content_id': link.content_id, 'streaming_id': link.streaming_id, 'available': available}
+                   for link, available in results]
+        result = apply_availability(changes, batch_size=self.batch_size)
+        if result['applied']:
+            report['checked'] += len(results)
+            report['changed'] += result['updated'] + result['inserted']
+        else:
+            # Ex.: conteúdo removido durante a rodada; o lote é tentado de novo depois
+            db.session.rollback()
+            report['failed'] += len(results)
+        report['batches'] += 1
+
+    def _defer(self, links):
+        """Adia os vínculos que falharam para depois de ``retry_delay`` (uma transação)"""
+        table = ContentStreaming.__table__
+        retry_after = datetime.utcnow() + self.retry_delay
+        db.session.execute(
+            table.update().where(
+                table.c.content_id == db.bindparam('b_content_id'),
+                table.c.streaming_id == db.bindparam('b_streaming_id')
+            ).values(retry_after=retry_after),
+            [{'b_content_id': link.content_id, 'b_streaming_id': link.streaming_id} for link in links]
+        )
+        db.session.commit()
+
+    def run_once(self, limit=None):
+        """Verifica até ``limit`` vínculos vencidos e retorna as métricas da rodada"""
+        started = time.perf_counter()
+        links = stale_links(limit or self.batch_size * 10, self.max_age)
+        report = {
+            'selected': len(links),
+            'checked': 0,
+            'changed': 0,
+            'failed': 0,
+            'batches': 0,
+            'rate_limited_seconds': 0.0,
+            'by_streaming': Counter()
+        }
+
+        queues = defaultdict(deque)
+        for link in links:
+            queues[link.streaming_id].append(link)
+        pending = {}
+        results = []
+        failures = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while queues or pending:
+                next_token = self._dispatch(queues, pending, executor)
+                # Threads livres e vínculos na fila: só o rate limit impede de seguir
+                throttled = bool(queues) and len(pending) < self.concurrency
+                paused = time.perf_counter()
+                if pending:
+                    done, _ = wait(pending, timeout=next_token if throttled else None, return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(next_token)
+                    done = ()
+                if throttled:
+                    report['rate_limited_seconds'] += time.perf_counter() - paused
+
+                for future in done:
+                    link = pending.pop(future)
+                    try:
+                        available = future.result()
+                    except Exception:
+                        report['failed'] += 1
+                        failures.append(link)
+                        continue
+                    report['by_streaming'][link.streaming_id] += 1
+                    results.append((link, available))
+                    if len(results) >= self.batch_size:
+                        self._write_back(results, report)
+                        results = []
+        if results:
+            self._write_back(results, report)
+        if failures:
+            self._defer(failures)
+
+        elapsed = time.perf_counter() - started
+        report['elapsed_seconds'] = round(elapsed, 3)
+        report['checks_per_second'] = round(report['checked'] / elapsed, 1) if elapsed else 0.0
+        report['rate_limited_seconds'] = round(report['rate_limited_seconds'], 3)
+        report['by_streaming'] = dict(report['by_streaming'])
+        report['backlog'] = availability_backlog(self.max_age)['total']
+        return report
+
+def sync_from_config(config, **overrides):
+    """Monta o ``AvailabilitySync`` a partir das chaves AVAILABILITY_* da configuração
+
+    Levanta ValueError sem AVAILABILITY_PROVIDER: o provedor ``fake`` grava
+    disponibilidades inventadas e só é escolhido pela configuração de testes.
+    """
+    spec = config.get('AVAILABILITY_PROVIDER')
+    if not spec:
+        raise ValueError('AVAILABILITY_PROVIDER não configurado (use pacote.modulo:Classe; fake só em testes)')
+    options = {
+        'provider': load_provider(spec),
+        'concurrency': config.get('AVAILABILITY_CONCURRENCY', 8),
+        'batch_size': config.get('AVAILABILITY_BATCH_SIZE', 500),
+        'rate_limits': parse_rate_limits(config.get('AVAILABILITY_RATE_LIMITS')),
+        'default_rate': config.get('AVAILABILITY_DEFAULT_RATE', 5.0),
+        'max_age': timedelta(hours=config.get('AVAILABILITY_MAX_AGE_HOURS', 24)),
+        'retry_delay': timedelta(minutes=config.get('AVAILABILITY_RETRY_MINUTES', 60)),
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    return AvailabilitySync(**options)
@@ -0,0 +1,396 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy.orm import selectinload
+from .db import db
+from .catalog import bump_catalog_version
+from .content import Content, ContentStreaming, StreamingPlatform, sync_streaming_links
+from .search import index_contents
+from .stats import apply_stat_delta, is_materialized, rebuild_stats
+
+CONTENT_TYPES = ('movie', 'series', 'anime')
+FORMATS = ('jsonl', 'csv')
+EXPORT_COLUMNS = ('id', 'title', 'year', 'type', 'genre', 'poster_url', 'is_active', 'streaming_ids')
+# Colunas de Content aceitas na importação (id é resolvido por title+year+type)
+IMPORT_COLUMNS = ('title', 'year', 'type', 'genre', 'poster_url', 'is_active')
+# Separador de streaming_ids dentro de uma célula CSV ("1|4|6")
+CSV_LIST_SEPARATOR = '|'
+DEFAULT_BATCH_SIZE = 500
+
+def detect_format(filename=None, mimetype=None, default='jsonl'):
+    """Deduz jsonl/csv pela extensão do arquivo ou pelo Content-Type"""
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    if mimetype in ('text/csv', 'application/csv'):
+        return 'csv'
+    if mimetype in ('application/x-ndjson', 'application/jsonl', 'application/json'):
+        return 'jsonl'
+    return default
+
+def read_records(stream, fmt):
+    """Gera (linha, registro, erro) para cada registro de um arquivo texto"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError as e:
+            yield line_number, None, f'JSON inválido: {e}'
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ('true', '1', 'sim', 'false', '0', 'nao', 'não'):
+        return value.strip().lower() in ('true', '1', 'sim')
+    raise ValueError
+
+def _parse_ids(value):
+    if isinstance(value, str):
+        value = [part for part in value.split(CSV_LIST_SEPARATOR) if part.strip()]
+    if not isinstance(value, list):
+        raise ValueError
+    ids = []
+    for item in value:
+        if isinstance(item, bool):
+            raise ValueError
+        ids.append(int(item))
+    return ids
+
+def validate_record(record, platform_ids):
+    """Valida e normaliza um registro; retorna (linha normalizada, erros)
+
+    Só as chaves presentes no registro entram na linha, então uma
+    atualização não apaga campos omitidos. ``streaming_ids`` ausente mantém
+    os vínculos atuais; lista vazia remove todos.
+    """
+    if not isinstance(record, dict):
+        return None, ['Registro deve ser um objeto']
+
+    errors = []
+    row = {}
+
+    title = record.get('title')
+    title = title.strip() if isinstance(title, str) else None
+    if not title:
+        errors.append('Título é obrigatório')
+    elif len(title) > 200:
+        errors.append('Título deve ter no máximo 200 caracteres')
+    row['title'] = title
+
+    if record.get('type') not in CONTENT_TYPES:
+        errors.append('Tipo deve ser movie, series ou anime')
+    row['type'] = record.get('type')
+
+    year = record.get('year')
+    if _blank(year):
+        row['year'] = None
+    elif isinstance(year, int) and not isinstance(year, bool):
+        row['year'] = year
+    elif isinstance(year, str) and year.strip().isdigit():
+        row['year'] = int(year)
+    else:
+        errors.append(f'Ano inválido: {year!r}')
+
+    for field, max_length in (('genre', 100), ('poster_url', 500)):
+        if field not in record:
+            continue
+        value = record[field]
+        if _blank(value):
+            row[field] = None
+        elif not isinstance(value, str) or len(value) > max_length:
+            errors.append(f'{field} deve ser texto de até {max_length} caracteres')
+        else:
+            row[field] = value.strip()
+
+    if not _blank(record.get('is_active')):
+        try:
+            row['is_active'] = _parse_bool(record['is_active'])
+        except ValueError:
+            errors.append(f'is_active inválido: {record["is_active"]!r}')
+
+    if 'streaming_ids' in record:
+        try:
+            streaming_ids = [] if record['streaming_ids'] is None else _parse_ids(record['streaming_ids'])
+        except (TypeError, ValueError):
+            errors.append('streaming_ids deve ser uma lista de ids')
+        else:
+            unknown = sorted(set(streaming_ids) - platform_ids)
+            if unknown:
+                errors.append(f'Plataformas inexistentes: {", ".join(map(str, unknown))}')
+            row['streaming_ids'] = set(streaming_ids)
+
+    return row, errors
+
+def _key(title, year, content_type):
+    return title, year, content_type
+
+def _upsert_batch(rows):
+    """Grava um lote: executemany para INSERT/UPDATE e diff dos vínculos"""
+    existing = {}
+    titles = {row['title'] for row in rows}
+    for content_id, title, year, content_type in db.session.query(
+        Content.id, Content.title, Content.year, Content.type
+    ).filter(Content.title.in_(titles)):
+        existing.setdefault(_key(title, year, content_type), content_id)
+
+    inserts, updates = [], []
+    for row in rows:
+        values = {column: row[column] for column in IMPORT_COLUMNS if column in row}
+        content_id = existing.get(_key(row['title'], row['year'], row['type']))
+        if content_id is None:
+            values.setdefault('genre', None)
+            values.setdefault('poster_url', None)
+            values.setdefault('is_active', True)
+            inserts.append((row, values))
+        else:
+            row['id'] = content_id
+            updates.append({'id': content_id, **values})
+
+    if inserts:
+        result = db.session.execute(
+            db.insert(Content).returning(Content.id, sort_by_parameter_order=True),
+            [values for _, values in inserts]
+        )
+        for (row, _), content_id in zip(inserts, result.scalars()):
+            row['id'] = content_id
+    if updates:
+        db.session.execute(db.update(Content), updates)
+
+    sync_streaming_links({row['id']: row['streaming_ids'] for row in rows if 'streaming_ids' in row})
+
+    # Índice de busca com os valores finais (updates parciais mantêm o gênero antigo)
+    ids = [row['id'] for row in rows]
+    index_contents([
+        {'id': content_id, 'title': title, 'genre': genre}
+        for content_id, title, genre in db.session.query(Content.id, Content.title, Content.genre).filter(Content.id.in_(ids))
+    ])
+    return len(inserts), len(updates)
+
+def import_catalog(records, batch_size=DEFAULT_BATCH_SIZE, partial=False, dry_run=False):
+    """Importa registros de ``read_records`` com upsert por title+year+type
+
+    O arquivo inteiro é validado antes de qualquer escrita. Havendo erros,
+    nada é gravado, a menos que ``partial`` seja verdadeiro (aí só as linhas
+    válidas entram). Cada lote de ``batch_size`` linhas é uma transação.
+    """
+    platform_ids = {platform_id for (platform_id,) in db.session.query(StreamingPlatform.id)}
+
+    errors = []
+    rows = {}
+    total = 0
+    for line, record, error in records:
+        total += 1
+        row, row_errors = (None, [error]) if error else validate_record(record, platform_ids)
+        if row_errors:
+            errors.append({'line': line, 'errors': row_errors})
+            continue
+        # Linhas repetidas no arquivo são mescladas (campos posteriores vencem)
+        key = _key(row['title'], row['year'], row['type'])
+        rows[key] = {**rows.get(key, {}), **row}
+
+    report = {
+        'total': total,
+        'valid': total - len(errors),
+        'inserted': 0,
+        'updated': 0,
+        'errors': errors,
+        'imported': False
+    }
+    if dry_run or (errors and not partial):
+        return report
+
+    rows = list(rows.values())
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        inserted, updated = _upsert_batch(batch)
+        report['inserted'] += inserted
+        report['updated'] += updated
+        bump_catalog_version(contents=[row['id'] for row in batch])
+        db.session.commit()
+
+    if is_materialized():
+        rebuild_stats()
+
+    report['imported'] = True
+    return report
+
+def _validate_change(record, platform_ids):
+    """Normaliza ``{content_id, streaming_id, available}``; retorna (chave, valor, erros)"""
+    if not isinstance(record, dict):
+        return None, None, ['Alteração deve ser um objeto']
+
+    errors = []
+    ids = []
+    for field in ('content_id', 'streaming_id'):
+        value = record.get(field)
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        if not isinstance(value, int) or isinstance(value, bool):
+            errors.append(f'{field} inválido: {value!r}')
+        ids.append(value)
+    if not errors and ids[1] not in platform_ids:
+        errors.append(f'Plataforma inexistente: {ids[1]}')
+
+    try:
+        available = _parse_bool(record.get('available'))
+    except ValueError:
+        errors.append(f'available inválido: {record.get("available")!r}')
+        available = None
+
+    return tuple(ids), available, errors
+
+def apply_availability(records, batch_size=DEFAULT_BATCH_SIZE):
+    """Define ``available`` de muitos pares (conteúdo, plataforma) em uma transação
+
+    Vínculos existentes são atualizados com executemany (``last_checked``
+    passa a ser agora, mesmo sem mudança, e ``retry_after`` é limpo) e os que
+    não existem são criados.
+    Qualquer erro de validação cancela tudo. Os contadores materializados
+    recebem só a diferença e a versão do catálogo muda apenas se alguma
+    disponibilidade mudou.
+    """
+    platform_ids = {platform_id for (platform_id,) in db.session.query(StreamingPlatform.id)}
+
+    errors = []
+    changes = {}
+    for index, record in enumerate(records):
+        key, available, record_errors = _validate_change(record, platform_ids)
+        if record_errors:
+            errors.append({'index': index, 'errors': record_errors})
+        else:
+            # Pares repetidos: a última alteração vence
+            changes[key] = available
+
+    report = {
+        'total': len(records),
+        'inserted': 0,
+        'updated': 0,
+        'unchanged': 0,
+        'errors': errors,
+        'applied': False
+    }
+    if errors or not changes:
+        report['applied'] = not errors
+        return report
+
+    # Estado atual dos conteúdos envolvidos, em blocos de ``batch_size`` ids
+    content_ids = sorted({content_id for content_id, _ in changes})
+    active = {}
+    existing = {}
+    for start in range(0, len(content_ids), batch_size):
+        chunk = content_ids[start:start + batch_size]
+        active.update(db.session.query(Content.id, Content.is_active).filter(Content.id.in_(chunk)))
+        for content_id, streaming_id, available in db.session.query(
+            ContentStreaming.content_id, ContentStreaming.streaming_id, ContentStreaming.available
+        ).filter(ContentStreaming.content_id.in_(chunk)):
+            existing[(content_id, streaming_id)] = bool(available)
+
+    unknown = sorted(set(content_ids) - set(active))
+    if unknown:
+        report['errors'].append({'index': None, 'errors': [f'Conteúdos inexistentes: {", ".join(map(str, unknown))}']})
+        return report
+
+    now = datetime.utcnow()
+    updates, inserts = [], []
+    before_keys, after_keys = [], []
+    changed = set()
+    for (content_id, streaming_id), available in changes.items():
+        previous = existing.get((content_id, streaming_id))
+        if previous is None:
+            inserts.append({'content_id': content_id, 'streaming_id': streaming_id,
+                            'available': available, 'last_checked': now})
+            report['inserted'] += 1
+            changed.add(content_id)
+        else:
+            updates.append({'b_content_id': content_id, 'b_streaming_id': streaming_id,
+                            'b_available': available, 'b_last_checked': now})
+            report['updated' if previous != available else 'unchanged'] += 1
+            if previous != available:
+                changed.add(content_id)
+
+        if active[content_id]:
+            if previous:
+                before_keys.append(f'streaming:{streaming_id}')
+            if available:
+                after_keys.append(f'streaming:{streaming_id}')
+
+    links = ContentStreaming.__table__
+    if updates:
+        db.session.execute(
+            links.update().where(
+                links.c.content_id == db.bindparam('b_content_id'),
+                links.c.streaming_id == db.bindparam('b_streaming_id')
+            ).values(available=db.bindparam('b_available'), last_checked=db.bindparam('b_last_checked'),
+                     retry_after=None),
+            updates
+        )
+    if inserts:
+        db.session.execute(db.insert(ContentStreaming), inserts)
+
+    apply_stat_delta(before_keys, after_keys)
+    if changed:
+        bump_catalog_version(contents=changed)
+    db.session.commit()
+
+    report['applied'] = True
+    return report
+
+def _export_row(content):
+    return {
+        'id': content.id,
+        'title': content.title,
+        'year': content.year,
+        'type': content.type,
+        'genre': content.genre,
+        'poster_url': content.poster_url,
+        'is_active': content.is_active,
+        'streaming_ids': sorted(cs.streaming_id for cs in content.streamings)
+    }
+
+def export_catalog(fmt='jsonl', batch_size=1000):
+    """Gera o catálogo inteiro em blocos de texto, sem carregá-lo na memória
+
+    Os conteúdos são lidos em lotes de ``batch_size`` (yield_per) com os
+    vínculos de cada lote em um SELECT ... IN; o formato é o mesmo aceito
+    por ``import_catalog``. ``streaming_ids`` traz todos os vínculos, mesmo
+    os indisponíveis, para que reimportar o arquivo não os apague (a
+    disponibilidade fica fora do arquivo e é mantida pela importação).
+    """
+    query = Content.query.options(selectinload(Content.streamings)).order_by(Content.id).yield_per(batch_size)
+
+    buffer = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(EXPORT_COLUMNS)
+
+    for count, content in enumerate(query, 1):
+        row = _export_row(content)
+        if writer is not None:
+            row['streaming_ids'] = CSV_LIST_SEPARATOR.join(map(str, row['streaming_ids']))
+            writer.writerow(['' if row[column] is None else row[column] for column in EXPORT_COLUMNS])
+        else:
+            buffer.write(json.dumps(row, ensure_ascii=False))
+            buffer.write('\n')
+
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,110 @@
+from datetime import datetime
+from sqlalchemy import false, literal, select
+from .db import db
+from .content import Content, StreamingPlatform
+
+# Entidades do registro de alterações
+CONTENT = 'content'
+STREAMING = 'streaming'
+
+class CatalogVersion(db.Model):
+    """Contador global do catálogo, incrementado a cada escrita
+
+    Mora no banco (linha única, id = 1) para que todos os workers enxerguem o
+    mesmo valor; é a base dos ETags das rotas de leitura.
+    """
+    __tablename__ = 'catalog_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CatalogVersion {self.version}>'
+
+class CatalogChange(db.Model):
+    """Registro de alterações lido por GET /api/content/changes
+
+    Guarda só a alteração mais recente de cada conteúdo ou plataforma: uma
+    alteração nova apaga a linha anterior e recebe um ``id`` maior, que serve
+    de token para o cliente. Exclusões ficam como tombstones (``deleted``).
+    As linhas são gravadas por ``bump_catalog_version`` depois do UPDATE da
+    versão, que serializa os escritores, então os ids crescem na ordem dos
+    commits (AUTOINCREMENT: o SQLite nunca reaproveita um id apagado).
+    """
+    __tablename__ = 'catalog_change'
+    __table_args__ = (
+        db.Index('ix_catalog_change_entity', 'entity', 'entity_id', unique=True),
+        {'sqlite_autoincrement': True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CatalogChange {self.id} {self.entity}:{self.entity_id}>'
+
+def get_catalog_version():
+    return db.session.query(CatalogVersion.version).filter_by(id=1).scalar() or 0
+
+def bump_catalog_version(contents=(), deleted_contents=(), streamings=(), deleted_streamings=()):
+    """Incrementa a versão na transação corrente (o commit é da rota)
+
+    Os ids alterados (ou excluídos) entram no registro de alterações.
+    """
+    updated = CatalogVersion.query.filter_by(id=1).update(
+        {CatalogVersion.version: CatalogVersion.version + 1}, synchronize_session=False
+    )
+    if not updated:
+        db.session.add(CatalogVersion(id=1, version=1))
+
+    changes = {}
+    for entity, ids, deleted in ((CONTENT, contents, False), (CONTENT, deleted_contents, True),
+                                 (STREAMING, streamings, False), (STREAMING, deleted_streamings, True)):
+        changes.update(((entity, entity_id), deleted) for entity_id in ids)
+    if changes:
+        record_changes(changes)
+
+def record_changes(changes):
+    """Grava ``{(entidade, id): excluído}`` no registro e o ``updated_at`` dos conteúdos"""
+    now = datetime.utcnow()
+    keys = sorted(changes)
+    log = CatalogChange.__table__
+    db.session.execute(
+        log.delete().where(log.c.entity == db.bindparam('b_entity'), log.c.entity_id == db.bindparam('b_entity_id')),
+        [{'b_entity': entity, 'b_entity_id': entity_id} for entity, entity_id in keys]
+    )
+    db.session.execute(db.insert(CatalogChange), [
+        {'entity': entity, 'entity_id': entity_id, 'deleted': changes[entity, entity_id], 'changed_at': now}
+        for entity, entity_id in keys
+    ])
+
+    upserted = [{'b_id': entity_id} for entity, entity_id in keys if entity == CONTENT and not changes[entity, entity_id]]
+    if upserted:
+        content = Content.__table__
+        db.session.execute(
+            content.update().where(content.c.id == db.bindparam('b_id')).values(updated_at=now), upserted
+        )
+
+def latest_change_id():
+    return db.session.query(db.func.max(CatalogChange.id)).scalar() or 0
+
+def rebuild_change_log():
+    """Recria o registro com uma linha por conteúdo e plataforma existentes
+
+    Usado na migração e depois de cargas que escrevem direto nas tabelas.
+    Os tombstones são mantidos, então tokens antigos continuam válidos (só
+    recebem o catálogo inteiro de novo).
+    """
+    now = datetime.utcnow()
+    log = CatalogChange.__table__
+    db.session.execute(log.delete().where(log.c.deleted == false()))
+    for entity, model in ((STREAMING, StreamingPlatform), (CONTENT, Content)):
+        db.session.execute(log.delete().where(log.c.entity == entity, log.c.entity_id.in_(select(model.id))))
+        db.session.execute(db.insert(CatalogChange).from_select(
+            ['entity', 'entity_id', 'deleted', 'changed_at'],
+            select(literal(entity), model.id, false(), literal(now)).order_by(model.id)
+        ))
+    db.session.commit()
@@ -1,8 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
+import re
 from datetime import datetime
+from sqlalchemy.orm import selectinload
 from .db import db
+from .images import thumbnail_urls
+
+# Separadores dos gêneros compostos ("Ação/Aventura", "Drama, Romance")
+GENRE_SEPARATOR = re.compile(r'[/,]')
+
+def genre_tokens(genre):
+    """Gêneros individuais de um gênero composto, sem repetição"""
+    tokens = (token.strip() for token in GENRE_SEPARATOR.split(genre or ''))
+    return list(dict.fromkeys(token for token in tokens if token))
 
 class Content(db.Model):
+    # Índices pensados para as consultas de /api/content e /api/content/stats:
+    # listagem de ativos ordenada por (title, id), o mesmo filtrando por tipo
+    # (também cobre o GROUP BY type/is_active das estatísticas)
+    __table_args__ = (
+        db.Index('ix_content_active_title', 'is_active', 'title', 'id'),
+        db.Index('ix_content_active_type_title', 'is_active', 'type', 'title', 'id'),
+        # Chave natural usada pelo upsert da importação em lote
+        db.Index('ix_content_title_year_type', 'title', 'year', 'type'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     year = db.Column(db.Integer, nullable=True)
@@ -11,6 +32,8 @@ class Content(db.Model):
     poster_url = db.Column(db.String(500), nullable=True)
     is_active = db.Column(db.Boolean, default=True)  # Para desativar temporariamente
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Última alteração (inclusive dos vínculos), gravada com o registro de alterações
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relacionamento com streamings
     streamings = db.relationship('ContentStreaming', back_populates='content', cascade='all, delete-orphan')
@@ -18,18 +41,39 @@ class Content(db.Model):
     def __repr__(self):
         return f'<Content {self.title} ({self.year})>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'year': self.year,
-            'type': self.type,
-            'genre': self.genre,
-            'poster_url': self.poster_url,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'streamings': [cs.streaming_platform.to_dict() for cs in self.streamings if cs.available]
-        }
+    @classmethod
+    def eager_streamings(cls):
+        """Opção de carregamento para to_dict sem consultas N+1
+
+        Carrega os vínculos de todos os conteúdos em um único SELECT ... IN
+        e as plataformas via JOIN nesse mesmo SELECT, então serializar uma
+        lista custa sempre 2 consultas, independente do tamanho do catálogo.
+        """
+        return selectinload(cls.streamings).joinedload(ContentStreaming.streaming_platform)
+
+    # Campos aceitos em ``fields=`` (projeção das listagens)
+    SERIALIZABLE_FIELDS = ('id', 'title', 'year', 'type', 'genre', 'poster_url',
+                           'is_active', 'created_at', 'updated_at', 'streamings')
+    DATE_FIELDS = ('created_at', 'updated_at')
+
+    def to_dict(self, fields=None, thumbnails=False):
+        """``thumbnails`` acrescenta as URLs locais das miniaturas do pôster (``poster_thumbnails``)"""
+        if fields is None:
+            fields = self.SERIALIZABLE_FIELDS
+        data = {}
+        for field in self.SERIALIZABLE_FIELDS:
+            if field not in fields:
+                continue
+            if field in self.DATE_FIELDS:
+                value = getattr(self, field)
+                data[field] = value.isoformat() if value else None
+            elif field == 'streamings':
+                data[field] = [cs.streaming_platform.to_dict(thumbnails) for cs in self.streamings if cs.available]
+            else:
+                data[field] = getattr(self, field)
+        if thumbnails and 'poster_url' in fields:
+            data['poster_thumbnails'] = thumbnail_urls('content', self.id, self.poster_url)
+        return data
 
 class StreamingPlatform(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -44,22 +88,35 @@ class StreamingPlatform(db.Model):
     def __repr__(self):
         return f'<StreamingPlatform {self.name}>'
 
-    def to_dict(self):
-        return {
+    def to_dict(self, thumbnails=False):
+        data = {
             'id': self.id,
             'name': self.name,
             'logo_url': self.logo_url,
             'color': self.color,
             'active': self.active
         }
+        if thumbnails:
+            data['logo_thumbnails'] = thumbnail_urls('streaming', self.id, self.logo_url)
+        return data
 
 class ContentStreaming(db.Model):
     __tablename__ = 'content_streaming'
+    # A PK (content_id, streaming_id) atende o filtro por conteúdo; este índice
+    # cobre o caminho inverso (plataforma -> conteúdos disponíveis) e o GROUP BY
+    # streaming_id das estatísticas sem tocar na tabela
+    __table_args__ = (
+        db.Index('ix_content_streaming_platform', 'streaming_id', 'available', 'content_id'),
+        # Fila do sincronizador de disponibilidade (mais desatualizados primeiro)
+        db.Index('ix_content_streaming_last_checked', 'last_checked'),
+    )
     
     content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
     streaming_id = db.Column(db.Integer, db.ForeignKey('streaming_platform.id'), primary_key=True)
     available = db.Column(db.Boolean, default=True)
     last_checked = db.Column(db.DateTime, default=datetime.utcnow)
+    # Falha do provedor de disponibilidade: o vínculo só volta à fila depois disso
+    retry_after = db.Column(db.DateTime, nullable=True)
     
     # Relacionamentos
     content = db.relationship('Content', back_populates='streamings')
@@ -76,3 +133,39 @@ class ContentStreaming(db.Model):
             'last_checked': self.last_checked.isoformat() if self.last_checked else None
         }
 
+def sync_streaming_links(desired):
+    """Ajusta os vínculos para ``{content_id: {streaming_id, ...}}`` por diferença
+
+    Insere só os vínculos que faltam e remove só os que sobraram (ambos em
+    executemany); os que já existem ficam intactos, preservando ``available``
+    e ``last_checked``. Não faz commit. Retorna (inseridos, removidos).
+    """
+    if not desired:
+        return [], []
+
+    existing = set(db.session.query(ContentStreaming.content_id, ContentStreaming.streaming_id).filter(
+        ContentStreaming.content_id.in_(list(desired))
+    ))
+    wanted = {(content_id, streaming_id)
+              for content_id, streaming_ids in desired.items()
+              for streaming_id in streaming_ids}
+
+    added = sorted(wanted - existing)
+    removed = sorted(existing - wanted)
+
+    links = ContentStreaming.__table__
+    if removed:
+        db.session.execute(
+            links.delete().where(
+                links.c.content_id == db.bindparam('b_content_id'),
+                links.c.streaming_id == db.bindparam('b_streaming_id')
+            ),
+            [{'b_content_id': content_id, 'b_streaming_id': streaming_id} for content_id, streaming_id in removed]
+        )
+    if added:
+        db.session.execute(
+            db.insert(ContentStreaming),
+            [{'content_id': content_id, 'streaming_id': streaming_id, 'available': True}
+             for content_id, streaming_id in added]
+        )
+    return added, removed
@@ -1,3 +1,99 @@
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 
-db = SQLAlchemy()
\ No newline at end of file
+# Bind opcional para as rotas de leitura (SQLALCHEMY_BINDS['readonly'])
+READ_ONLY_BIND = 'readonly'
+
+# Pragmas aplicados a cada nova conexão SQLite (sobrescritos por SQLITE_PRAGMAS)
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,        # em KiB quando negativo (~64 MB)
+    'mmap_size': 268435456,      # 256 MB
+    'busy_timeout': 5000,        # ms esperando o lock de escrita
+}
+
+class RoutingSession(Session):
+    """Sessão que envia as consultas das rotas @read_only ao pool somente leitura
+
+    Escritas (flush) continuam indo para o banco principal; sem o bind
+    ``readonly`` configurado o comportamento é o da sessão padrão.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context()
+                and g.get('read_only') and READ_ONLY_BIND in self._db.engines):
+            return self._db.engines[READ_ONLY_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+def read_only(f):
+    """Marca a rota para ler do pool somente leitura, quando configurado"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.read_only = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+@contextmanager
+def primary_database():
+    """Força o banco principal dentro de uma rota @read_only (ex.: escritas lazy)"""
+    previous = g.get('read_only', False)
+    g.read_only = False
+    try:
+        yield
+    finally:
+        g.read_only = previous
+
+def sqlite_read_only_url(url):
+    """URL somente leitura (mode=ro) para o mesmo arquivo SQLite"""
+    url = make_url(url)
+    return url.set(database=f'file:{url.database}', query={'mode': 'ro', 'uri': 'true'})
+
+def apply_sqlite_pragmas(engine, pragmas, read_only=False):
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            # O modo do journal é do arquivo; conexões mode=ro não podem alterá-lo
+            if read_only and name == 'journal_mode':
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+def init_database(app):
+    """Inicializa o SQLAlchemy com pools e pragmas vindos da configuração
+
+    - ``DATABASE_READ_URL`` cria o bind ``readonly`` usado pelas rotas
+      @read_only; com ``SQLITE_READ_ONLY_POOL`` ele é derivado do próprio
+      arquivo SQLite (mode=ro)
+    - ``SQLITE_PRAGMAS`` ajusta WAL, synchronous, cache, mmap e busy timeout
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    is_sqlite = make_url(uri).get_backend_name() == 'sqlite'
+
+    read_url = app.config.get('DATABASE_READ_URL')
+    if not read_url and is_sqlite and app.config.get('SQLITE_READ_ONLY_POOL'):
+        read_url = sqlite_read_only_url(uri)
+    if read_url:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds[READ_ONLY_BIND] = {
+            **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+            **app.config.get('SQLALCHEMY_READ_ENGINE_OPTIONS', {}),
+            'url': read_url
+        }
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+    db.init_app(app)
+
+    pragmas = {**DEFAULT_SQLITE_PRAGMAS, **app.config.get('SQLITE_PRAGMAS', {})}
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+                apply_sqlite_pragmas(engine, pragmas, read_only=key == READ_ONLY_BIND)
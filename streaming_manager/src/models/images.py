@@ -0,0 +1,267 @@
+import hashlib
+import importlib
+import io
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from PIL import Image, ImageOps
+
+# Larguras geradas (e aceitas em ?w=) quando IMAGE_WIDTHS não é configurado
+DEFAULT_WIDTHS = (160, 320, 640)
+FORMATS = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+# Falhas ao buscar uma imagem não são repetidas antes disso (segundos)
+FAILURE_TTL = 300
+# URLs com falha lembradas ao mesmo tempo (as mais antigas saem primeiro)
+MAX_FAILURES = 1024
+
+class ImageFetcher(ABC):
+    """Interface dos buscadores de imagens de origem
+
+    ``fetch`` recebe a URL de ``poster_url``/``logo_url`` e retorna os bytes
+    da imagem; qualquer exceção vira 502 na rota.
+    """
+
+    @abstractmethod
+    def fetch(self, url):
+        ...
+
+class HttpFetcher(ImageFetcher):
+    """Baixa a imagem por HTTP(S), com timeout e limite de tamanho"""
+
+    def __init__(self, timeout=10, max_bytes=10 * 1024 * 1024):
+        self.timeout = float(timeout)
+        self.max_bytes = int(max_bytes)
+
+    def fetch(self, url):
+        if not url.startswith(('http://', 'https://')):
+            raise ValueError(f'URL de imagem não suportada: {url}')
+        request = urllib.request.Request(url, headers={'User-Agent': 'StreamManager/1.0'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            data = response.read(self.max_bytes + 1)
+        if len(data) > self.max_bytes:
+            raise ValueError(f'Imagem maior que {self.max_bytes} bytes: {url}')
+        return data
+
+class FakeFetcher(ImageFetcher):
+    """Gera localmente uma imagem determinística por URL (testes e benchmarks)"""
+
+    def __init__(self, width=800, height=1200, latency=0.0):
+        self.width = int(width)
+        self.height = int(height)
+        self.latency = float(latency)
+        self.calls = 0
+
+    def fetch(self, url):
+        if self.latency:
+            time.sleep(self.latency)
+        self.calls += 1
+        color = tuple(hashlib.sha1(url.encode('utf-8')).digest()[:3])
+        output = io.BytesIO()
+        Image.new('RGB', (self.width, self.height), color).save(output, 'PNG')
+        return output.getvalue()
+
+FETCHERS = {'http': HttpFetcher, 'fake': FakeFetcher}
+
+def load_fetcher(spec, **options):
+    """Instancia um buscador registrado (``http``, ``fake``) ou ``pacote.modulo:Classe``"""
+    if spec in FETCHERS:
+        return FETCHERS[spec](**options)
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise ValueError(f'Buscador de imagens desconhecido: {spec}')
+    return getattr(importlib.import_module(module_name), class_name)(**options)
+
+def source_digest(url):
+    """Parte da URL local que muda junto com a URL de origem"""
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]
+
+def configured_widths():
+    if has_app_context():
+        return tuple(current_app.config.get('IMAGE_WIDTHS', DEFAULT_WIDTHS))
+    return DEFAULT_WIDTHS
+
+def thumbnail_urls(kind, entity_id, url):
+    """``{largura: URL local}`` das miniaturas de ``url`` (None sem imagem)"""
+    if not url:
+        return None
+    base = f'/api/images/{kind}/{entity_id}/{source_digest(url)}'
+    return {str(width): f'{base}?w={width}' for width in configured_widths()}
+
+class DiskCache:
+    """Cache em disco endereçado por SHA-256, limitado a ``max_bytes`` (LRU)
+
+    Cada chave vira ``<raiz>/<2 primeiros hex>/<hash>.<ext>``; gravações são
+    atômicas (arquivo temporário + rename) e cada leitura atualiza o mtime,
+    que marca o uso mais recente. Ao passar do limite a pasta é relida (outros
+    workers também gravam nela) e os arquivos menos usados saem até sobrar
+    90% do limite.
+    """
+
+    def __init__(self, root, max_bytes=256 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._scan())
+
+    @staticmethod
+    def digest(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def path(self, key, ext):
+        digest = self.digest(key)
+        return os.path.join(self.root, digest[:2], f'{digest}.{ext}')
+
+    def get(self, key, ext):
+        """Conteúdo da chave (None se não estiver no cache)"""
+        path = self.path(key, ext)
+        try:
+            os.utime(path)
+            with open(path, 'rb') as cached:
+                return cached.read()
+        except FileNotFoundError:
+            # Nunca gravado ou removido por outro worker entre o utime e o open
+            return None
+
+    def put(self, key, ext, data):
+        path = self.path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(handle, 'wb') as target:
+            target.write(data)
+        os.replace(temporary, path)
+        with self._lock:
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(directory, name))
+                except FileNotFoundError:
+                    continue
+                yield os.path.join(directory, name), stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        files = sorted(self._scan(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in files)
+        target = self.max_bytes * 0.9
+        for path, file_size, _ in files:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= file_size
+            self.evictions += 1
+        self._size = size
+
+class ImageService:
+    """Miniaturas das imagens de origem, cada uma baixada uma única vez
+
+    A imagem original também fica no cache, então novas larguras e formatos
+    não voltam à origem. Requisições simultâneas da mesma miniatura esperam
+    a primeira (um lock por chave neste processo).
+    """
+
+    def __init__(self, fetcher, cache, widths=DEFAULT_WIDTHS, quality=80):
+        self.fetcher = fetcher
+        self.cache = cache
+        self.widths = tuple(widths)
+        self.quality = quality
+        # url -> instante até o qual não tentar de novo, em ordem de falha
+        self._failures = OrderedDict()
+        self._failures_lock = threading.Lock()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _failed_recently(self, url):
+        now = time.monotonic()
+        with self._failures_lock:
+            # Todas valem FAILURE_TTL, então as vencidas estão no começo
+            while self._failures and next(iter(self._failures.values())) <= now:
+                self._failures.popitem(last=False)
+            return url in self._failures
+
+    def _remember_failure(self, url):
+        with self._failures_lock:
+            self._failures.pop(url, None)
+            self._failures[url] = time.monotonic() + FAILURE_TTL
+            while len(self._failures) > MAX_FAILURES:
+                self._failures.popitem(last=False)
+
+    def source(self, url):
+        """Bytes da imagem de origem, do cache ou do buscador"""
+        key = f'source:{url}'
+        data = self.cache.get(key, 'src')
+        if data is not None:
+            return data
+
+        if self._failed_recently(url):
+            raise RuntimeError(f'Falha recente ao buscar {url}')
+        try:
+            data = self.fetcher.fetch(url)
+        except Exception:
+            self._remember_failure(url)
+            raise
+        self.cache.put(key, 'src', data)
+        return data
+
+    def thumbnail(self, url, width, fmt):
+        """Bytes da miniatura de ``url`` com até ``width`` px de largura em ``fmt``"""
+        key = f'thumbnail:{url}:{width}:{fmt}'
+        data = self.cache.get(key, fmt)
+        if data is not None:
+            return data
+
+        with self._lock(key):
+            data = self.cache.get(key, fmt)
+            if data is None:
+                data = self.render(self.source(url), width, fmt)
+                self.cache.put(key, fmt, data)
+        with self._locks_guard:
+            self._locks.pop(key, None)
+        return data
+
+    def render(self, data, width, fmt):
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+
+        output = io.BytesIO()
+        if fmt == 'webp':
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+            image.save(output, 'WEBP', quality=self.quality, method=4)
+        else:
+            if image.mode in ('RGBA', 'LA', 'P'):
+                # JPEG não tem transparência: logos vão sobre fundo branco
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            image.convert('RGB').save(output, 'JPEG', quality=self.quality, optimize=True, progressive=True)
+        return output.getvalue()
+
+def init_images(app):
+    """Monta o ``ImageService`` (IMAGE_FETCHER, IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, IMAGE_WIDTHS)"""
+    app.extensions['images'] = ImageService(
+        load_fetcher(app.config.get('IMAGE_FETCHER', 'http')),
+        DiskCache(app.config['IMAGE_CACHE_DIR'], app.config.get('IMAGE_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+        widths=app.config.get('IMAGE_WIDTHS', DEFAULT_WIDTHS),
+        quality=app.config.get('IMAGE_QUALITY', 80)
+    )
@@ -0,0 +1,119 @@
+from datetime import datetime
+from .db import db
+from .catalog import CatalogVersion, latest_change_id, rebuild_change_log
+from .content import Content, ContentStreaming
+from .search import ensure_search_index
+from .similar import ContentSimilar, SimilarIndexState, rebuild_similar_index
+from .stats import rebuild_stats
+
+class SchemaVersion(db.Model):
+    """Migrações já aplicadas neste banco"""
+    __tablename__ = 'schema_version'
+
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SchemaVersion {self.version} {self.name}>'
+
+def _create_indexes(*tables):
+    """Cria os índices declarados nos modelos que ainda não existem no banco
+
+    ``db.create_all`` só cria índices junto com tabelas novas; bancos que já
+    existiam precisam desta etapa para ganhar os índices.
+    """
+    for model_table in tables:
+        for index in model_table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def _baseline():
+    # Tabelas já são criadas por create_all em upgrade_schema
+    pass
+
+def _content_filter_indexes():
+    _create_indexes(Content.__table__, ContentStreaming.__table__)
+
+def _search_index():
+    ensure_search_index()
+
+def _catalog_version():
+    # Semeia a linha única para que as escritas só precisem de UPDATE
+    if db.session.get(CatalogVersion, 1) is None:
+        db.session.add(CatalogVersion(id=1, version=0))
+
+def _import_key_index():
+    _create_indexes(Content.__table__)
+
+def _availability_index():
+    _create_indexes(ContentStreaming.__table__)
+
+def _change_log():
+    # Tabela catalog_change vem do create_all; content ganha updated_at
+    columns = {column['name'] for column in db.inspect(db.engine).get_columns(Content.__tablename__)}
+    if 'updated_at' not in columns:
+        db.session.execute(db.text('ALTER TABLE content ADD COLUMN updated_at TIMESTAMP'))
+    db.session.execute(db.update(Content).where(Content.updated_at.is_(None)).values(updated_at=Content.created_at))
+    rebuild_change_log()
+
+def _similar_index():
+    # Tabela content_similar vem do create_all
+    _create_indexes(ContentSimilar.__table__)
+    rebuild_similar_index()
+
+def _availability_retry():
+    # Vínculos cuja verificação falhou esperam retry_after antes de voltar à fila
+    columns = {column['name'] for column in db.inspect(db.engine).get_columns(ContentStreaming.__tablename__)}
+    if 'retry_after' not in columns:
+        db.session.execute(db.text('ALTER TABLE content_streaming ADD COLUMN retry_after TIMESTAMP'))
+
+def _similar_index_state():
+    # Tabela similar_index_state vem do create_all; bancos com o índice já
+    # calculado (mantido até aqui pelas escritas) partem da última alteração
+    if db.session.get(SimilarIndexState, 1) is None:
+        db.session.add(SimilarIndexState(id=1, change_id=latest_change_id()))
+
+def _catalog_stats():
+    # Materializa os contadores aqui para que GET /content/stats nunca grave
+    rebuild_stats()
+
+# (versão, nome, função) em ordem; nunca altere uma migração já publicada,
+# adicione uma nova no final
+MIGRATIONS = [
+    (1, 'baseline', _baseline),
+    (2, 'content_filter_indexes', _content_filter_indexes),
+    (3, 'search_index', _search_index),
+    (4, 'catalog_version', _catalog_version),
+    (5, 'import_key_index', _import_key_index),
+    (6, 'availability_index', _availability_index),
+    (7, 'change_log', _change_log),
+    (8, 'similar_index', _similar_index),
+    (9, 'availability_retry', _availability_retry),
+    (10, 'similar_index_state', _similar_index_state),
+    (11, 'catalog_stats', _catalog_stats),
+]
+
+def current_version():
+    # Banco novo (ou anterior ao controle de versões): nada aplicado ainda
+    if not db.inspect(db.engine).has_table(SchemaVersion.__tablename__):
+        return 0
+    return db.session.query(db.func.max(SchemaVersion.version)).scalar() or 0
+
+def pending_migrations():
+    version = current_version()
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+def upgrade_schema():
+    """Cria tabelas novas e aplica as migrações pendentes, uma transação por vez
+
+    Retorna a lista de migrações aplicadas.
+    """
+    db.create_all()
+
+    applied = []
+    for version, name, migrate in pending_migrations():
+        migrate()
+        db.session.add(SchemaVersion(version=version, name=name))
+        db.session.commit()
+        applied.append((version, name))
+    return applied
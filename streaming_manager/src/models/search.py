@@ -0,0 +1,113 @@
+import re
+from sqlalchemy import column, literal_column, select, table, text
+from sqlalchemy.exc import OperationalError
+from .db import db
+
+# Índice FTS5 sobre título e gênero; rowid = content.id. O tokenizer remove
+# acentos, então "acao" encontra "Ação" e vice-versa.
+FTS_TABLE = 'content_fts'
+FTS_TOKENIZER = 'unicode61 remove_diacritics 2'
+SEARCH_COLUMNS = ('title', 'genre')
+
+content_fts = table(FTS_TABLE, column('rowid'), column('title'), column('genre'), column('rank'))
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Cache por banco: o índice existe (e o SQLite tem FTS5)?
+_available = {}
+
+def _engine_key():
+    return str(db.engine.url)
+
+def search_index_available():
+    """Indica se o banco atual tem o índice FTS5 pronto para consultas"""
+    key = _engine_key()
+    if key not in _available:
+        if db.engine.dialect.name != 'sqlite':
+            _available[key] = False
+        else:
+            found = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': FTS_TABLE}
+            ).first()
+            _available[key] = found is not None
+    return _available[key]
+
+def ensure_search_index():
+    """Cria o índice se ainda não existir e o popula a partir de ``content``
+
+    Retorna False quando o banco não é SQLite ou não tem suporte a FTS5; as
+    rotas então voltam para o filtro ILIKE.
+    """
+    _available.pop(_engine_key(), None)
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    if search_index_available():
+        return True
+
+    try:
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5(title, genre, tokenize='{FTS_TOKENIZER}')"
+        ))
+        db.session.commit()
+    except OperationalError:
+        db.session.rollback()
+        _available[_engine_key()] = False
+        return False
+
+    _available[_engine_key()] = True
+    rebuild_search_index()
+    return True
+
+def rebuild_search_index():
+    """Reconstrói o índice inteiro com um único INSERT ... SELECT"""
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    result = db.session.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, genre) "
+        f"SELECT id, title, COALESCE(genre, '') FROM content"
+    ))
+    # Junta os segmentos do índice para acelerar as consultas seguintes
+    db.session.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+    db.session.commit()
+    return result.rowcount
+
+def index_content(content):
+    """Atualiza a entrada de ``content`` no índice (sem commit)"""
+    index_contents([{'id': content.id, 'title': content.title, 'genre': content.genre}])
+
+def index_contents(rows):
+    """Atualiza em lote (executemany) as entradas de dicts com id/title/genre"""
+    if not rows or not search_index_available():
+        return
+    params = [{'id': row['id'], 'title': row['title'], 'genre': row.get('genre') or ''} for row in rows]
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), [{'id': p['id']} for p in params])
+    db.session.execute(text(f"INSERT INTO {FTS_TABLE} (rowid, title, genre) VALUES (:id, :title, :genre)"), params)
+
+def unindex_content(content_id):
+    """Remove ``content_id`` do índice (sem commit)"""
+    if not search_index_available():
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': content_id})
+
+def build_match_expression(**terms):
+    """Monta a expressão MATCH com busca por prefixo em cada palavra
+
+    ``build_match_expression(title='grande apo')`` gera
+    ``{title} : ("grande"* "apo"*)``. Colunas sem palavras são ignoradas.
+    """
+    clauses = []
+    for column_name, value in terms.items():
+        if column_name not in SEARCH_COLUMNS or not value:
+            continue
+        tokens = _TOKEN_RE.findall(value)
+        if tokens:
+            phrase = ' '.join(f'"{token}"*' for token in tokens)
+            clauses.append(f'{{{column_name}}} : ({phrase})')
+    return ' AND '.join(clauses) or None
+
+def search_matches(expression):
+    """Subconsulta (rowid, rank) dos conteúdos que casam com ``expression``"""
+    return select(content_fts.c.rowid, content_fts.c.rank).where(
+        literal_column(FTS_TABLE).op('MATCH')(expression)
+    ).subquery('search_matches')
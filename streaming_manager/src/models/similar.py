@@ -0,0 +1,459 @@
+import threading
+from collections import defaultdict
+from datetime import datetime
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import select
+from .db import db
+from .catalog import CONTENT, CatalogChange, bump_catalog_version, latest_change_id
+from .content import Content, ContentStreaming, genre_tokens
+from .images import thumbnail_urls
+
+# Pesos do score (somam 1): cosseno dos gêneros e das plataformas em comum,
+# mesmo tipo e proximidade do ano (1 no mesmo ano, 0 a YEAR_WINDOW anos ou mais)
+GENRE_WEIGHT = 0.5
+PLATFORM_WEIGHT = 0.2
+TYPE_WEIGHT = 0.2
+YEAR_WEIGHT = 0.1
+YEAR_WINDOW = 10
+# Maior score possível sem nenhum gênero em comum
+NO_GENRE_MAX = PLATFORM_WEIGHT + TYPE_WEIGHT + YEAR_WEIGHT
+DEFAULT_SIMILAR_COUNT = 10
+# Conteúdos pontuados por vez contra o catálogo (matriz float32 linhas x catálogo)
+CHUNK_SIZE = 256
+# Conteúdos com os mesmos gêneros pontuados só contra quem tem algum deles
+MIN_GROUP_SIZE = 32
+# Acima desta fração do catálogo a atualização incremental vira reconstrução
+FULL_REBUILD_FRACTION = 0.2
+# Campos de cada título em ``similar``
+SIMILAR_FIELDS = ('id', 'title', 'type', 'year', 'genre', 'poster_url')
+
+class ContentSimilar(db.Model):
+    """Os ``SIMILAR_COUNT`` conteúdos mais parecidos com cada conteúdo, em ordem
+
+    Calculado por ``rebuild_similar_index`` e mantido fora das requisições
+    por ``refresh_similar_index`` (``manage.py refresh-similar``), então as
+    escritas não mexem nesta tabela; ``?include=similar`` só lê as linhas de
+    um ``content_id``.
+    """
+    __tablename__ = 'content_similar'
+    __table_args__ = (
+        # Quem aponta para um conteúdo alterado (precisa ser recalculado)
+        db.Index('ix_content_similar_similar', 'similar_id'),
+        # Score do último vizinho de cada conteúdo (piso para entrar na lista)
+        db.Index('ix_content_similar_position', 'position', 'content_id', 'similar_id', 'score'),
+    )
+
+    content_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    position = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    similar_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<ContentSimilar {self.content_id}#{self.position} {self.similar_id}>'
+
+class SimilarIndexState(db.Model):
+    """Linha única com o último ``catalog_change`` já aplicado em content_similar"""
+    __tablename__ = 'similar_index_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    change_id = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SimilarIndexState {self.change_id}>'
+
+def similar_count():
+    if has_app_context():
+        return current_app.config.get('SIMILAR_COUNT', DEFAULT_SIMILAR_COUNT)
+    return DEFAULT_SIMILAR_COUNT
+
+class SimilarityFeatures:
+    """Features do catálogo em arrays NumPy, uma linha por conteúdo
+
+    Gêneros e plataformas viram colunas indicadoras normalizadas, então o
+    produto escalar de duas linhas é o cosseno; tipo e ano viram um código
+    cuja afinidade vem de uma tabela código x código. O vocabulário é pequeno
+    (dezenas de gêneros e plataformas), então a matriz é densa em float32: 50
+    mil conteúdos ocupam poucos MB. Conteúdos excluídos só perdem a linha
+    (``present``), que não é reaproveitada.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        self.rows = {}
+        self.ids = np.zeros(0, np.int64)
+        self.present = np.zeros(0, bool)
+        self.active = np.zeros(0, bool)
+        self.codes = np.zeros(0, np.int32)
+        self.matrix = np.zeros((0, 0), np.float32)
+        # ('genre', gênero) / ('platform', id) -> coluna; (tipo, ano) -> código
+        self.columns = {}
+        self.code_keys = {}
+        self._affinity = None
+        # Último id do registro de alterações já aplicado
+        self.synced = 0
+
+    def update(self, records, platforms):
+        """Grava as linhas de ``records`` (id, tipo, ano, gênero, ativo); ``platforms``: {id: ids}"""
+        new = [record[0] for record in records if record[0] not in self.rows]
+        if new:
+            self.rows.update((content_id, len(self.ids) + offset) for offset, content_id in enumerate(new))
+            self.ids = np.concatenate([self.ids, np.array(new, np.int64)])
+            self.present = np.concatenate([self.present, np.zeros(len(new), bool)])
+            self.active = np.concatenate([self.active, np.zeros(len(new), bool)])
+            self.codes = np.concatenate([self.codes, np.zeros(len(new), np.int32)])
+            self.matrix = np.concatenate([self.matrix, np.zeros((len(new), self.matrix.shape[1]), np.float32)])
+
+        rows = np.array([self.rows[record[0]] for record in records], np.int64)
+        cells = ([], [], [])
+        for row, (content_id, content_type, year, genre, _) in zip(rows.tolist(), records):
+            genres = list(dict.fromkeys(token.casefold() for token in genre_tokens(genre)))
+            for kind, keys in (('genre', genres), ('platform', sorted(platforms.get(content_id, ())))):
+                for key in keys:
+                    cells[0].append(row)
+                    cells[1].append(self._column(kind, key))
+                    cells[2].append(1 / np.sqrt(len(keys)))
+        self.present[rows] = True
+        self.active[rows] = [bool(record[4]) for record in records]
+        self.codes[rows] = [self._code(record[1], record[2]) for record in records]
+        self.matrix[rows] = 0
+        self.matrix[cells[0], cells[1]] = cells[2]
+
+    def remove(self, content_ids):
+        for content_id in content_ids:
+            row = self.rows.get(content_id)
+            if row is not None:
+                self.present[row] = self.active[row] = False
+                self.matrix[row] = 0
+
+    def _column(self, kind, key):
+        if (kind, key) not in self.columns:
+            self.columns[kind, key] = len(self.columns)
+            # A matriz cresce de 16 em 16 colunas (cada crescimento a copia)
+            if len(self.columns) > self.matrix.shape[1]:
+                self.matrix = np.pad(self.matrix, ((0, 0), (0, 16)))
+        return self.columns[kind, key]
+
+    def _code(self, content_type, year):
+        if (content_type, year) not in self.code_keys:
+            self.code_keys[content_type, year] = len(self.code_keys)
+            self._affinity = None
+        return self.code_keys[content_type, year]
+
+    def affinity(self):
+        """Tabela código x código com a parte de tipo e ano do score"""
+        if self._affinity is None:
+            keys = sorted(self.code_keys, key=self.code_keys.get)
+            type_ids = {}
+            types = np.array([type_ids.setdefault(content_type, len(type_ids)) for content_type, _ in keys])
+            years = np.array([np.nan if year is None else year for _, year in keys], np.float32)
+            closeness = np.clip(1 - np.abs(years[:, None] - years[None, :]) / YEAR_WINDOW, 0, None)
+            self._affinity = (TYPE_WEIGHT * (types[:, None] == types[None, :])
+                              + YEAR_WEIGHT * np.nan_to_num(closeness)).astype(np.float32)
+        return self._affinity
+
+    def weights(self):
+        weights = np.zeros(self.matrix.shape[1], np.float32)
+        for (kind, _), column in self.columns.items():
+            weights[column] = GENRE_WEIGHT if kind == 'genre' else PLATFORM_WEIGHT
+        return weights
+
+    def block(self, rows):
+        """Prepara ``rows`` como candidatos: ordenados por código, matriz transposta
+
+        Com as colunas agrupadas por código a parte de tipo/ano entra com um
+        ``np.repeat`` da linha da tabela de afinidade, sem indexar elemento
+        por elemento.
+        """
+        rows = rows[np.argsort(self.codes[rows], kind='stable')]
+        positions = np.full(len(self.ids), -1)
+        positions[rows] = np.arange(len(rows))
+        counts = np.bincount(self.codes[rows], minlength=len(self.code_keys))
+        return rows, np.ascontiguousarray(self.matrix[rows].T), counts, positions
+
+    def scores(self, queries, block):
+        """Matriz de scores ``queries`` x candidatos do ``block`` (o próprio conteúdo fica -inf)"""
+        rows, features, counts, positions = block
+        scores = (self.matrix[queries] * self.weights()) @ features
+        scores += np.repeat(self.affinity()[self.codes[queries]], counts, axis=1)
+        own = positions[queries]
+        scores[np.flatnonzero(own >= 0), own[own >= 0]] = -np.inf
+        return scores
+
+    def top(self, queries, block, k):
+        """(ids, scores) dos ``k`` melhores candidatos de cada linha, do maior score para o menor"""
+        keys = rank_keys(self.scores(queries, block), self.ids[block[0]])
+        k = min(k, keys.shape[1])
+        if k < keys.shape[1]:
+            picked = np.argpartition(keys, -k, axis=1)[:, -k:]
+        else:
+            picked = np.broadcast_to(np.arange(k), keys.shape)
+        picked = np.take_along_axis(picked, np.argsort(-np.take_along_axis(keys, picked, axis=1), axis=1), axis=1)
+        values = np.rint(np.take_along_axis(keys, picked, axis=1) / 2.0 ** 32) / 10000
+        return self.ids[block[0][picked]], values
+
+    def neighbours(self, content_ids, k):
+        """``{id: [(id parecido, score), ...]}`` com até ``k`` vizinhos de score positivo
+
+        Conteúdos com os mesmos gêneros são pontuados juntos, só contra os
+        candidatos com algum desses gêneros; quem não tem ``k`` vizinhos acima
+        de ``NO_GENRE_MAX`` (o máximo sem gênero em comum) é pontuado de novo
+        contra o catálogo inteiro, então o resultado é exato.
+        """
+        if k < 1:
+            return {content_id: [] for content_id in content_ids}
+        candidates = np.flatnonzero(self.active)
+        genre_columns = np.array(sorted(column for (kind, _), column in self.columns.items() if kind == 'genre'), int)
+        queries = np.array([self.rows[content_id] for content_id in content_ids], np.int64)
+        signatures, groups = np.unique(self.matrix[np.ix_(queries, genre_columns)] > 0, axis=0, return_inverse=True)
+
+        result = {}
+        remaining = []
+        for group, signature in enumerate(signatures):
+            rows = queries[groups.ravel() == group]
+            # Grupos pequenos não compensam montar um bloco só para eles
+            if not signature.any() or len(rows) < MIN_GROUP_SIZE:
+                remaining.extend(rows.tolist())
+                continue
+            block = self.block(candidates[(self.matrix[np.ix_(candidates, genre_columns[signature])] > 0).any(axis=1)])
+            for chunk in _chunks(rows):
+                ids, values = self.top(chunk, block, k)
+                if values.shape[1] == k:
+                    complete = values[:, -1] > NO_GENRE_MAX
+                else:
+                    complete = np.zeros(len(chunk), bool)
+                result.update(_pairs(chunk[complete], ids[complete], values[complete], self.ids))
+                remaining.extend(chunk[~complete].tolist())
+        if remaining:
+            block = self.block(candidates)
+            for chunk in _chunks(remaining):
+                result.update(_pairs(chunk, *self.top(chunk, block, k), self.ids))
+        return result
+
+def rank_keys(scores, candidate_ids):
+    """Chave única de ordenação: score com 4 casas (o que é gravado) e, no empate, o menor id
+
+    Com ela o resultado não depende da ordem dos candidatos, e a atualização
+    incremental coincide com a reconstrução.
+    """
+    return np.rint(scores.astype(np.float64) * 10000) * 2.0 ** 32 - candidate_ids
+
+def _chunks(rows):
+    rows = np.asarray(rows, np.int64)
+    for start in range(0, len(rows), CHUNK_SIZE):
+        yield rows[start:start + CHUNK_SIZE]
+
+def _pairs(rows, ids, values, content_ids):
+    """``(id, [(id parecido, score), ...])`` de cada linha, só com score positivo"""
+    for content_id, row_ids, row_values in zip(content_ids[rows].tolist(), ids.tolist(), values.round(4).tolist()):
+        yield content_id, [(similar_id, score) for similar_id, score in zip(row_ids, row_values) if score > 0]
+
+# Protege a criação das features de cada app
+_features_lock = threading.Lock()
+
+def _load(features, content_ids=None):
+    """Relê do banco os conteúdos ``content_ids`` (None = todos) para ``features``"""
+    def batches():
+        if content_ids is None:
+            yield None
+            return
+        ids = sorted(content_ids)
+        for start in range(0, len(ids), 500):
+            yield ids[start:start + 500]
+
+    for batch in batches():
+        contents = db.session.query(Content.id, Content.type, Content.year, Content.genre, Content.is_active)
+        links = db.session.query(ContentStreaming.content_id, ContentStreaming.streaming_id).filter(
+            ContentStreaming.available == True
+        )
+        if batch is not None:
+            contents = contents.filter(Content.id.in_(batch))
+            links = links.filter(ContentStreaming.content_id.in_(batch))
+        platforms = defaultdict(list)
+        for content_id, streaming_id in links:
+            platforms[content_id].append(streaming_id)
+        records = [tuple(row) for row in contents]
+        features.update(records, platforms)
+        if batch is not None:
+            features.remove(set(batch) - {record[0] for record in records})
+
+def current_features():
+    """Features do app (guardadas em ``app.extensions``), sincronizadas pelo registro de alterações
+
+    A primeira chamada do processo carrega o catálogo inteiro; as seguintes
+    relêem só os conteúdos com alterações posteriores à última sincronização.
+    """
+    features = current_app.extensions.get('similar_features')
+    if features is None:
+        with _features_lock:
+            features = current_app.extensions.setdefault('similar_features', SimilarityFeatures())
+
+    with features.lock:
+        latest = latest_change_id()
+        if features.synced > latest:
+            # Banco restaurado ou recriado: começa do zero
+            features.reset()
+        stale = set(db.session.scalars(select(CatalogChange.entity_id).where(
+            CatalogChange.entity == CONTENT, CatalogChange.id > features.synced, CatalogChange.id <= latest
+        )))
+        if not features.rows or len(stale) > len(features.rows) // 2:
+            features.reset()
+            _load(features)
+        else:
+            _load(features, stale)
+        features.synced = latest
+    return features
+
+def _store(neighbours, cleared):
+    """Troca as listas de ``cleared`` pelas de ``neighbours`` (sem commit)"""
+    table = ContentSimilar.__table__
+    if cleared:
+        db.session.execute(table.delete().where(table.c.content_id == db.bindparam('b_content_id')),
+                           [{'b_content_id': content_id} for content_id in sorted(cleared)])
+    rows = [
+        {'content_id': content_id, 'position': position, 'similar_id': similar_id, 'score': score}
+        for content_id, pairs in sorted(neighbours.items())
+        for position, (similar_id, score) in enumerate(pairs)
+    ]
+    if rows:
+        db.session.execute(ContentSimilar.__table__.insert(), rows)
+
+def _save(neighbours, cleared, change_id, previous=None):
+    """Grava as listas e o cursor ``change_id`` em uma transação curta
+
+    Com ``previous`` (atualização incremental) só grava se o cursor ainda
+    for ``previous``; retorna False quando outro processo já o avançou. Sem
+    ele (reconstrução) troca a tabela inteira. Quando alguma lista muda, a
+    versão do catálogo sobe na mesma transação, invalidando o cache de
+    respostas e os ETags de ``?include=similar``.
+    """
+    state = SimilarIndexState.__table__
+    values = {'change_id': change_id, 'refreshed_at': datetime.utcnow()}
+    if previous is None:
+        if not db.session.execute(state.update().where(state.c.id == 1).values(**values)).rowcount:
+            db.session.execute(state.insert().values(id=1, **values))
+        db.session.execute(ContentSimilar.__table__.delete())
+    elif not db.session.execute(
+        state.update().where(state.c.id == 1, state.c.change_id == previous).values(**values)
+    ).rowcount:
+        db.session.rollback()
+        return False
+    _store(neighbours, cleared)
+    if previous is None or neighbours or cleared:
+        bump_catalog_version()
+    db.session.commit()
+    return True
+
+def _rebuild(features):
+    """Recalcula todas as listas a partir de ``features`` já sincronizadas (com o lock delas)"""
+    content_ids = features.ids[features.present].tolist()
+    change_id = features.synced
+    # Encerra a leitura antes do cálculo: o banco só fica travado na gravação
+    db.session.commit()
+    _save(features.neighbours(content_ids, similar_count()), (), change_id)
+    return len(content_ids)
+
+def rebuild_similar_index():
+    """Recalcula as listas de todos os conteúdos; retorna quantos foram indexados"""
+    features = current_features()
+    with features.lock:
+        return _rebuild(features)
+
+def _affected(features, changed, k):
+    """Conteúdos cujas listas mudam com a alteração de ``changed``
+
+    Os próprios conteúdos, quem os tinha como vizinhos (o score mudou ou
+    saíram do catálogo) e quem passa a tê-los: como o score é simétrico,
+    basta comparar o score de cada conteúdo alterado com o do último vizinho
+    de cada lista.
+    """
+    table = ContentSimilar.__table__
+    ids = sorted(changed)
+    present = {content_id for content_id in changed
+               if content_id in features.rows and features.present[features.rows[content_id]]}
+    recompute = set(present)
+    for start in range(0, len(ids), 500):
+        recompute.update(db.session.scalars(
+            select(table.c.content_id).where(table.c.similar_id.in_(ids[start:start + 500])).distinct()
+        ))
+
+    entering = [features.rows[content_id] for content_id in sorted(present)
+                if features.active[features.rows[content_id]]]
+    if entering:
+        # Chave do último vizinho de cada lista (0 nas listas incompletas)
+        floor = np.zeros(len(features.ids))
+        last = db.session.execute(
+            select(table.c.content_id, table.c.similar_id, table.c.score).where(table.c.position == k - 1)
+        ).all()
+        if last:
+            content_ids, similar_ids, scores = (np.array(column) for column in zip(*last))
+            rows = np.array([features.rows.get(content_id, -1) for content_id in content_ids.tolist()])
+            floor[rows[rows >= 0]] = rank_keys(scores, similar_ids)[rows >= 0]
+        block = features.block(np.flatnonzero(features.present))
+        for chunk in _chunks(entering):
+            hits = rank_keys(features.scores(chunk, block), features.ids[chunk][:, None]) > floor[block[0]]
+            recompute.update(features.ids[block[0][np.flatnonzero(hits.any(axis=0))]].tolist())
+
+    return {content_id for content_id in recompute
+            if content_id in features.rows and features.present[features.rows[content_id]]}
+
+def refresh_similar_index():
+    """Aplica às listas as alterações de conteúdos posteriores ao cursor; retorna um relatório
+
+    Roda fora das requisições (``manage.py refresh-similar``), então as
+    listas ficam para trás do catálogo até a próxima rodada. Recalcula só as
+    listas afetadas (``_affected``); sem cursor, com o banco restaurado
+    (cursor à frente do registro) ou com mais de ``FULL_REBUILD_FRACTION``
+    do catálogo afetado, reconstrói tudo. ``mode`` no relatório é
+    ``unchanged``, ``incremental``, ``rebuild`` ou ``skipped`` (outro
+    processo avançou o cursor antes).
+    """
+    k = similar_count()
+    previous = db.session.scalar(select(SimilarIndexState.change_id).where(SimilarIndexState.id == 1))
+    features = current_features()
+    with features.lock:
+        report = {'mode': 'unchanged', 'changed': 0, 'recomputed': 0, 'change_id': features.synced}
+        if previous is None or previous > features.synced:
+            report.update(mode='rebuild', recomputed=_rebuild(features))
+            return report
+
+        changed = set(db.session.scalars(select(CatalogChange.entity_id).where(
+            CatalogChange.entity == CONTENT, CatalogChange.id > previous, CatalogChange.id <= features.synced
+        )))
+        report['changed'] = len(changed)
+        limit = FULL_REBUILD_FRACTION * features.present.sum()
+        recompute = _affected(features, changed, k) if changed and len(changed) <= limit else set()
+        if len(changed) > limit or len(recompute) > limit:
+            report.update(mode='rebuild', recomputed=_rebuild(features))
+            return report
+
+        # Encerra a leitura antes do cálculo: o banco só fica travado na gravação
+        db.session.commit()
+        if previous == features.synced:
+            return report
+        neighbours = features.neighbours(sorted(recompute), k) if recompute else {}
+        saved = _save(neighbours, recompute | changed, features.synced, previous)
+        report.update(mode='incremental' if saved else 'skipped', recomputed=len(recompute))
+    return report
+
+def similar_statement(content_id):
+    """Vizinhos ativos de ``content_id`` já em ordem (só a chave primária de content_similar)"""
+    return select(*(getattr(Content, name) for name in SIMILAR_FIELDS), ContentSimilar.score).join(
+        Content, Content.id == ContentSimilar.similar_id
+    ).where(
+        ContentSimilar.content_id == content_id, Content.is_active == True
+    ).order_by(ContentSimilar.position)
+
+def similar_items(rows, thumbnails=False):
+    """Dicts de ``similar`` a partir das linhas de ``similar_statement``"""
+    items = []
+    for row in rows:
+        item = dict(zip(SIMILAR_FIELDS + ('score',), row))
+        if thumbnails:
+            item['poster_thumbnails'] = thumbnail_urls('content', item['id'], item['poster_url'])
+        items.append(item)
+    return items
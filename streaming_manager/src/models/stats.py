@@ -0,0 +1,137 @@
+from collections import Counter
+from sqlalchemy import func
+from .db import db
+from .content import Content, ContentStreaming, StreamingPlatform
+
+# Linha marcadora: só existe depois que a tabela foi materializada
+BUILT_KEY = 'built'
+
+class CatalogStat(db.Model):
+    """Contadores materializados usados por /api/content/stats
+
+    Cada chave é um contador independente:
+    - ``active`` / ``inactive``: total de conteúdos por status
+    - ``type:<tipo>``: conteúdos ativos por tipo
+    - ``streaming:<id>``: vínculos disponíveis de conteúdos ativos por plataforma
+    """
+    __tablename__ = 'catalog_stat'
+
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CatalogStat {self.key}={self.value}>'
+
+def aggregate_counters():
+    """Calcula todos os contadores com duas consultas agrupadas"""
+    counters = Counter()
+
+    by_type = db.session.query(
+        Content.type, Content.is_active, func.count(Content.id)
+    ).group_by(Content.type, Content.is_active)
+    for content_type, is_active, count in by_type:
+        if is_active is None:
+            continue
+        if is_active:
+            counters['active'] += count
+            counters[f'type:{content_type}'] += count
+        else:
+            counters['inactive'] += count
+
+    by_streaming = db.session.query(
+        ContentStreaming.streaming_id, func.count()
+    ).join(Content).filter(
+        ContentStreaming.available == True,
+        Content.is_active == True
+    ).group_by(ContentStreaming.streaming_id)
+    for streaming_id, count in by_streaming:
+        counters[f'streaming:{streaming_id}'] = count
+
+    return counters
+
+def content_stat_keys(content):
+    """Lista os contadores para os quais ``content`` contribui com +1
+
+    Deve ser chamada com o conteúdo já persistido (após flush), pois consulta
+    os vínculos disponíveis direto no banco.
+    """
+    if content is None or content.is_active is None:
+        return []
+    if not content.is_active:
+        return ['inactive']
+
+    keys = ['active', f'type:{content.type}']
+    streaming_ids = db.session.query(ContentStreaming.streaming_id).filter_by(
+        content_id=content.id, available=True
+    )
+    keys.extend(f'streaming:{streaming_id}' for (streaming_id,) in streaming_ids)
+    return keys
+
+def is_materialized():
+    return db.session.get(CatalogStat, BUILT_KEY) is not None
+
+def apply_stat_delta(before_keys, after_keys):
+    """Aplica incrementalmente a diferença entre dois estados de um conteúdo
+
+    Não faz nada enquanto a tabela não tiver sido materializada; o commit
+    fica a cargo da rota, na mesma transação da escrita.
+    """
+    delta = Counter(after_keys)
+    delta.subtract(before_keys)
+    delta = {key: value for key, value in delta.items() if value}
+    if not delta or not is_materialized():
+        return
+
+    for key, value in delta.items():
+        updated = CatalogStat.query.filter_by(key=key).update(
+            {CatalogStat.value: CatalogStat.value + value}, synchronize_session=False
+        )
+        if not updated:
+            db.session.add(CatalogStat(key=key, value=value))
+
+def forget_streaming(streaming_id):
+    """Remove o contador de uma plataforma excluída"""
+    CatalogStat.query.filter_by(key=f'streaming:{streaming_id}').delete(synchronize_session=False)
+
+def rebuild_stats():
+    """Recria a tabela materializada a partir das consultas agrupadas"""
+    CatalogStat.query.delete(synchronize_session=False)
+    counters = aggregate_counters()
+    db.session.add_all(CatalogStat(key=key, value=value) for key, value in counters.items())
+    db.session.add(CatalogStat(key=BUILT_KEY, value=1))
+    db.session.commit()
+    return counters
+
+def load_counters(materialized=False):
+    """Retorna os contadores, lidos da tabela materializada quando habilitada
+
+    A tabela é montada pela migração (ou por ``manage.py rebuild-stats``);
+    enquanto não existir, a leitura usa as consultas agrupadas e nunca grava.
+    """
+    if not materialized:
+        return aggregate_counters()
+
+    rows = db.session.query(CatalogStat.key, CatalogStat.value).all()
+    if not any(key == BUILT_KEY for key, _ in rows):
+        return aggregate_counters()
+    return Counter({key: value for key, value in rows if key != BUILT_KEY})
+
+def build_stats_payload(counters):
+    """Monta a resposta de /api/content/stats a partir dos contadores"""
+    streaming_stats = []
+    for streaming in StreamingPlatform.query.filter_by(active=True).all():
+        streaming_stats.append({
+            'streaming': streaming.to_dict(),
+            'count': counters.get(f'streaming:{streaming.id}', 0)
+        })
+
+    return {
+        'total_content': counters.get('active', 0),
+        'total_inactive': counters.get('inactive', 0),
+        'by_type': {
+            'movies': counters.get('type:movie', 0),
+            'series': counters.get('type:series', 0),
+            'animes': counters.get('type:anime', 0)
+        },
+        'by_streaming': streaming_stats
+    }
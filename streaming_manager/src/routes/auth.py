@@ -1,8 +1,14 @@
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import timedelta
 from functools import wraps
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, create_access_token, decode_token, get_jwt_identity
+from flask_jwt_extended.exceptions import NoAuthorizationError, WrongTokenError
+from src.routes.ratelimit import rate_limited
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -10,7 +16,82 @@ auth_bp = Blueprint('auth', __name__)
 ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
 ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'senha123')
 
+class TokenCache:
+    """Claims de tokens já decodificados, por SHA-256 do token (LRU limitado)
+
+    Uma entrada vale até o ``exp`` do token ou por ``ttl`` segundos, o que
+    vier primeiro. O app não usa blocklist: um token vale até expirar, então
+    as claims só dependem do próprio token.
+    """
+
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token, claims):
+        valid_until = time.time() + self.ttl
+        if 'exp' in claims:
+            valid_until = min(valid_until, claims['exp'])
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (valid_until, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+def init_token_cache(app):
+    """Instala o cache de tokens decodificados (JWT_CACHE_SIZE=0 desabilita)"""
+    size = app.config.get('JWT_CACHE_SIZE', 1024)
+    if size > 0:
+        app.extensions['jwt_token_cache'] = TokenCache(size, app.config.get('JWT_CACHE_TTL', 300))
+
+def admin_token_claims():
+    """Claims do token ``Bearer`` da requisição, via ``decode_token``
+
+    Tokens já vistos vêm do cache, sem decodificar de novo. Token ausente,
+    expirado ou inválido levanta as exceções do flask_jwt_extended/PyJWT,
+    respondidas pelos handlers do JWTManager como em ``jwt_required``.
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme != 'Bearer' or not token:
+        raise NoAuthorizationError('Missing Authorization Header')
+    cache = current_app.extensions.get('jwt_token_cache')
+    claims = cache.get(token) if cache is not None else None
+    if claims is None:
+        claims = decode_token(token)
+        if claims.get('type') != 'access':
+            raise WrongTokenError('Only non-refresh tokens are allowed')
+        if cache is not None:
+            cache.put(token, claims)
+    return claims
+
+def _failed_login(response):
+    # Só credenciais recusadas gastam o bucket de login
+    return response.status_code == 401
+
 @auth_bp.route('/login', methods=['POST'])
+@rate_limited('auth', counts=_failed_login)
 def login():
     """Endpoint para fazer login e obter token JWT"""
     try:
@@ -45,6 +126,7 @@ def login():
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 @auth_bp.route('/verify', methods=['GET'])
+@rate_limited('session')
 @jwt_required()
 def verify_token():
     """Verificar se o token é válido"""
@@ -59,6 +141,7 @@ def verify_token():
         return jsonify({'error': f'Token inválido: {str(e)}'}), 401
 
 @auth_bp.route('/logout', methods=['POST'])
+@rate_limited('session')
 @jwt_required()
 def logout():
     """Logout (no JWT, apenas confirma que o token ainda é válido)"""
@@ -71,12 +154,16 @@ def logout():
         return jsonify({'error': f'Erro no logout: {str(e)}'}), 400
 
 def admin_required(f):
-    """Decorator para proteger rotas que precisam de autenticação de admin"""
+    """Decorator para proteger rotas que precisam de autenticação de admin
+
+    Limitado pelo escopo ``admin`` do rate limit antes de olhar o token.
+    """
     @wraps(f)
-    @jwt_required()
+    @rate_limited('admin')
     def decorated_function(*args, **kwargs):
+        claims = admin_token_claims()
         try:
-            current_user = get_jwt_identity()
+            current_user = claims.get(current_app.config.get('JWT_IDENTITY_CLAIM', 'sub'))
             if current_user != ADMIN_USERNAME:
                 return jsonify({'error': 'Acesso negado. Apenas administradores.'}), 403
             return f(*args, **kwargs)
@@ -0,0 +1,191 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, make_response, request
+from src.models.catalog import get_catalog_version
+
+class ResponseCache:
+    """Cache LRU em memória do JSON serializado das rotas públicas
+
+    Cada entrada pertence a uma geração (a versão do catálogo). Como a versão
+    fica no banco, toda escrita feita por qualquer worker invalida o cache de
+    todos os processos: na próxima leitura a geração muda e as entradas
+    antigas são descartadas de uma vez.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generation = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def _sync_generation(self, generation):
+        """Avança para ``generation``; False se ela for mais antiga que a atual
+
+        Uma requisição lenta que leu a versão antes de uma escrita não pode
+        zerar o cache nem gravar nele uma resposta já vencida.
+        """
+        if self._generation is not None and generation < self._generation:
+            return False
+        if generation != self._generation:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation = generation
+        return True
+
+    def get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key) if self._sync_generation(generation) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, generation, body, mimetype):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if not self._sync_generation(generation):
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[0])
+            self._entries[key] = (body, mimetype)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'generation': self._generation
+            }
+
+response_cache = ResponseCache()
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def wants_ndjson():
+    """O cliente pediu JSON Lines via Accept (``*/*`` continua sendo JSON)"""
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def init_response_cache(app):
+    """Dimensiona o cache a partir da configuração (0 desabilita)"""
+    response_cache.max_entries = app.config.get('RESPONSE_CACHE_SIZE', response_cache.max_entries)
+    response_cache.max_bytes = app.config.get('RESPONSE_CACHE_MAX_BYTES', response_cache.max_bytes)
+    response_cache.clear()
+
+def normalized_args():
+    """Parâmetros da query string em forma canônica
+
+    Ordena todos os pares (inclusive os ``streaming_ids`` repetidos) e
+    normaliza ``show_inactive``, de modo que URLs equivalentes gerem a mesma
+    chave de cache e o mesmo ETag.
+    """
+    items = []
+    for key, value in request.args.items(multi=True):
+        if key == 'show_inactive':
+            value = 'true' if value.lower() == 'true' else 'false'
+        items.append((key, value))
+    return tuple(sorted(items))
+
+def current_catalog_version():
+    """Versão do catálogo, lida uma única vez por requisição"""
+    if 'catalog_version' not in g:
+        g.catalog_version = get_catalog_version()
+    return g.catalog_version
+
+def catalog_etag(version):
+    """ETag forte da representação pedida na versão ``version`` do catálogo"""
+    args = '&'.join(f'{key}={value}' for key, value in normalized_args())
+    representation = 'ndjson' if wants_ndjson() else 'json'
+    raw = f'{version}:{representation}:{request.path}?{args}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+def cache_key(endpoint, view_args):
+    """Chave do ``response_cache`` para a requisição atual"""
+    return (endpoint, tuple(sorted(view_args.items())), normalized_args(), wants_ndjson())
+
+def set_catalog_headers(response, etag):
+    """ETag e Cache-Control das respostas que só dependem do catálogo"""
+    response.set_etag(etag)
+    response.vary.add('Accept')
+    max_age = current_app.config.get('CATALOG_CACHE_MAX_AGE', 0)
+    response.headers['Cache-Control'] = f'public, max-age={max_age}, must-revalidate'
+    return response
+
+def conditional_get(f):
+    """Decorator de GET condicional para rotas que só dependem do catálogo
+
+    Lê a versão do catálogo (uma consulta por chave primária) antes de
+    executar a rota: se o cliente já tem essa versão, responde 304 sem
+    consultar o catálogo. A versão é lida antes do corpo, então uma escrita
+    concorrente no máximo gera um ETag mais antigo que o corpo, o que só
+    causa uma revalidação a mais.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        etag = catalog_etag(current_catalog_version())
+
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        return set_catalog_headers(response, etag)
+    return decorated_function
+
+def cached_response(f):
+    """Decorator que guarda no ``response_cache`` o corpo das respostas 200
+
+    A chave combina endpoint, argumentos da URL e a query string normalizada;
+    a geração é a versão do catálogo. Respostas em streaming não são guardadas.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not response_cache.enabled:
+            return f(*args, **kwargs)
+
+        generation = current_catalog_version()
+        key = cache_key(request.endpoint, kwargs)
+        entry = response_cache.get(key, generation)
+        if entry is not None:
+            body, mimetype = entry
+            return current_app.response_class(body, mimetype=mimetype)
+
+        response = make_response(f(*args, **kwargs))
+        if response.status_code == 200 and not response.is_streamed:
+            response_cache.set(key, generation, response.get_data(), response.mimetype)
+        return response
+    return decorated_function
@@ -1,51 +1,406 @@
-from flask import Blueprint, request, jsonify
-from src.models.content import Content, StreamingPlatform, ContentStreaming, db
+import base64
+import io
+import json
+from collections import Counter, defaultdict, namedtuple
+from datetime import timedelta
+from itertools import islice
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from src.models.availability import availability_backlog
+from src.models.bulk import (
+    FORMATS, apply_availability, detect_format, export_catalog, import_catalog, read_records
+)
+from src.models.catalog import CONTENT, STREAMING, CatalogChange, bump_catalog_version, latest_change_id
+from src.models.content import Content, StreamingPlatform, ContentStreaming, db, genre_tokens, sync_streaming_links
+from src.models.db import read_only
+from src.models.similar import similar_items, similar_statement
+from src.models.search import (
+    build_match_expression, index_content, search_index_available, search_matches, unindex_content
+)
+from src.models.stats import apply_stat_delta, build_stats_payload, content_stat_keys, load_counters
 from src.routes.auth import admin_required
-from sqlalchemy import and_
+from src.routes.caching import NDJSON_MIMETYPE, cached_response, conditional_get, wants_ndjson
+from src.routes.serialization import ContentSerializer, parse_shape, wants_thumbnails
+from sqlalchemy import and_, func, or_, select
+from werkzeug.datastructures import MultiDict
 
 content_bp = Blueprint('content', __name__)
 
+# Paginação por cursor (keyset em (title, id))
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Linhas lidas do banco (yield_per) e enviadas por bloco no modo streaming
+STREAM_BATCH_SIZE = 500
+# Ids aceitos por requisição no multi-get (?ids= e /content/batch)
+MAX_BATCH_IDS = 500
+# Facetas de ?facets= e o filtro que cada uma ignora ao contar
+FACET_FILTERS = {'type': 'type', 'genre': 'genre', 'streaming': 'streaming_ids'}
+# Dados extras de GET /content/<id> (?include=similar)
+INCLUDES = ('similar',)
+# Alterações por página em /content/changes
+DEFAULT_CHANGES_PAGE = 500
+MAX_CHANGES_PAGE = 1000
+
+def encode_cursor(content):
+    """Gera o cursor opaco que aponta para depois de ``content``"""
+    raw = json.dumps([content.title, content.id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Retorna (title, id) do cursor ou levanta ValueError"""
+    try:
+        title, content_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('Cursor inválido')
+    if not isinstance(title, str) or not isinstance(content_id, int):
+        raise ValueError('Cursor inválido')
+    return title, content_id
+
+def parse_fields(raw):
+    """Converte ``fields=a,b`` em conjunto validado (``None`` = todos)"""
+    if not raw:
+        return None
+    fields = {field.strip() for field in raw.split(',') if field.strip()}
+    unknown = fields - set(Content.SERIALIZABLE_FIELDS)
+    if unknown:
+        raise ValueError(f'Campos inválidos: {", ".join(sorted(unknown))}')
+    # O id é sempre enviado para que a lista possa referenciar os itens
+    fields.add('id')
+    return fields
+
+def parse_ids(raw):
+    """Converte ``"1,2,3"`` ou ``[1, 2, 3]`` em lista de ids sem repetição, na ordem pedida"""
+    if isinstance(raw, str):
+        raw = [part.strip() for part in raw.split(',') if part.strip()]
+    if not isinstance(raw, list) or not raw:
+        raise ValueError('ids deve ser uma lista de ids')
+    ids = []
+    for item in raw:
+        if isinstance(item, str) and item.isdigit():
+            item = int(item)
+        if not isinstance(item, int) or isinstance(item, bool):
+            raise ValueError(f'id inválido: {item!r}')
+        ids.append(item)
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f'Máximo de {MAX_BATCH_IDS} ids por requisição')
+    return ids
+
+def apply_content_filters(query, args, ranked=False):
+    """Aplica os filtros públicos (type, genre, search, streaming_ids, show_inactive)
+
+    Com ``ranked`` a busca textual ordena primeiro pela relevância (bm25).
+    """
+    content_type = args.get('type')
+    streaming_ids = args.getlist('streaming_ids')
+    genre = args.get('genre')
+    search = args.get('search')
+    show_inactive = args.get('show_inactive', 'false').lower() == 'true'
+    
+    # Filtrar por status ativo (padrão: mostrar apenas ativos)
+    if not show_inactive:
+        query = query.filter(Content.is_active == True)
+    
+    # Aplicar filtros
+    if content_type:
+        query = query.filter(Content.type == content_type)
+    
+    # Gênero continua por substring (ILIKE): "ação" também acha "Ação/Aventura"
+    # e "cien" acha "Ficção científica", como antes do índice de busca
+    if genre:
+        query = query.filter(Content.genre.ilike(f'%{genre}%'))
+    
+    # Busca por título: índice FTS5 quando disponível, ILIKE como alternativa
+    expression = build_match_expression(title=search) if search and search_index_available() else None
+    if search and not expression:
+        query = query.filter(Content.title.ilike(f'%{search}%'))
+    
+    if expression:
+        matches = search_matches(expression)
+        if ranked and search:
+            query = query.join(matches, matches.c.rowid == Content.id).order_by(matches.c.rank)
+        else:
+            # Sem ordenar por relevância basta um IN: o SQLite resolve o MATCH
+            # uma vez, enquanto no JOIN o planejador às vezes percorre os
+            # índices de content e repete o MATCH por linha (100x mais lento)
+            query = query.filter(Content.id.in_(select(matches.c.rowid)))
+    
+    if streaming_ids:
+        # Filtrar por streamings específicos (EXISTS evita o DISTINCT sobre o JOIN)
+        streaming_ids = [int(sid) for sid in streaming_ids if sid.isdigit()]
+        query = query.filter(Content.streamings.any(
+            and_(
+                ContentStreaming.streaming_id.in_(streaming_ids),
+                ContentStreaming.available == True
+            )
+        ))
+    
+    return query
+
+def reload_content(content_id):
+    """Relê o conteúdo recém-gravado com os vínculos em uma consulta (sem N+1 no to_dict)"""
+    return db.session.get(Content, content_id, options=[Content.eager_streamings()], populate_existing=True)
+
+def parse_include(raw):
+    """Converte ``include=similar`` no conjunto validado de extras"""
+    include = {name.strip() for name in (raw or '').split(',') if name.strip()}
+    unknown = include - set(INCLUDES)
+    if unknown:
+        raise ValueError(f'include inválido: {", ".join(sorted(unknown))} (use {", ".join(INCLUDES)})')
+    return include
+
+def content_detail(content, include, thumbnails, similar_rows=()):
+    """Payload de GET /content/<id>; ``similar_rows`` vêm de ``similar_statement``"""
+    payload = content.to_dict(thumbnails=thumbnails)
+    if 'similar' in include:
+        payload['similar'] = similar_items(similar_rows, thumbnails)
+    return payload
+
+def parse_facets(raw):
+    """Converte ``facets=true`` (todas) ou ``facets=type,genre`` na lista de facetas"""
+    if not raw or raw.lower() in ('0', 'false'):
+        return []
+    if raw.lower() in ('1', 'true'):
+        return list(FACET_FILTERS)
+    facets = [facet.strip() for facet in raw.split(',') if facet.strip()]
+    unknown = set(facets) - set(FACET_FILTERS)
+    if unknown:
+        raise ValueError(f'Facetas inválidas: {", ".join(sorted(unknown))}')
+    return list(dict.fromkeys(facets))
+
+def build_facets(args, facets):
+    """Uma consulta agrupada (``select``) por faceta pedida
+
+    Cada faceta conta sobre os filtros atuais menos o seu próprio, como nas
+    interfaces de filtro: as opções de tipo mostram quantos títulos cada tipo
+    teria com os demais filtros aplicados.
+    """
+    statements = {}
+    for facet in facets:
+        others = MultiDict(args)
+        others.poplist(FACET_FILTERS[facet])
+        if facet == 'type':
+            statement = select(Content.type, func.count(Content.id)).group_by(Content.type)
+        elif facet == 'genre':
+            statement = select(Content.genre, func.count(Content.id)).group_by(Content.genre)
+        else:
+            statement = select(ContentStreaming.streaming_id, func.count(Content.id)).select_from(Content).join(
+                ContentStreaming, and_(ContentStreaming.content_id == Content.id, ContentStreaming.available == True)
+            ).group_by(ContentStreaming.streaming_id)
+        statements[facet] = apply_content_filters(statement, others)
+    return statements
+
+def facets_payload(results):
+    """``{faceta: [{value, count}, ...]}`` com as contagens em ordem decrescente
+
+    Os gêneros compostos são somados por gênero individual (sem diferenciar
+    maiúsculas), exibido com a grafia mais comum.
+    """
+    payload = {}
+    for facet, rows in results.items():
+        counts = Counter()
+        if facet == 'genre':
+            spellings = defaultdict(Counter)
+            for genre, count in rows:
+                for token in genre_tokens(genre):
+                    spellings[token.casefold()][token] += count
+            for variants in spellings.values():
+                counts[variants.most_common(1)[0][0]] = sum(variants.values())
+        else:
+            counts.update({value: count for value, count in rows if value is not None})
+        payload[facet] = [{'value': value, 'count': count}
+                          for value, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))]
+    return payload
+
+# Consulta da listagem já montada, como serializá-la e as consultas das facetas
+Listing = namedtuple('Listing', 'statement serializer stream paginate limit facets')
+
+def build_listing(args, statement, ndjson=False):
+    """Interpreta os parâmetros de GET /api/content e monta a consulta
+
+    ``statement`` pode ser ``Content.query`` (rotas Flask) ou
+    ``select(Content)`` (modo ASGI): ambos aceitam filter/join/order_by/
+    limit. A entidade é trocada pelas colunas do ``ContentSerializer``, então
+    o resultado são tuplas. Levanta ValueError para parâmetros inválidos.
+    """
+    stream = ndjson or args.get('stream', 'false').lower() in ('1', 'true')
+    paginate = not stream and ('limit' in args or 'cursor' in args)
+    normalized = parse_shape(args.get('shape'))
+    if normalized and stream:
+        raise ValueError('shape=normalized não é suportado em streaming')
+    facets = parse_facets(args.get('facets'))
+    if facets and stream:
+        raise ValueError('facets não é suportado em streaming')
+    serializer = ContentSerializer(parse_fields(args.get('fields')), normalized, wants_thumbnails(args))
+    after = decode_cursor(args['cursor']) if args.get('cursor') else None
+    
+    limit = args.get('limit', str(DEFAULT_PAGE_SIZE))
+    limit = int(limit) if limit.isdigit() else 0
+    if limit < 1:
+        raise ValueError('limit deve ser um inteiro maior que zero')
+    limit = min(limit, MAX_PAGE_SIZE)
+    
+    # Só as colunas pedidas (os vínculos vêm depois, em lote). Sem paginação
+    # a busca vem ordenada por relevância; com cursor a ordem precisa ser
+    # (title, id) para o keyset continuar válido.
+    statement = apply_content_filters(serializer.select(statement), args, ranked=not paginate)
+    
+    # Ordenar por título (id desempata e mantém o cursor estável)
+    statement = statement.order_by(Content.title, Content.id)
+    
+    if paginate:
+        if after is not None:
+            title, content_id = after
+            statement = statement.filter(or_(
+                Content.title > title,
+                and_(Content.title == title, Content.id > content_id)
+            ))
+        # Um item a mais indica se existe próxima página
+        statement = statement.limit(limit + 1)
+    
+    return Listing(statement, serializer, stream, paginate, limit, build_facets(args, facets))
+
+def listing_payload(rows, listing, link_rows=(), facet_results=None):
+    """Serializa o resultado de ``build_listing`` (lista ou página com cursor)
+
+    ``link_rows`` é o resultado de ``serializer.links_statement(rows)`` e
+    ``facet_results`` as linhas de cada consulta de ``listing.facets``.
+    """
+    serializer = listing.serializer
+    page = rows[:listing.limit] if listing.paginate else rows
+    items, platforms = serializer.serialize(page, link_rows)
+    
+    if not listing.paginate and not serializer.normalized and not listing.facets:
+        return items
+    payload = {'items': items}
+    if listing.paginate:
+        payload['next_cursor'] = encode_cursor(page[-1]) if len(rows) > listing.limit else None
+    if serializer.normalized:
+        payload['platforms'] = serializer.platform_list(platforms)
+    if listing.facets:
+        payload['facets'] = facets_payload(facet_results or {})
+    return payload
+
+def build_batch(ids, statement, serializer):
+    """Consulta única (IN) dos conteúdos de ``ids``, inclusive os inativos"""
+    return serializer.select(statement).filter(Content.id.in_(ids))
+
+def batch_payload(rows, ids, serializer, link_rows=()):
+    """Itens na ordem de ``ids`` e a lista dos ids que não existem"""
+    items, platforms = serializer.serialize(rows, link_rows)
+    by_id = {item['id']: item for item in items}
+    payload = {
+        'items': [by_id[content_id] for content_id in ids if content_id in by_id],
+        'missing': [content_id for content_id in ids if content_id not in by_id]
+    }
+    if serializer.normalized:
+        payload['platforms'] = serializer.platform_list(platforms)
+    return payload
+
+def parse_change_token(raw):
+    """``since`` de /content/changes (ausente = desde o início)"""
+    if not raw:
+        return 0
+    if not raw.isdigit():
+        raise ValueError('since deve ser o token next de /api/content/changes')
+    return int(raw)
+
+def changes_payload(page, since, has_more, serializer, show_inactive=False):
+    """Monta a resposta de /content/changes a partir das linhas do registro
+
+    Conteúdos alterados vêm em ``items`` (como nas listagens); excluídos, e
+    com ``show_inactive`` falso também os desativados, vêm em ``deleted``.
+    Plataformas vêm à parte, em ``streamings``/``deleted_streamings``.
+    """
+    upserted = [entity_id for _, entity, entity_id, deleted in page if entity == CONTENT and not deleted]
+    statement = build_batch(upserted, Content.query, serializer)
+    if not show_inactive:
+        statement = statement.filter(Content.is_active == True)
+    rows, links = fetch_rows(statement, serializer) if upserted else ([], [])
+    items, platforms = serializer.serialize(rows, links)
+    by_id = {item['id']: item for item in items}
+
+    streaming_ids = [entity_id for _, entity, entity_id, deleted in page if entity == STREAMING and not deleted]
+    streamings = {streaming.id: streaming.to_dict(serializer.thumbnails)
+                  for streaming in StreamingPlatform.query.filter(StreamingPlatform.id.in_(streaming_ids))}
+
+    payload = {'items': [], 'deleted': [], 'streamings': [], 'deleted_streamings': []}
+    for _, entity, entity_id, deleted in page:
+        found = (by_id if entity == CONTENT else streamings).get(entity_id)
+        if found is None:
+            payload['deleted' if entity == CONTENT else 'deleted_streamings'].append(entity_id)
+        else:
+            payload['items' if entity == CONTENT else 'streamings'].append(found)
+    if serializer.normalized:
+        payload['platforms'] = serializer.platform_list(platforms)
+    payload['next'] = str(page[-1][0] if page else since)
+    payload['has_more'] = has_more
+    return payload
+
+def fetch_rows(statement, serializer):
+    """Executa a consulta de colunas e a dos vínculos: (linhas, vínculos)"""
+    rows = statement.all()
+    links = serializer.links_statement(rows)
+    return rows, db.session.execute(links).all() if links is not None else []
+
+def stream_content(query, serializer, ndjson):
+    """Gera a listagem em blocos, lendo o banco em lotes de STREAM_BATCH_SIZE
+
+    Produz JSON Lines ou um array JSON, conforme ``ndjson``; a memória fica
+    limitada a um lote (e seus vínculos), independente do tamanho do catálogo.
+    """
+    dumps = current_app.json.dumps
+    rows = iter(query.yield_per(STREAM_BATCH_SIZE))
+    first = True
+    
+    if not ndjson:
+        yield '['
+    while batch := list(islice(rows, STREAM_BATCH_SIZE)):
+        links = serializer.links_statement(batch)
+        items, _ = serializer.serialize(batch, db.session.execute(links).all() if links is not None else ())
+        if ndjson:
+            yield ''.join(dumps(item) + '\n' for item in items)
+        else:
+            encoded = ','.join(dumps(item) for item in items)
+            yield encoded if first else ',' + encoded
+        first = False
+    if not ndjson:
+        yield ']'
+
 @content_bp.route('/content', methods=['GET'])
+@read_only
+@conditional_get
+@cached_response
 def get_content():
     try:
-        # Parâmetros de filtro
-        content_type = request.args.get('type')
-        streaming_ids = request.args.getlist('streaming_ids')
-        genre = request.args.get('genre')
-        search = request.args.get('search')
-        show_inactive = request.args.get('show_inactive', 'false').lower() == 'true'
+        # Multi-get: ?ids=1,2,3 ignora os demais filtros (só ``fields`` vale)
+        if 'ids' in request.args:
+            try:
+                ids = parse_ids(request.args['ids'])
+                serializer = ContentSerializer(parse_fields(request.args.get('fields')),
+                                               parse_shape(request.args.get('shape')),
+                                               wants_thumbnails(request.args))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            rows, links = fetch_rows(build_batch(ids, Content.query, serializer), serializer)
+            return jsonify(batch_payload(rows, ids, serializer, links))
         
-        # Query base
-        query = Content.query
+        # Modo streaming: Accept: application/x-ndjson ou ?stream=true (array JSON)
+        ndjson = wants_ndjson()
+        try:
+            listing = build_listing(request.args, Content.query, ndjson)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Filtrar por status ativo (padrão: mostrar apenas ativos)
-        if not show_inactive:
-            query = query.filter(Content.is_active == True)
-        
-        # Aplicar filtros
-        if content_type:
-            query = query.filter(Content.type == content_type)
-        
-        if genre:
-            query = query.filter(Content.genre.ilike(f'%{genre}%'))
-        
-        if search:
-            query = query.filter(Content.title.ilike(f'%{search}%'))
-        
-        if streaming_ids:
-            # Filtrar por streamings específicos
-            streaming_ids = [int(sid) for sid in streaming_ids if sid.isdigit()]
-            query = query.join(ContentStreaming).filter(
-                and_(
-                    ContentStreaming.streaming_id.in_(streaming_ids),
-                    ContentStreaming.available == True
-                )
-            ).distinct()
-        
-        # Ordenar por título
-        content_list = query.order_by(Content.title).all()
+        if listing.stream:
+            mimetype = NDJSON_MIMETYPE if ndjson else 'application/json'
+            return Response(
+                stream_with_context(stream_content(listing.statement, listing.serializer, ndjson)),
+                mimetype=mimetype
+            )
         
-        return jsonify([content.to_dict() for content in content_list])
+        rows, links = fetch_rows(listing.statement, listing.serializer)
+        facet_results = {facet: db.session.execute(statement).all() for facet, statement in listing.facets.items()}
+        return jsonify(listing_payload(rows, listing, links, facet_results))
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -73,31 +428,185 @@ def create_content():
         )
         
         db.session.add(content)
-        db.session.commit()
+        db.session.flush()
         
-        # Associar streamings se fornecidos
-        streaming_ids = data.get('streaming_ids', [])
-        for streaming_id in streaming_ids:
-            content_streaming = ContentStreaming(
-                content_id=content.id,
-                streaming_id=streaming_id,
-                available=True
-            )
-            db.session.add(content_streaming)
+        # Associar streamings se fornecidos (mesma transação do conteúdo)
+        sync_streaming_links({content.id: set(data.get('streaming_ids') or [])})
         
+        apply_stat_delta([], content_stat_keys(content))
+        index_content(content)
+        bump_catalog_version(contents=[content.id])
         db.session.commit()
         
-        return jsonify(content.to_dict()), 201
+        return jsonify(reload_content(content.id).to_dict()), 201
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@content_bp.route('/content/batch', methods=['POST'])
+@read_only
+def get_content_batch():
+    """Multi-get para listas de ids longas demais para a URL
+
+    Corpo: ``{"ids": [1, 2, 3], "fields": "title,year", "shape": "normalized"}``;
+    a resposta é a mesma de ``GET /api/content?ids=``.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        fields = data.get('fields')
+        if isinstance(fields, list):
+            fields = ','.join(map(str, fields))
+        try:
+            ids = parse_ids(data.get('ids'))
+            serializer = ContentSerializer(parse_fields(fields), parse_shape(data.get('shape')), wants_thumbnails(data))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        rows, links = fetch_rows(build_batch(ids, Content.query, serializer), serializer)
+        return jsonify(batch_payload(rows, ids, serializer, links))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@content_bp.route('/content/import', methods=['POST'])
+@admin_required
+def import_content():
+    """Importação em lote (JSON Lines ou CSV) com upsert por title+year+type
+
+    Aceita o arquivo como multipart (campo ``file``) ou no corpo da
+    requisição. ``partial=true`` grava as linhas válidas mesmo havendo erros
+    e ``dry_run=true`` apenas valida.
+    """
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            raw = upload.read()
+            fmt = request.args.get('format') or detect_format(upload.filename, upload.mimetype)
+        else:
+            raw = request.get_data()
+            fmt = request.args.get('format') or detect_format(mimetype=request.mimetype)
+        
+        if fmt not in FORMATS:
+            return jsonify({'error': 'Formato deve ser jsonl ou csv'}), 400
+        if not raw:
+            return jsonify({'error': 'Arquivo vazio'}), 400
+        
+        stream = io.StringIO(raw.decode('utf-8-sig'), newline='')
+        report = import_catalog(
+            read_records(stream, fmt),
+            partial=request.args.get('partial', 'false').lower() == 'true',
+            dry_run=request.args.get('dry_run', 'false').lower() == 'true'
+        )
+        
+        status = 400 if report['errors'] and not report['imported'] else 200
+        return jsonify(report), status
+    
+    except UnicodeDecodeError:
+        return jsonify({'error': 'Arquivo deve estar em UTF-8'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@content_bp.route('/content/availability', methods=['GET'])
+@admin_required
+@read_only
+def get_availability_backlog():
+    """Fila do sincronizador: vínculos vencidos por plataforma"""
+    try:
+        max_age = timedelta(hours=current_app.config.get('AVAILABILITY_MAX_AGE_HOURS', 24))
+        return jsonify(availability_backlog(max_age))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@content_bp.route('/content/availability', methods=['PATCH'])
+@admin_required
+def update_availability():
+    """Define a disponibilidade de muitos pares conteúdo/plataforma de uma vez
+
+    Corpo: ``{"changes": [{"content_id": 1, "streaming_id": 2, "available": false}, ...]}``.
+    Tudo é aplicado em uma única transação; com algum erro nada é gravado.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        changes = data.get('changes')
+        if not isinstance(changes, list):
+            return jsonify({'error': 'changes deve ser uma lista'}), 400
+        
+        report = apply_availability(changes)
+        return jsonify(report), 200 if report['applied'] else 400
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@content_bp.route('/content/export', methods=['GET'])
+@admin_required
+@read_only
+def export_content():
+    """Exporta o catálogo completo em streaming (JSON Lines ou CSV)"""
+    fmt = request.args.get('format', 'jsonl')
+    if fmt not in FORMATS:
+        return jsonify({'error': 'Formato deve ser jsonl ou csv'}), 400
+    
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(stream_with_context(export_catalog(fmt)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=catalogo.{fmt}'
+    return response
+
+@content_bp.route('/content/changes', methods=['GET'])
+@read_only
+@conditional_get
+@cached_response
+def get_content_changes():
+    """Sincronização incremental: o que mudou desde o token ``since``
+
+    Sem ``since`` devolve o catálogo inteiro; cada resposta traz o token
+    ``next`` para a próxima chamada e ``has_more`` enquanto houver páginas.
+    Aceita ``fields``, ``shape`` e ``show_inactive`` como a listagem.
+    """
+    try:
+        try:
+            since = parse_change_token(request.args.get('since'))
+            limit = request.args.get('limit', str(DEFAULT_CHANGES_PAGE))
+            limit = int(limit) if limit.isdigit() else 0
+            if limit < 1:
+                raise ValueError('limit deve ser um inteiro maior que zero')
+            limit = min(limit, MAX_CHANGES_PAGE)
+            serializer = ContentSerializer(parse_fields(request.args.get('fields')),
+                                           parse_shape(request.args.get('shape')),
+                                           wants_thumbnails(request.args))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        changes = db.session.query(
+            CatalogChange.id, CatalogChange.entity, CatalogChange.entity_id, CatalogChange.deleted
+        ).filter(CatalogChange.id > since).order_by(CatalogChange.id).limit(limit + 1).all()
+        if not changes and since > latest_change_id():
+            # Token de outro banco (ou de antes de uma restauração)
+            return jsonify({'error': 'Token desconhecido: refaça a sincronização completa'}), 410
+        
+        show_inactive = request.args.get('show_inactive', 'false').lower() == 'true'
+        return jsonify(changes_payload(changes[:limit], since, len(changes) > limit, serializer, show_inactive))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @content_bp.route('/content/<int:content_id>', methods=['GET'])
+@read_only
+@conditional_get
+@cached_response
 def get_content_by_id(content_id):
+    """Um conteúdo; ``?include=similar`` traz os títulos parecidos já calculados"""
     try:
-        content = Content.query.get_or_404(content_id)
-        return jsonify(content.to_dict())
+        try:
+            include = parse_include(request.args.get('include'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        content = Content.query.options(Content.eager_streamings()).get_or_404(content_id)
+        similar_rows = db.session.execute(similar_statement(content_id)).all() if 'similar' in include else ()
+        return jsonify(content_detail(content, include, wants_thumbnails(request.args), similar_rows))
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -108,6 +617,7 @@ def update_content(content_id):
     try:
         content = Content.query.get_or_404(content_id)
         data = request.get_json()
+        stat_keys = content_stat_keys(content)
         
         # Atualizar campos
         if 'title' in data:
@@ -121,23 +631,18 @@ def update_content(content_id):
         if 'poster_url' in data:
             content.poster_url = data['poster_url']
         
-        # Atualizar streamings se fornecidos
+        # Atualizar streamings se fornecidos: só os vínculos adicionados ou
+        # removidos são gravados, os demais mantêm available/last_checked
         if 'streaming_ids' in data:
-            # Remover associações existentes
-            ContentStreaming.query.filter_by(content_id=content_id).delete()
-            
-            # Adicionar novas associações
-            for streaming_id in data['streaming_ids']:
-                content_streaming = ContentStreaming(
-                    content_id=content_id,
-                    streaming_id=streaming_id,
-                    available=True
-                )
-                db.session.add(content_streaming)
+            sync_streaming_links({content_id: set(data['streaming_ids'] or [])})
         
+        db.session.flush()
+        apply_stat_delta(stat_keys, content_stat_keys(content))
+        index_content(content)
+        bump_catalog_version(contents=[content_id])
         db.session.commit()
         
-        return jsonify(content.to_dict())
+        return jsonify(reload_content(content_id).to_dict())
     
     except Exception as e:
         db.session.rollback()
@@ -148,7 +653,10 @@ def update_content(content_id):
 def delete_content(content_id):
     try:
         content = Content.query.get_or_404(content_id)
+        apply_stat_delta(content_stat_keys(content), [])
+        unindex_content(content.id)
         db.session.delete(content)
+        bump_catalog_version(deleted_contents=[content_id])
         db.session.commit()
         
         return jsonify({'message': 'Conteúdo removido com sucesso'})
@@ -162,7 +670,11 @@ def delete_content(content_id):
 def toggle_content_active(content_id):
     try:
         content = Content.query.get_or_404(content_id)
+        stat_keys = content_stat_keys(content)
         content.is_active = not content.is_active
+        db.session.flush()
+        apply_stat_delta(stat_keys, content_stat_keys(content))
+        bump_catalog_version(contents=[content_id])
         db.session.commit()
         
         status = 'ativado' if content.is_active else 'desativado'
@@ -176,43 +688,14 @@ def toggle_content_active(content_id):
         return jsonify({'error': str(e)}), 500
 
 @content_bp.route('/content/stats', methods=['GET'])
+@read_only
+@conditional_get
+@cached_response
 def get_stats():
     try:
-        # Contar apenas conteúdos ativos
-        total_content = Content.query.filter_by(is_active=True).count()
-        movies = Content.query.filter_by(type='movie', is_active=True).count()
-        series = Content.query.filter_by(type='series', is_active=True).count()
-        animes = Content.query.filter_by(type='anime', is_active=True).count()
-        
-        # Contar inativos
-        total_inactive = Content.query.filter_by(is_active=False).count()
-        
-        # Estatísticas por streaming
-        streaming_stats = []
-        streamings = StreamingPlatform.query.filter_by(active=True).all()
-        
-        for streaming in streamings:
-            count = db.session.query(ContentStreaming).join(Content).filter(
-                ContentStreaming.streaming_id == streaming.id,
-                ContentStreaming.available == True,
-                Content.is_active == True
-            ).count()
-            
-            streaming_stats.append({
-                'streaming': streaming.to_dict(),
-                'count': count
-            })
-        
-        return jsonify({
-            'total_content': total_content,
-            'total_inactive': total_inactive,
-            'by_type': {
-                'movies': movies,
-                'series': series,
-                'animes': animes
-            },
-            'by_streaming': streaming_stats
-        })
+        # Contadores vêm de duas consultas agrupadas ou da tabela materializada
+        counters = load_counters(materialized=current_app.config.get('STATS_MATERIALIZED', False))
+        return jsonify(build_stats_payload(counters))
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,69 @@
+import io
+from flask import Blueprint, current_app, jsonify, redirect, request, send_file
+from src.models.content import Content, StreamingPlatform, db
+from src.models.db import read_only
+from src.models.images import FORMATS, source_digest, thumbnail_urls
+
+images_bp = Blueprint('images', __name__)
+
+# Coluna com a URL de origem de cada tipo de imagem
+SOURCES = {'content': Content.poster_url, 'streaming': StreamingPlatform.logo_url}
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+def negotiate_format():
+    """``?format=`` ou WebP quando o Accept o cita explicitamente (JPEG nos demais)"""
+    fmt = request.args.get('format')
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError('format deve ser webp ou jpeg')
+        return fmt
+    accepted = any(mimetype == FORMATS['webp'] and quality > 0 for mimetype, quality in request.accept_mimetypes)
+    return 'webp' if accepted else 'jpeg'
+
+@images_bp.route('/images/<kind>/<int:entity_id>/<digest>', methods=['GET'])
+@read_only
+def get_image(kind, entity_id, digest):
+    """Miniatura local do pôster de um conteúdo ou do logo de uma plataforma
+
+    A URL inclui um hash da URL de origem, então pode ser cacheada como
+    imutável: quando o pôster muda, ``to_dict`` passa a apontar para outra
+    URL e a antiga redireciona para a atual.
+    """
+    try:
+        if kind not in SOURCES:
+            return jsonify({'error': 'Tipo de imagem deve ser content ou streaming'}), 404
+        service = current_app.extensions['images']
+        try:
+            width = int(request.args.get('w', service.widths[0]))
+            if width not in service.widths:
+                raise ValueError(f'w deve ser uma das larguras: {", ".join(map(str, service.widths))}')
+            fmt = negotiate_format()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        url = db.session.query(SOURCES[kind]).filter(SOURCES[kind].class_.id == entity_id).scalar()
+        if not url:
+            return jsonify({'error': 'Imagem não encontrada'}), 404
+        if digest != source_digest(url):
+            # Pôster trocado: a URL antiga leva à miniatura atual
+            location = thumbnail_urls(kind, entity_id, url)[str(width)]
+            if 'format' in request.args:
+                location += f'&format={fmt}'
+            response = redirect(location)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        
+        try:
+            data = service.thumbnail(url, width, fmt)
+        except Exception as e:
+            return jsonify({'error': f'Não foi possível obter a imagem: {e}'}), 502
+        
+        response = send_file(io.BytesIO(data), mimetype=FORMATS[fmt], etag=f'{digest}-{width}-{fmt}',
+                             conditional=True, max_age=31536000)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE
+        if 'format' not in request.args:
+            response.vary.add('Accept')
+        return response
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,188 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from flask import Blueprint, current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from src.models.db import db
+from src.routes.caching import response_cache
+
+metrics_bp = Blueprint('metrics', __name__)
+
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Limites superiores (le) de cada histograma
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SQL_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+class Histogram:
+    """Histograma cumulativo no formato do Prometheus (sem dependências)"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        """Gera (le, contagem acumulada), terminando em +Inf"""
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+class RequestMetrics:
+    """Métricas por rota acumuladas neste processo
+
+    Cada worker do gunicorn/uvicorn tem as suas; o Prometheus agrega as
+    séries por instância.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.histograms = {}
+
+    def _histogram(self, name, endpoint, buckets):
+        key = (name, endpoint)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(buckets)
+        return self.histograms[key]
+
+    def observe(self, endpoint, method, status, duration, queries, sql_time, size):
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self._histogram('http_request_duration_seconds', endpoint, LATENCY_BUCKETS).observe(duration)
+            self._histogram('http_request_sql_queries', endpoint, QUERY_COUNT_BUCKETS).observe(queries)
+            self._histogram('http_request_sql_seconds', endpoint, SQL_TIME_BUCKETS).observe(sql_time)
+            if size is not None:
+                self._histogram('http_response_size_bytes', endpoint, SIZE_BUCKETS).observe(size)
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.histograms.clear()
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (0.0.4)"""
+        lines = [
+            '# HELP http_requests_total Requisições atendidas por rota, método e status',
+            '# TYPE http_requests_total counter',
+        ]
+        with self._lock:
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+            helps = {
+                'http_request_duration_seconds': 'Latência das requisições',
+                'http_request_sql_queries': 'Consultas SQL por requisição',
+                'http_request_sql_seconds': 'Tempo total em SQL por requisição',
+                'http_response_size_bytes': 'Tamanho do corpo das respostas (exceto streaming)',
+            }
+            for name, description in helps.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for (histogram_name, endpoint), histogram in sorted(self.histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    for bound, total in histogram.samples():
+                        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {total}')
+                    lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{endpoint="{endpoint}"}} {histogram.count}')
+
+        cache = response_cache.stats()
+        for name, kind, value in (
+            ('response_cache_hits_total', 'counter', cache['hits']),
+            ('response_cache_misses_total', 'counter', cache['misses']),
+            ('response_cache_evictions_total', 'counter', cache['evictions']),
+            ('response_cache_entries', 'gauge', cache['entries']),
+            ('response_cache_bytes', 'gauge', cache['bytes']),
+            ('response_cache_hit_ratio', 'gauge', round(cache['hit_rate'], 6)),
+        ):
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+request_metrics = RequestMetrics()
+
+def instrument_engine(engine):
+    """Registra cada consulta (SQL e duração) em ``g.sql_queries`` da requisição"""
+    # O início fica no contexto da execução, e não na conexão do pool: uma
+    # consulta que falha não chega ao after_cursor_execute e não deixa sobras
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_metrics_started', None)
+        if started is not None and has_request_context() and 'sql_queries' in g:
+            g.sql_queries.append((statement, time.perf_counter() - started))
+
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.sql_queries = []
+
+def record_request_metrics(response):
+    if 'metrics_started' not in g:
+        return response
+    duration = time.perf_counter() - g.metrics_started
+    queries = g.sql_queries
+    sql_time = sum(elapsed for _, elapsed in queries)
+    endpoint = request.endpoint or 'unmatched'
+    size = None if response.is_streamed else response.calculate_content_length()
+    request_metrics.observe(endpoint, request.method, response.status_code, duration, len(queries), sql_time, size)
+
+    slow_ms = current_app.config.get('SLOW_REQUEST_MS', 0)
+    if slow_ms and duration * 1000 >= slow_ms:
+        current_app.logger.warning(
+            'Requisição lenta: %s %s -> %s em %.1f ms (%d consultas, %.1f ms em SQL)%s',
+            request.method, request.full_path.rstrip('?'), response.status_code, duration * 1000,
+            len(queries), sql_time * 1000,
+            ''.join(f'\n  {elapsed * 1000:8.2f} ms  {" ".join(statement.split())}' for statement, elapsed in queries)
+        )
+    return response
+
+def init_metrics(app):
+    """Instrumenta requisições e engines (habilitado por METRICS_ENABLED)"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.before_request(start_request_metrics)
+    app.after_request(record_request_metrics)
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+def metrics_token_required(f):
+    """Protege as rotas de métricas com ``Authorization: Bearer <METRICS_TOKEN>``
+
+    Sem METRICS_TOKEN configurado as rotas respondem 404: latências por rota
+    e consultas lentas não ficam públicas por padrão.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        expected = current_app.config.get('METRICS_TOKEN')
+        if not expected:
+            return jsonify({'error': 'Métricas desabilitadas (configure METRICS_TOKEN)'}), 404
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme != 'Bearer' or not hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8')):
+            response = jsonify({'error': 'Token de métricas inválido'})
+            response.status_code = 401
+            response.headers['WWW-Authenticate'] = 'Bearer'
+            return response
+        return f(*args, **kwargs)
+    return decorated_function
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@metrics_token_required
+def get_metrics():
+    return current_app.response_class(request_metrics.render(), content_type=PROMETHEUS_MIMETYPE)
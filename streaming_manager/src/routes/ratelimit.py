@@ -0,0 +1,158 @@
+import importlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, jsonify, request
+
+class RateLimitBackend(ABC):
+    """Interface dos armazenamentos de token buckets
+
+    ``consume`` tira ``cost`` fichas do bucket ``key`` (que recebe ``rate``
+    fichas por segundo, até ``capacity``) e retorna ``(permitido,
+    segundos até haver fichas)``; ``cost`` negativo devolve fichas (sem
+    passar de ``capacity``). Backends compartilhados (ex.: Redis) fazem o
+    limite valer para todos os workers; o padrão em memória vale por processo.
+    """
+
+    @abstractmethod
+    def consume(self, key, rate, capacity, cost=1):
+        ...
+
+class MemoryBackend(RateLimitBackend):
+    """Buckets em memória, no máximo ``max_keys`` (os mais antigos saem primeiro)"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, capacity, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens = min(capacity, tokens - cost)
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+# Token bucket atômico no Redis: estado (fichas, instante) em um hash que
+# expira quando o bucket estaria cheio de novo
+REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+    tokens = math.min(capacity, tokens - cost)
+    allowed = 1
+else
+    retry = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(retry)}
+"""
+
+class RedisBackend(RateLimitBackend):
+    """Buckets compartilhados entre workers e máquinas (requer o pacote ``redis``)
+
+    O relógio é o de cada app; diferenças pequenas entre máquinas só
+    adiantam ou atrasam o reabastecimento.
+    """
+
+    def __init__(self, url, prefix='ratelimit:'):
+        import redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(REDIS_TOKEN_BUCKET)
+
+    def consume(self, key, rate, capacity, cost=1):
+        allowed, retry = self._script(keys=[self.prefix + key], args=[rate, capacity, time.time(), cost])
+        return bool(allowed), float(retry)
+
+def load_backend(spec):
+    """``memory``, ``redis://...`` ou ``pacote.modulo:Classe``"""
+    if not spec or spec == 'memory':
+        return MemoryBackend()
+    if spec.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(spec)
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise ValueError(f'Backend de rate limit desconhecido: {spec}')
+    return getattr(importlib.import_module(module_name), class_name)()
+
+def parse_limit(raw):
+    """Converte ``"10/60"`` (10 requisições a cada 60 s) em (fichas/s, capacidade)"""
+    count, _, seconds = raw.partition('/')
+    count, seconds = int(count), float(seconds or 1)
+    if count < 1 or seconds <= 0:
+        raise ValueError(f'Limite inválido: {raw}')
+    return count / seconds, count
+
+class RateLimiter:
+    """Limites por escopo (``auth``, ``session``, ``admin``) e cliente sobre um backend"""
+
+    def __init__(self, backend, limits):
+        self.backend = backend
+        self.limits = limits
+
+    def check(self, scope, client, cost=1):
+        rate, capacity = self.limits[scope]
+        return self.backend.consume(f'{scope}:{client}', rate, capacity, cost)
+
+def init_rate_limit(app):
+    """Instala o limitador (RATE_LIMIT_ENABLED, RATE_LIMIT_BACKEND, RATE_LIMIT_<ESCOPO>)"""
+    if not app.config.get('RATE_LIMIT_ENABLED', True):
+        return
+    app.extensions['rate_limiter'] = RateLimiter(
+        load_backend(app.config.get('RATE_LIMIT_BACKEND', 'memory')),
+        {
+            'auth': parse_limit(app.config.get('RATE_LIMIT_AUTH', '10/60')),
+            'session': parse_limit(app.config.get('RATE_LIMIT_SESSION', '300/60')),
+            'admin': parse_limit(app.config.get('RATE_LIMIT_ADMIN', '100/10')),
+        }
+    )
+
+def rate_limited(scope, counts=None):
+    """Decorator que responde 429 (com Retry-After) quando o cliente esgota o bucket
+
+    O cliente é o IP da conexão; atrás de um proxy reverso configure o
+    ProxyFix para que ``remote_addr`` seja o IP real. Com ``counts`` (função
+    que recebe a resposta) só as respostas para as quais ela retorna True
+    gastam a ficha; as demais a devolvem (ex.: só logins que falharam).
+    Sem ``init_rate_limit`` não limita nada.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            limiter = current_app.extensions.get('rate_limiter')
+            client = request.remote_addr or 'unknown'
+            if limiter is not None:
+                allowed, retry_after = limiter.check(scope, client)
+                if not allowed:
+                    seconds = max(1, int(retry_after + 0.999))
+                    response = jsonify({'error': f'Muitas requisições. Tente novamente em {seconds} s.'})
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(seconds)
+                    return response
+            if counts is None or limiter is None:
+                return f(*args, **kwargs)
+            response = current_app.make_response(f(*args, **kwargs))
+            if not counts(response):
+                limiter.check(scope, client, cost=-1)
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,163 @@
+from collections import defaultdict
+from datetime import date
+from flask import current_app, has_app_context
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Select, select
+from src.models.content import Content, ContentStreaming, StreamingPlatform
+from src.models.images import thumbnail_urls
+
+try:
+    import orjson
+except ImportError:  # json da stdlib
+    orjson = None
+
+# Formatos das listagens (?shape=): plataformas dentro de cada item ou uma vez só
+SHAPES = ('nested', 'normalized')
+PLATFORM_FIELDS = ('id', 'name', 'logo_url', 'color', 'active')
+
+class CatalogJSONProvider(DefaultJSONProvider):
+    """Provider JSON do Flask com orjson quando instalado
+
+    Sem orjson (ou com JSON_ENCODER=json) usa o ``json`` da stdlib. Nos dois
+    casos datas saem em ISO 8601, como em ``to_dict`` (o padrão do Flask é a
+    data HTTP), então linhas lidas do banco podem ir direto para o encoder.
+    """
+
+    def __init__(self, app, use_orjson=True):
+        super().__init__(app)
+        self.use_orjson = use_orjson and orjson is not None
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def encode(self, obj, indent=False):
+        """Serializa ``obj`` em bytes UTF-8"""
+        if self.use_orjson:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self.default, option=option)
+            except orjson.JSONEncodeError:
+                # Ex.: inteiros acima de 64 bits; a stdlib aceita
+                pass
+        if indent:
+            return super().dumps(obj, indent=2).encode('utf-8')
+        return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs or not self.use_orjson:
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs or not self.use_orjson:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.encode(obj, indent) + b'\n', mimetype=self.mimetype)
+
+def init_serialization(app):
+    """Instala o ``CatalogJSONProvider`` (JSON_ENCODER=orjson ou json)"""
+    app.json = CatalogJSONProvider(app, use_orjson=app.config.get('JSON_ENCODER', 'orjson') == 'orjson')
+
+def encodes_dates():
+    """O provider do app atual serializa datetime em ISO 8601"""
+    return has_app_context() and isinstance(current_app.json, CatalogJSONProvider)
+
+def parse_shape(raw):
+    """``?shape=`` validado; retorna True para o formato normalizado"""
+    shape = raw or 'nested'
+    if shape not in SHAPES:
+        raise ValueError('shape deve ser nested ou normalized')
+    return shape == 'normalized'
+
+def wants_thumbnails(args):
+    """``?thumbnails=true``: incluir as URLs locais das miniaturas"""
+    return str(args.get('thumbnails', 'false')).lower() == 'true'
+
+def with_columns(statement, columns):
+    """Troca a entidade de ``Content.query`` ou ``select(Content)`` pelas colunas"""
+    if isinstance(statement, Select):
+        return statement.with_only_columns(*columns)
+    return statement.with_entities(*columns)
+
+class ContentSerializer:
+    """Monta os dicts de ``Content.to_dict`` a partir de tuplas de colunas
+
+    Não instancia modelos nem chama ``isoformat()`` por linha quando o app
+    usa o ``CatalogJSONProvider``. Os vínculos disponíveis vêm de uma
+    consulta à parte (``links_statement``) com as plataformas no mesmo JOIN;
+    cada plataforma vira um único dict, compartilhado entre os itens ou, com
+    ``normalized``, enviado uma vez em ``platforms`` e referenciado por id.
+    Com ``thumbnails`` os itens com ``poster_url`` ganham ``poster_thumbnails``
+    e as plataformas ``logo_thumbnails``.
+    """
+
+    def __init__(self, fields=None, normalized=False, thumbnails=False):
+        self.names = [field for field in Content.SERIALIZABLE_FIELDS
+                      if field != 'streamings' and (fields is None or field in fields)]
+        # ``title`` é sempre lido para o cursor, mesmo fora de ``fields``
+        self.columns = [getattr(Content, name) for name in self.names]
+        if 'title' not in self.names:
+            self.columns.append(Content.title)
+        self.streamings = fields is None or 'streamings' in fields
+        self.normalized = normalized
+        self.thumbnails = thumbnails
+        self.posters = thumbnails and 'poster_url' in self.names
+        self.iso_dates = [] if encodes_dates() else [name for name in Content.DATE_FIELDS if name in self.names]
+
+    def select(self, statement):
+        return with_columns(statement, self.columns)
+
+    def links_statement(self, rows):
+        """Consulta dos vínculos disponíveis de ``rows`` (None se não precisar)"""
+        if not self.streamings or not rows:
+            return None
+        return select(
+            ContentStreaming.content_id, *(getattr(StreamingPlatform, name) for name in PLATFORM_FIELDS)
+        ).join(
+            StreamingPlatform, StreamingPlatform.id == ContentStreaming.streaming_id
+        ).where(
+            ContentStreaming.content_id.in_([row.id for row in rows]),
+            ContentStreaming.available == True
+        ).order_by(ContentStreaming.content_id, ContentStreaming.streaming_id)
+
+    def serialize(self, rows, link_rows=()):
+        """Retorna (itens, plataformas por id) das linhas de ``select``"""
+        platforms = {}
+        links = defaultdict(list)
+        for content_id, *platform in link_rows:
+            platform_id = platform[0]
+            if platform_id not in platforms:
+                platforms[platform_id] = dict(zip(PLATFORM_FIELDS, platform))
+                if self.thumbnails:
+                    platforms[platform_id]['logo_thumbnails'] = thumbnail_urls(
+                        'streaming', platform_id, platforms[platform_id]['logo_url'])
+            links[content_id].append(platform_id if self.normalized else platforms[platform_id])
+
+        names = self.names
+        items = []
+        for row in rows:
+            item = dict(zip(names, row))
+            for name in self.iso_dates:
+                if item[name] is not None:
+                    item[name] = item[name].isoformat()
+            if self.posters:
+                item['poster_thumbnails'] = thumbnail_urls('content', row.id, item['poster_url'])
+            if self.streamings:
+                item['streamings'] = links.get(row.id, [])
+            items.append(item)
+        return items, platforms
+
+    @staticmethod
+    def platform_list(platforms):
+        return [platforms[platform_id] for platform_id in sorted(platforms)]
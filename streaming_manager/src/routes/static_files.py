@@ -0,0 +1,190 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from collections import namedtuple
+from flask import current_app, request, send_file
+
+try:
+    import brotli
+except ImportError:  # só gzip
+    brotli = None
+
+# Variantes pré-comprimidas, na ordem de preferência
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE = {'.css', '.html', '.ico', '.js', '.json', '.map', '.mjs', '.svg', '.txt', '.webmanifest', '.xml'}
+# Arquivos do build do Vite com hash no nome (assets/index-DvizEnB2.js) nunca mudam de conteúdo
+HASHED_NAME = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+# Caminhos inexistentes que são assets (404) e não rotas do React (index.html):
+# a pasta de assets do build e as extensões de arquivos estáticos
+ASSET_PREFIXES = ('assets/',)
+ASSET_EXTENSIONS = {'.avif', '.css', '.gif', '.ico', '.jpeg', '.jpg', '.js', '.json', '.map', '.mjs', '.png',
+                    '.svg', '.ttf', '.txt', '.webmanifest', '.webp', '.woff', '.woff2', '.xml'}
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+StaticFile = namedtuple('StaticFile', 'path mimetype immutable etag mtime variants')
+
+def is_asset_path(path):
+    """``assets/...`` ou extensão de arquivo estático (``/title/Mr.Robot`` continua rota do React)"""
+    return path.startswith(ASSET_PREFIXES) or os.path.splitext(path)[1].lower() in ASSET_EXTENSIONS
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def available_encodings():
+    return [encoding for encoding, _ in ENCODINGS if encoding != 'br' or brotli is not None]
+
+def compress_static(root, min_size=256):
+    """Grava ``arquivo.br``/``arquivo.gz`` ao lado dos arquivos compressíveis de ``root``
+
+    Variantes que não economizam ao menos 10% são removidas. Retorna
+    ``(caminho, bytes originais, {encoding: bytes})`` de cada arquivo.
+    """
+    report = []
+    for directory, _, names in os.walk(root):
+        for name in sorted(names):
+            filename = os.path.join(directory, name)
+            if os.path.splitext(name)[1] not in COMPRESSIBLE:
+                continue
+            with open(filename, 'rb') as source:
+                data = source.read()
+            sizes = {}
+            for encoding, suffix in ENCODINGS:
+                if encoding not in available_encodings():
+                    continue
+                compressed = compress(data, encoding) if len(data) >= min_size else None
+                if compressed is None or len(compressed) > len(data) * 0.9:
+                    if os.path.exists(filename + suffix):
+                        os.remove(filename + suffix)
+                    continue
+                with open(filename + suffix, 'wb') as target:
+                    target.write(compressed)
+                sizes[encoding] = len(compressed)
+            report.append((os.path.relpath(filename, root), len(data), sizes))
+    return report
+
+class StaticFiles:
+    """Índice em memória do build do frontend, montado uma vez na subida do app
+
+    Cada requisição só consulta o dicionário (sem ``os.path.exists``) e
+    escolhe a variante ``.br``/``.gz`` pelo Accept-Encoding; variantes mais
+    antigas que o arquivo (build novo sem ``compress-static``) são ignoradas.
+    ``index.html`` fica inteiro na memória, comprimido na subida, com ETag do
+    conteúdo; arquivos com hash no nome vão com cache imutável e os demais
+    revalidam pelo ETag. Depois de um novo build é preciso reiniciar o app.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.files = {}
+        self.index = None
+        if root and os.path.isdir(root):
+            self.scan()
+
+    def scan(self):
+        files = {}
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                filename = os.path.join(directory, name)
+                path = os.path.relpath(filename, self.root).replace(os.sep, '/')
+                if any(name.endswith(suffix) and os.path.exists(filename[:-len(suffix)]) for _, suffix in ENCODINGS):
+                    continue
+                stat = os.stat(filename)
+                variants = {encoding: filename + suffix for encoding, suffix in ENCODINGS
+                            if self.fresh_variant(filename + suffix, stat)}
+                files[path] = StaticFile(
+                    filename, mimetypes.guess_type(name)[0] or 'application/octet-stream',
+                    bool(HASHED_NAME.match(path)), f'{stat.st_mtime_ns:x}-{stat.st_size:x}', stat.st_mtime, variants
+                )
+        self.files = files
+        self.index = self.load_index(files.get('index.html'))
+
+    @staticmethod
+    def fresh_variant(filename, source_stat):
+        """A variante existe e não é mais antiga que o arquivo original"""
+        try:
+            return os.stat(filename).st_mtime_ns >= source_stat.st_mtime_ns
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def load_index(entry):
+        """(ETag, {encoding: corpo}) do index.html, sempre comprimido a partir dele
+
+        Não usa os ``.br``/``.gz`` do disco: um index.html comprimido de um
+        build anterior apontaria para bundles que já não existem.
+        """
+        if entry is None:
+            return None
+        with open(entry.path, 'rb') as source:
+            body = source.read()
+        bodies = {None: body}
+        for encoding in available_encodings():
+            bodies[encoding] = compress(body, encoding)
+        return hashlib.sha256(body).hexdigest()[:32], bodies
+
+    @staticmethod
+    def negotiate(encodings):
+        """Melhor encoding aceito pelo cliente entre ``encodings`` (None = sem compressão)"""
+        accepted = request.accept_encodings
+        for encoding, _ in ENCODINGS:
+            if encoding in encodings and accepted[encoding] > 0:
+                return encoding
+        return None
+
+    def serve(self, path):
+        entry = self.files.get(path) if path else None
+        if entry is None or path == 'index.html':
+            # Rotas do React caem no index.html; asset inexistente é 404
+            if path and path != 'index.html' and is_asset_path(path):
+                return 'Not found', 404
+            return self.serve_index()
+
+        encoding = self.negotiate(entry.variants)
+        response = send_file(
+            entry.variants[encoding] if encoding else entry.path, mimetype=entry.mimetype,
+            etag=f'{entry.etag}-{encoding}' if encoding else entry.etag,
+            last_modified=entry.mtime, conditional=True
+        )
+        return self.finish(response, encoding, bool(entry.variants),
+                           IMMUTABLE_CACHE if entry.immutable else REVALIDATE_CACHE)
+
+    def serve_index(self):
+        if self.index is None:
+            return 'index.html not found', 404
+        etag, bodies = self.index
+        encoding = self.negotiate(bodies)
+        etag = f'{etag}-{encoding}' if encoding else etag
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(bodies[encoding], mimetype='text/html')
+        response.set_etag(etag)
+        return self.finish(response, encoding, True, REVALIDATE_CACHE)
+
+    @staticmethod
+    def finish(response, encoding, varies, cache_control):
+        if encoding and response.status_code in (200, 206):
+            response.headers['Content-Encoding'] = encoding
+        if varies:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = cache_control
+        return response
+
+def init_static_files(app):
+    """Indexa ``app.static_folder`` e registra a rota do frontend (``/`` e ``/<path>``)"""
+    static_files = StaticFiles(app.static_folder)
+    app.extensions['static_files'] = static_files
+
+    def serve(path):
+        if app.static_folder is None:
+            return 'Static folder not configured', 404
+        return static_files.serve(path)
+
+    app.add_url_rule('/', 'serve', serve, defaults={'path': ''})
+    app.add_url_rule('/<path:path>', 'serve', serve)
+    return static_files
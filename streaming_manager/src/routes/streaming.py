@@ -1,21 +1,30 @@
 from flask import Blueprint, request, jsonify
-from src.models.content import StreamingPlatform, db
+from src.models.catalog import bump_catalog_version
+from src.models.content import ContentStreaming, StreamingPlatform, db
+from src.models.db import read_only
+from src.models.stats import forget_streaming
 from src.routes.auth import admin_required
+from src.routes.caching import cached_response, conditional_get
+from src.routes.serialization import wants_thumbnails
 
 streaming_bp = Blueprint('streaming', __name__)
 
+def build_streaming_list(args, statement):
+    """Monta a listagem de plataformas sobre ``StreamingPlatform.query`` ou ``select()``"""
+    active_only = args.get('active_only', 'true').lower() == 'true'
+    if active_only:
+        statement = statement.filter(StreamingPlatform.active == True)
+    return statement.order_by(StreamingPlatform.name)
+
 @streaming_bp.route('/streamings', methods=['GET'])
+@read_only
+@conditional_get
+@cached_response
 def get_streamings():
     try:
-        active_only = request.args.get('active_only', 'true').lower() == 'true'
-        
-        query = StreamingPlatform.query
-        if active_only:
-            query = query.filter_by(active=True)
-        
-        streamings = query.order_by(StreamingPlatform.name).all()
+        streamings = build_streaming_list(request.args, StreamingPlatform.query).all()
         
-        return jsonify([streaming.to_dict() for streaming in streamings])
+        return jsonify([streaming.to_dict(wants_thumbnails(request.args)) for streaming in streamings])
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -44,6 +53,8 @@ def create_streaming():
         )
         
         db.session.add(streaming)
+        db.session.flush()
+        bump_catalog_version(streamings=[streaming.id])
         db.session.commit()
         
         return jsonify(streaming.to_dict()), 201
@@ -69,6 +80,7 @@ def update_streaming(streaming_id):
         if 'active' in data:
             streaming.active = data['active']
         
+        bump_catalog_version(streamings=[streaming_id])
         db.session.commit()
         
         return jsonify(streaming.to_dict())
@@ -82,7 +94,13 @@ def update_streaming(streaming_id):
 def delete_streaming(streaming_id):
     try:
         streaming = StreamingPlatform.query.get_or_404(streaming_id)
+        # Os conteúdos que exibiam a plataforma também mudam (perdem o vínculo)
+        content_ids = [content_id for (content_id,) in db.session.query(ContentStreaming.content_id).filter_by(
+            streaming_id=streaming_id, available=True
+        )]
         db.session.delete(streaming)
+        forget_streaming(streaming_id)
+        bump_catalog_version(contents=content_ids, deleted_streamings=[streaming_id])
         db.session.commit()
         
         return jsonify({'message': 'Streaming removido com sucesso'})
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import create_app
+from src.models.migrations import upgrade_schema
+
+@pytest.fixture
+def app(tmp_path):
+    """App de testes (SQLite em memória) com o schema na última versão
+
+    Cada requisição do ``test_client`` roda no próprio contexto, como em
+    produção; código fora das rotas abre ``app.app_context()``.
+    """
+    app = create_app('testing', {'IMAGE_CACHE_DIR': str(tmp_path / 'images')})
+    with app.app_context():
+        upgrade_schema()
+    return app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def admin_headers(app):
+    from flask_jwt_extended import create_access_token
+    from src.routes.auth import ADMIN_USERNAME
+
+    with app.app_context():
+        token = create_access_token(identity=ADMIN_USERNAME)
+    return {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,61 @@
+import pytest
+
+from src.routes.auth import ADMIN_PASSWORD, ADMIN_USERNAME
+
+@pytest.fixture
+def limited_client(app):
+    from src.routes.ratelimit import init_rate_limit
+
+    app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMIT_AUTH='3/60', RATE_LIMIT_SESSION='300/60')
+    init_rate_limit(app)
+    return app.test_client()
+
+def login(client, password):
+    return client.post('/api/auth/login', json={'username': ADMIN_USERNAME, 'password': password})
+
+def test_only_failed_logins_use_the_login_bucket(limited_client):
+    for _ in range(5):
+        assert login(limited_client, ADMIN_PASSWORD).status_code == 200
+    for _ in range(3):
+        assert login(limited_client, 'errada').status_code == 401
+    response = login(limited_client, 'errada')
+    assert response.status_code == 429
+    assert 'Retry-After' in response.headers
+
+def test_verify_does_not_share_the_login_bucket(limited_client, admin_headers):
+    for _ in range(3):
+        login(limited_client, 'errada')
+    for _ in range(20):
+        assert limited_client.get('/api/auth/verify', headers=admin_headers).status_code == 200
+
+def test_admin_routes_reuse_decoded_tokens(app, client, admin_headers):
+    cache = app.extensions['jwt_token_cache']
+    for _ in range(3):
+        response = client.post('/api/content', json={'title': 'Novo', 'type': 'movie'}, headers=admin_headers)
+        assert response.status_code == 201
+    assert (cache.misses, cache.hits) == (1, 2)
+
+def test_admin_routes_reject_missing_and_invalid_tokens(app, client):
+    payload = {'title': 'Novo', 'type': 'movie'}
+    assert client.post('/api/content', json=payload).status_code == 401
+    response = client.post('/api/content', json=payload, headers={'Authorization': 'Bearer invalido'})
+    assert response.status_code == 422
+
+def test_admin_routes_reject_other_identities(app, client):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity='visitante')
+    response = client.post('/api/content', json={'title': 'Novo', 'type': 'movie'},
+                           headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 403
+
+def test_admin_routes_reject_expired_tokens(app, client):
+    from datetime import timedelta
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity=ADMIN_USERNAME, expires_delta=timedelta(seconds=-1))
+    response = client.post('/api/content', json={'title': 'Novo', 'type': 'movie'},
+                           headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 401
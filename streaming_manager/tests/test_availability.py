@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.config import ProductionConfig, TestingConfig
+from src.init_data import init_streaming_platforms
+from src.models.availability import AvailabilityProvider, AvailabilitySync, FakeProvider, stale_links, sync_from_config
+from src.models.content import Content, ContentStreaming, db
+
+def test_sync_requires_a_configured_provider():
+    assert ProductionConfig.AVAILABILITY_PROVIDER is None
+    with pytest.raises(ValueError, match='AVAILABILITY_PROVIDER'):
+        sync_from_config({'AVAILABILITY_PROVIDER': None})
+
+def test_testing_config_uses_fake_provider():
+    sync = sync_from_config({'AVAILABILITY_PROVIDER': TestingConfig.AVAILABILITY_PROVIDER})
+    assert isinstance(sync.provider, FakeProvider)
+
+class FailingProvider(AvailabilityProvider):
+    """Falha sempre na plataforma ``failing``; as demais ficam disponíveis"""
+
+    def __init__(self, failing):
+        self.failing = failing
+
+    def check(self, link):
+        if link.streaming_id == self.failing:
+            raise RuntimeError('API fora do ar')
+        return True
+
+def test_failed_checks_rotate_to_the_back_of_the_queue(app):
+    with app.app_context():
+        init_streaming_platforms()
+        long_ago = datetime.utcnow() - timedelta(days=30)
+        for number in range(4):
+            content = Content(title=f'Título {number}', type='movie')
+            db.session.add(content)
+            db.session.flush()
+            for streaming_id in (1, 2):
+                # Os vínculos da plataforma 1 são os mais antigos da fila
+                checked = long_ago - timedelta(days=1) if streaming_id == 1 else long_ago
+                db.session.add(ContentStreaming(content_id=content.id, streaming_id=streaming_id,
+                                                last_checked=checked))
+        db.session.commit()
+
+        sync = AvailabilitySync(FailingProvider(failing=1), concurrency=2, batch_size=4)
+        report = sync.run_once(limit=4)
+        assert report['failed'] == 4 and report['checked'] == 0
+
+        links = stale_links(10)
+        assert {link.streaming_id for link in links} == {2}
+        report = sync.run_once(limit=4)
+        assert report['checked'] == 4
+        assert stale_links(10) == []
+        assert ContentStreaming.query.filter(ContentStreaming.retry_after != None).count() == 4
+
+class TimedProvider(AvailabilityProvider):
+    """Anota quando cada plataforma foi consultada"""
+
+    def __init__(self):
+        self.calls = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def check(self, link):
+        with self._lock:
+            self.calls[link.streaming_id].append(time.monotonic())
+        return True
+
+def test_slow_platform_does_not_hold_back_the_others(app):
+    with app.app_context():
+        init_streaming_platforms()
+        long_ago = datetime.utcnow() - timedelta(days=30)
+        for number in range(40):
+            content = Content(title=f'Título {number}', type='movie')
+            db.session.add(content)
+            db.session.flush()
+            for streaming_id in ((1, 2) if number < 4 else (2,)):
+                db.session.add(ContentStreaming(content_id=content.id, streaming_id=streaming_id,
+                                                last_checked=long_ago))
+        db.session.commit()
+
+        provider = TimedProvider()
+        # Plataforma 1: 2 req/s com rajada de 2 (as 4 consultas levam 1 s); plataforma 2: 1000 req/s
+        sync = AvailabilitySync(provider, concurrency=2, batch_size=100, rate_limits={1: 2, 2: 1000})
+        started = time.monotonic()
+        report = sync.run_once(limit=100)
+
+        assert report['checked'] == 44
+        assert max(provider.calls[1]) - started >= 0.9
+        assert max(provider.calls[2]) - started < 0.3
@@ -0,0 +1,88 @@
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from src.init_data import init_streaming_platforms
+from src.models.bulk import export_catalog, import_catalog, read_records
+from src.models.content import Content, ContentStreaming, db
+
+CHECKED = datetime(2024, 1, 2, 3, 4, 5)
+
+def seed_links(app):
+    """Dois conteúdos; o vínculo (primeiro, plataforma 1) está indisponível"""
+    with app.app_context():
+        init_streaming_platforms()
+        first = Content(title='Primeiro', year=2001, type='movie', genre='Drama')
+        second = Content(title='Segundo', year=2002, type='series', genre='Comédia')
+        db.session.add_all([first, second])
+        db.session.flush()
+        db.session.add_all([
+            ContentStreaming(content_id=first.id, streaming_id=1, available=False, last_checked=CHECKED),
+            ContentStreaming(content_id=first.id, streaming_id=2, last_checked=CHECKED),
+            ContentStreaming(content_id=second.id, streaming_id=3, last_checked=CHECKED),
+        ])
+        db.session.commit()
+        return first.id, second.id
+
+def links(app):
+    with app.app_context():
+        return sorted(db.session.query(
+            ContentStreaming.content_id, ContentStreaming.streaming_id,
+            ContentStreaming.available, ContentStreaming.last_checked
+        ))
+
+def run_import(app, text, fmt='jsonl', **options):
+    with app.app_context():
+        return import_catalog(read_records(io.StringIO(text, newline=''), fmt), **options)
+
+@pytest.mark.parametrize('fmt', ['jsonl', 'csv'])
+def test_export_import_round_trip_keeps_unavailable_links(app, fmt):
+    first, _ = seed_links(app)
+    before = links(app)
+    with app.app_context():
+        exported = ''.join(export_catalog(fmt))
+    if fmt == 'jsonl':
+        rows = [json.loads(line) for line in exported.splitlines()]
+        assert rows[0]['id'] == first and rows[0]['streaming_ids'] == [1, 2]
+
+    report = run_import(app, exported, fmt)
+    assert report['imported'] and report['updated'] == 2 and report['inserted'] == 0
+    assert links(app) == before
+
+def test_import_upserts_by_title_year_and_type(app):
+    first, _ = seed_links(app)
+    records = [
+        {'title': 'Primeiro', 'year': 2001, 'type': 'movie', 'genre': 'Suspense', 'streaming_ids': [2, 4]},
+        {'title': 'Primeiro', 'year': 2001, 'type': 'series'},
+    ]
+    report = run_import(app, '\n'.join(json.dumps(record) for record in records))
+    assert (report['inserted'], report['updated']) == (1, 1)
+
+    with app.app_context():
+        content = db.session.get(Content, first)
+        assert content.genre == 'Suspense'
+        assert sorted(link.streaming_id for link in content.streamings) == [2, 4]
+        assert Content.query.filter_by(title='Primeiro').count() == 2
+
+def test_dry_run_and_invalid_rows_write_nothing(app):
+    seed_links(app)
+    text = '\n'.join([
+        json.dumps({'title': 'Novo', 'type': 'movie'}),
+        json.dumps({'title': '', 'type': 'filme'}),
+        'não é json',
+    ])
+
+    report = run_import(app, json.dumps({'title': 'Novo', 'type': 'movie'}), dry_run=True)
+    assert report['valid'] == 1 and not report['imported']
+    report = run_import(app, text)
+    assert [error['line'] for error in report['errors']] == [2, 3]
+    assert not report['imported']
+    with app.app_context():
+        assert Content.query.filter_by(title='Novo').count() == 0
+
+    report = run_import(app, text, partial=True)
+    assert report['imported'] and report['inserted'] == 1
+    with app.app_context():
+        assert Content.query.filter_by(title='Novo').count() == 1
@@ -0,0 +1,17 @@
+from src.routes.caching import ResponseCache
+
+def test_newer_generation_replaces_entries():
+    cache = ResponseCache()
+    cache.set('lista', 1, b'[1]', 'application/json')
+    assert cache.get('lista', 1) == (b'[1]', 'application/json')
+    assert cache.get('lista', 2) is None
+    assert cache.stats()['generation'] == 2
+
+def test_older_generation_is_ignored():
+    cache = ResponseCache()
+    cache.set('lista', 2, b'[2]', 'application/json')
+    # Requisição que leu a versão 1 antes da escrita e terminou depois dela
+    cache.set('lista', 1, b'[1]', 'application/json')
+    assert cache.get('lista', 1) is None
+    assert cache.get('lista', 2) == (b'[2]', 'application/json')
+    assert cache.stats()['generation'] == 2
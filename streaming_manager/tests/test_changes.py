@@ -0,0 +1,85 @@
+from src.init_data import init_streaming_platforms
+from src.models.catalog import CatalogChange
+from src.models.content import db
+
+def create(client, headers, title, **fields):
+    payload = {'title': title, 'type': 'movie', 'genre': 'Drama', 'streaming_ids': [1], **fields}
+    response = client.post('/api/content', json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+def changes(client, since=None, **params):
+    if since is not None:
+        params['since'] = since
+    response = client.get('/api/content/changes', query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_changes_report_updates_deletes_and_advance_the_token(app, client, admin_headers):
+    with app.app_context():
+        init_streaming_platforms()
+    first = create(client, admin_headers, 'Primeiro')
+    second = create(client, admin_headers, 'Segundo')
+
+    full = changes(client)
+    assert [item['id'] for item in full['items']] == [first, second]
+    assert full['deleted'] == [] and not full['has_more']
+    token = full['next']
+    assert changes(client, token)['items'] == []
+    assert changes(client, token)['next'] == token
+
+    assert client.put(f'/api/content/{first}', json={'genre': 'Terror'}, headers=admin_headers).status_code == 200
+    assert client.delete(f'/api/content/{second}', headers=admin_headers).status_code == 200
+    delta = changes(client, token)
+    assert [(item['id'], item['genre']) for item in delta['items']] == [(first, 'Terror')]
+    assert delta['deleted'] == [second]
+    assert int(delta['next']) > int(token)
+
+    # Um conteúdo alterado várias vezes aparece uma vez só, na posição da última alteração
+    assert client.put(f'/api/content/{first}', json={'year': 1999}, headers=admin_headers).status_code == 200
+    again = changes(client, delta['next'])
+    assert [item['id'] for item in again['items']] == [first]
+    assert changes(client, token)['deleted'] == [second]
+
+def test_deactivated_content_is_reported_as_deleted(app, client, admin_headers):
+    with app.app_context():
+        init_streaming_platforms()
+    content_id = create(client, admin_headers, 'Some')
+    token = changes(client)['next']
+
+    assert client.patch(f'/api/content/{content_id}/toggle', headers=admin_headers).status_code == 200
+    delta = changes(client, token)
+    assert delta['items'] == [] and delta['deleted'] == [content_id]
+    inactive = changes(client, token, show_inactive='true')
+    assert [item['id'] for item in inactive['items']] == [content_id] and inactive['deleted'] == []
+
+def test_changes_paginate_with_has_more(app, client, admin_headers):
+    with app.app_context():
+        init_streaming_platforms()
+    ids = [create(client, admin_headers, f'Título {number}') for number in range(5)]
+
+    seen, token = [], None
+    while True:
+        page = changes(client, token, limit=2)
+        seen.extend(item['id'] for item in page['items'])
+        token = page['next']
+        if not page['has_more']:
+            break
+    assert seen == ids
+
+def test_unknown_or_invalid_token(app, client, admin_headers):
+    with app.app_context():
+        init_streaming_platforms()
+    create(client, admin_headers, 'Primeiro')
+    create(client, admin_headers, 'Segundo')
+    token = changes(client)['next']
+
+    # Banco restaurado de um backup anterior ao token: o registro não o conhece
+    with app.app_context():
+        db.session.query(CatalogChange).filter(CatalogChange.id == int(token)).delete()
+        db.session.commit()
+    response = client.get('/api/content/changes', query_string={'since': token})
+    assert response.status_code == 410
+
+    assert client.get('/api/content/changes?since=abc').status_code == 400
+    assert client.get('/api/content/changes?limit=0').status_code == 400
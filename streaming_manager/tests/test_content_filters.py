@@ -0,0 +1,29 @@
+from src.models.catalog import bump_catalog_version
+from src.models.content import Content, db
+from src.models.search import index_content
+
+def seed(app, *contents):
+    with app.app_context():
+        for title, genre in contents:
+            content = Content(title=title, type='movie', genre=genre)
+            db.session.add(content)
+            db.session.flush()
+            index_content(content)
+        bump_catalog_version(contents=[])
+        db.session.commit()
+
+def titles(client, query):
+    response = client.get(f'/api/content?{query}')
+    assert response.status_code == 200
+    return sorted(item['title'] for item in response.get_json())
+
+def test_genre_filter_matches_substrings(app, client):
+    seed(app, ('Interestelar', 'Ficção científica/Aventura'), ('Duna', 'Ficção Científica'), ('Up', 'Animação'))
+    assert titles(client, 'genre=cien') == ['Duna', 'Interestelar']
+    assert titles(client, 'genre=ventura') == ['Interestelar']
+    assert titles(client, 'genre=ção') == ['Duna', 'Interestelar', 'Up']
+
+def test_search_uses_title_prefixes(app, client):
+    seed(app, ('Grande Apostador', 'Drama'), ('O Apocalipse', 'Drama'))
+    assert titles(client, 'search=apo') == ['Grande Apostador', 'O Apocalipse']
+    assert titles(client, 'search=grande apo') == ['Grande Apostador']
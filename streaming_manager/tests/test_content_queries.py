@@ -0,0 +1,60 @@
+from sqlalchemy import event
+
+from src.init_data import init_streaming_platforms
+from src.models.catalog import bump_catalog_version
+from src.models.content import Content, ContentStreaming, StreamingPlatform, db
+
+def seed_contents(app, count):
+    with app.app_context():
+        init_streaming_platforms()
+        platform_ids = [platform.id for platform in StreamingPlatform.query.order_by(StreamingPlatform.id)]
+        content_ids = []
+        for number in range(count):
+            content = Content(title=f'Título {number:03d}', year=2000 + number % 20, type='movie', genre='Drama')
+            db.session.add(content)
+            db.session.flush()
+            content_ids.append(content.id)
+            for streaming_id in platform_ids[number % 3:number % 3 + 2]:
+                db.session.add(ContentStreaming(content_id=content.id, streaming_id=streaming_id))
+        bump_catalog_version(contents=content_ids)
+        db.session.commit()
+
+def count_statements(app, client, url):
+    """Resposta de ``url`` e quantos comandos SQL ela executou"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200
+    return response.get_json(), len(statements)
+
+def test_listing_query_count_does_not_grow_with_titles(app, client):
+    seed_contents(app, 10)
+    items, small = count_statements(app, client, '/api/content')
+    assert len(items) == 10
+
+    seed_contents(app, 90)
+    items, large = count_statements(app, client, '/api/content')
+    assert len(items) == 100
+    assert all(item['streamings'] for item in items)
+    assert small == large
+
+def test_writes_return_content_with_streamings(app, client, admin_headers):
+    seed_contents(app, 1)
+    payload = {'title': 'Novo', 'type': 'movie', 'genre': 'Drama', 'streaming_ids': [1, 2]}
+    response = client.post('/api/content', json=payload, headers=admin_headers)
+    assert response.status_code == 201
+    created = response.get_json()
+    assert sorted(platform['id'] for platform in created['streamings']) == [1, 2]
+
+    response = client.put(f"/api/content/{created['id']}", json={'streaming_ids': [3]}, headers=admin_headers)
+    assert response.status_code == 200
+    assert [platform['id'] for platform in response.get_json()['streamings']] == [3]
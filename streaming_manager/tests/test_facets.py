@@ -0,0 +1,61 @@
+from src.init_data import init_streaming_platforms
+from src.models.catalog import bump_catalog_version
+from src.models.content import Content, ContentStreaming, db
+
+CATALOG = [
+    # (título, tipo, gênero, plataformas disponíveis, ativo)
+    ('Alfa', 'movie', 'Ação/Aventura', [1, 2], True),
+    ('Bravo', 'movie', 'Drama', [1], True),
+    ('Charlie', 'movie', 'ação', [], True),
+    ('Delta', 'series', 'Drama, Comédia', [2], True),
+    ('Eco', 'anime', 'Aventura', [1, 3], True),
+    ('Foxtrot', 'movie', 'Drama', [1], False),
+]
+
+def seed(app):
+    with app.app_context():
+        init_streaming_platforms()
+        ids = []
+        for title, content_type, genre, streaming_ids, active in CATALOG:
+            content = Content(title=title, type=content_type, genre=genre, is_active=active)
+            db.session.add(content)
+            db.session.flush()
+            ids.append(content.id)
+            db.session.add_all(ContentStreaming(content_id=content.id, streaming_id=streaming_id)
+                               for streaming_id in streaming_ids)
+        # Vínculo indisponível não conta na faceta de plataforma
+        db.session.add(ContentStreaming(content_id=ids[1], streaming_id=3, available=False))
+        bump_catalog_version(contents=ids)
+        db.session.commit()
+
+def counts(facet):
+    return {entry['value']: entry['count'] for entry in facet}
+
+def test_facets_with_normalized_shape_and_active_filter(app, client):
+    seed(app)
+    response = client.get('/api/content?type=movie&facets=true&shape=normalized')
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert set(payload) == {'items', 'platforms', 'facets'}
+    assert [item['title'] for item in payload['items']] == ['Alfa', 'Bravo', 'Charlie']
+    assert payload['items'][0]['streamings'] == [1, 2]
+    assert sorted(platform['id'] for platform in payload['platforms']) == [1, 2]
+
+    facets = payload['facets']
+    assert set(facets) == {'type', 'genre', 'streaming'}
+    # A faceta de tipo ignora o próprio filtro; as demais contam só os filmes ativos
+    assert counts(facets['type']) == {'movie': 3, 'series': 1, 'anime': 1}
+    assert counts(facets['genre']) == {'Ação': 2, 'Aventura': 1, 'Drama': 1}
+    assert counts(facets['streaming']) == {1: 2, 2: 1}
+    # Em ordem decrescente de contagem
+    assert [entry['count'] for entry in facets['type']] == [3, 1, 1]
+
+def test_facet_selection_and_validation(app, client):
+    seed(app)
+    payload = client.get('/api/content?facets=streaming&streaming_ids=2').get_json()
+    assert set(payload) == {'items', 'facets'} and set(payload['facets']) == {'streaming'}
+    assert [item['title'] for item in payload['items']] == ['Alfa', 'Delta']
+    assert counts(payload['facets']['streaming']) == {1: 3, 2: 2, 3: 1}
+
+    assert client.get('/api/content?facets=ano').status_code == 400
+    assert client.get('/api/content?facets=true&stream=true').status_code == 400
@@ -0,0 +1,39 @@
+import pytest
+
+from src.models import images
+from src.models.images import DiskCache, ImageFetcher, ImageService
+
+class BrokenFetcher(ImageFetcher):
+    def __init__(self):
+        self.calls = 0
+
+    def fetch(self, url):
+        self.calls += 1
+        raise OSError('origem fora do ar')
+
+def test_failures_are_remembered_but_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, 'MAX_FAILURES', 3)
+    fetcher = BrokenFetcher()
+    service = ImageService(fetcher, DiskCache(str(tmp_path)))
+
+    for number in range(10):
+        with pytest.raises(OSError):
+            service.source(f'https://exemplo.com/{number}.jpg')
+    assert len(service._failures) == 3
+    assert list(service._failures) == [f'https://exemplo.com/{number}.jpg' for number in (7, 8, 9)]
+
+    # Falha recente não volta à origem
+    with pytest.raises(RuntimeError):
+        service.source('https://exemplo.com/9.jpg')
+    assert fetcher.calls == 10
+
+def test_expired_failures_are_dropped_and_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, 'FAILURE_TTL', 0)
+    fetcher = BrokenFetcher()
+    service = ImageService(fetcher, DiskCache(str(tmp_path)))
+
+    for _ in range(3):
+        with pytest.raises(OSError):
+            service.source('https://exemplo.com/a.jpg')
+    assert fetcher.calls == 3
+    assert len(service._failures) == 1
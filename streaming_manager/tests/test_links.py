@@ -0,0 +1,108 @@
+from datetime import datetime
+
+from src.init_data import init_streaming_platforms
+from src.models.content import Content, ContentStreaming, db, sync_streaming_links
+
+CHECKED = datetime(2024, 1, 2, 3, 4, 5)
+
+def seed_content(app, streaming_ids):
+    with app.app_context():
+        init_streaming_platforms()
+        content = Content(title='Título', type='movie')
+        db.session.add(content)
+        db.session.flush()
+        for streaming_id in streaming_ids:
+            db.session.add(ContentStreaming(content_id=content.id, streaming_id=streaming_id,
+                                            available=streaming_id != 2, last_checked=CHECKED))
+        db.session.commit()
+        return content.id
+
+def link_rows(content_id):
+    """{plataforma: (rowid, available, last_checked em texto ISO)}"""
+    rows = db.session.execute(db.text(
+        'SELECT streaming_id, rowid, available, last_checked FROM content_streaming WHERE content_id = :id'
+    ), {'id': content_id})
+    return {streaming_id: (rowid, bool(available), last_checked) for streaming_id, rowid, available, last_checked in rows}
+
+def test_sync_links_only_touches_the_difference(app):
+    content_id = seed_content(app, [1, 2, 3])
+    with app.app_context():
+        before = link_rows(content_id)
+        added, removed = sync_streaming_links({content_id: {2, 3, 4}})
+        db.session.commit()
+        after = link_rows(content_id)
+
+    assert added == [(content_id, 4)] and removed == [(content_id, 1)]
+    assert set(after) == {2, 3, 4}
+    # Vínculos mantidos são as mesmas linhas, com available/last_checked intactos
+    assert after[2] == before[2] and after[3] == before[3]
+    assert after[4][1] is True
+
+def test_sync_links_without_changes_writes_nothing(app):
+    content_id = seed_content(app, [1, 2])
+    with app.app_context():
+        before = link_rows(content_id)
+        assert sync_streaming_links({content_id: {1, 2}}) == ([], [])
+        assert sync_streaming_links({}) == ([], [])
+        assert link_rows(content_id) == before
+
+def test_put_keeps_unchanged_links(app, client, admin_headers):
+    content_id = seed_content(app, [1, 2])
+    with app.app_context():
+        before = link_rows(content_id)
+    response = client.put(f'/api/content/{content_id}', json={'streaming_ids': [2, 5]}, headers=admin_headers)
+    assert response.status_code == 200
+    with app.app_context():
+        after = link_rows(content_id)
+    assert set(after) == {2, 5} and after[2] == before[2]
+
+    # Sem streaming_ids os vínculos ficam como estão
+    assert client.put(f'/api/content/{content_id}', json={'genre': 'Drama'}, headers=admin_headers).status_code == 200
+    with app.app_context():
+        assert link_rows(content_id) == after
+
+def test_patch_availability_updates_and_creates_links(app, client, admin_headers):
+    content_id = seed_content(app, [1, 2])
+    changes = [
+        {'content_id': content_id, 'streaming_id': 1, 'available': False},
+        {'content_id': content_id, 'streaming_id': 2, 'available': 'false'},
+        {'content_id': str(content_id), 'streaming_id': 3, 'available': 'sim'},
+    ]
+    response = client.patch('/api/content/availability', json={'changes': changes}, headers=admin_headers)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report['updated'], report['unchanged'], report['inserted']) == (1, 1, 1)
+
+    with app.app_context():
+        rows = link_rows(content_id)
+    assert {streaming_id: row[1] for streaming_id, row in rows.items()} == {1: False, 2: False, 3: True}
+    assert all(row[2] > str(CHECKED) for row in rows.values())
+
+def test_patch_availability_validation(app, client, admin_headers):
+    content_id = seed_content(app, [1])
+
+    def patch(body):
+        return client.patch('/api/content/availability', json=body, headers=admin_headers)
+
+    assert patch({'changes': {'content_id': content_id}}).status_code == 400
+    assert patch({}).status_code == 400
+
+    response = patch({'changes': [
+        {'content_id': content_id, 'streaming_id': 1, 'available': False},
+        {'content_id': 'x', 'streaming_id': 1, 'available': True},
+        {'content_id': content_id, 'streaming_id': 999, 'available': True},
+        {'content_id': content_id, 'streaming_id': 2, 'available': 'talvez'},
+        'não é objeto',
+    ]})
+    assert response.status_code == 400
+    report = response.get_json()
+    assert not report['applied']
+    assert [error['index'] for error in report['errors']] == [1, 2, 3, 4]
+
+    response = patch({'changes': [{'content_id': content_id + 100, 'streaming_id': 1, 'available': True}]})
+    assert response.status_code == 400
+    assert 'inexistentes' in response.get_json()['errors'][0]['errors'][0]
+
+    # Nenhuma das requisições com erro gravou algo
+    with app.app_context():
+        assert {streaming_id: row[1] for streaming_id, row in link_rows(content_id).items()} == {1: True}
@@ -0,0 +1,29 @@
+import pytest
+from flask import g
+from sqlalchemy.exc import OperationalError
+
+from src.models.content import db
+from src.routes.metrics import start_request_metrics
+
+def test_failed_statement_does_not_skew_later_timings(app):
+    with app.test_request_context():
+        start_request_metrics()
+        with pytest.raises(OperationalError):
+            db.session.execute(db.text('SELECT * FROM tabela_inexistente'))
+        db.session.rollback()
+        db.session.execute(db.text('SELECT 1'))
+        assert [statement for statement, _ in g.sql_queries] == ['SELECT 1']
+        assert 0 <= g.sql_queries[0][1] < 1
+
+def test_metrics_are_disabled_without_token(client):
+    assert client.get('/api/metrics').status_code == 404
+    assert client.get('/api/cache/stats').status_code == 404
+
+def test_metrics_require_the_configured_token(app, client):
+    app.config['METRICS_TOKEN'] = 'segredo'
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer outro'}).status_code == 401
+    response = client.get('/api/metrics', headers={'Authorization': 'Bearer segredo'})
+    assert response.status_code == 200
+    assert 'http_requests_total' in response.get_data(as_text=True)
+    assert client.get('/api/cache/stats', headers={'Authorization': 'Bearer segredo'}).status_code == 200
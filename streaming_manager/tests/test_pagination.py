@@ -0,0 +1,58 @@
+import base64
+
+from src.models.catalog import bump_catalog_version
+from src.models.content import Content, db
+
+def seed_titles(app, titles):
+    with app.app_context():
+        contents = [Content(title=title, type='movie') for title in titles]
+        db.session.add_all(contents)
+        db.session.flush()
+        bump_catalog_version(contents=[content.id for content in contents])
+        db.session.commit()
+
+def walk(client, limit, **params):
+    """Ids de todas as páginas seguindo ``next_cursor`` e o tamanho de cada página"""
+    ids, sizes, cursor = [], [], None
+    while True:
+        query = {'limit': limit, **params}
+        if cursor:
+            query['cursor'] = cursor
+        response = client.get('/api/content', query_string=query)
+        assert response.status_code == 200
+        page = response.get_json()
+        ids.extend(item['id'] for item in page['items'])
+        sizes.append(len(page['items']))
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids, sizes
+
+def test_cursor_pages_through_duplicate_titles(app, client):
+    # Títulos repetidos atravessam a fronteira das páginas: o id desempata
+    seed_titles(app, ['Bravo', 'Alfa', 'Bravo', 'Bravo', 'Charlie', 'Bravo', 'Alfa'])
+    expected = [item['id'] for item in client.get('/api/content').get_json()]
+
+    ids, sizes = walk(client, 2)
+    assert ids == expected
+    assert len(set(ids)) == 7
+    assert sizes == [2, 2, 2, 1]
+
+def test_last_full_page_has_no_next_cursor(app, client):
+    seed_titles(app, ['Alfa', 'Bravo', 'Charlie', 'Delta'])
+    _, sizes = walk(client, 2)
+    assert sizes == [2, 2]
+
+    response = client.get('/api/content', query_string={'limit': 10})
+    assert response.get_json()['next_cursor'] is None
+
+def test_invalid_cursor_is_rejected(app, client):
+    seed_titles(app, ['Alfa'])
+    bad = [
+        'não-é-base64',
+        base64.urlsafe_b64encode(b'{"title": "Alfa"}').decode('ascii'),
+        base64.urlsafe_b64encode(b'["Alfa", "1"]').decode('ascii'),
+    ]
+    for cursor in bad:
+        response = client.get('/api/content', query_string={'cursor': cursor})
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Cursor inválido'
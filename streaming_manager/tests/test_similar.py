@@ -0,0 +1,121 @@
+import random
+
+from src.init_data import init_streaming_platforms
+from src.models.catalog import bump_catalog_version
+from src.models.content import Content, ContentStreaming, StreamingPlatform, db
+from src.models.similar import ContentSimilar, rebuild_similar_index, refresh_similar_index
+
+GENRES = ('Drama', 'Comédia', 'Ação/Aventura', 'Terror', 'Animação')
+TYPES = ('movie', 'series', 'anime')
+
+def seed_catalog(app, count, seed=7):
+    """``count`` conteúdos com gêneros, tipos, anos e plataformas variados, já com o índice calculado"""
+    rng = random.Random(seed)
+    with app.app_context():
+        init_streaming_platforms()
+        platform_ids = [platform.id for platform in StreamingPlatform.query.order_by(StreamingPlatform.id)]
+        content_ids = []
+        for number in range(count):
+            content = Content(title=f'Título {number:04d}', year=1990 + rng.randrange(30), type=rng.choice(TYPES),
+                              genre=rng.choice(GENRES))
+            db.session.add(content)
+            db.session.flush()
+            content_ids.append(content.id)
+            for streaming_id in rng.sample(platform_ids, rng.randint(1, 3)):
+                db.session.add(ContentStreaming(content_id=content.id, streaming_id=streaming_id))
+        bump_catalog_version(contents=content_ids)
+        db.session.commit()
+        rebuild_similar_index()
+        return content_ids
+
+def similar_table(app):
+    with app.app_context():
+        return db.session.query(
+            ContentSimilar.content_id, ContentSimilar.position, ContentSimilar.similar_id, ContentSimilar.score
+        ).order_by(ContentSimilar.content_id, ContentSimilar.position).all()
+
+def test_writes_leave_similar_lists_to_the_worker(app, client, admin_headers):
+    content_ids = seed_catalog(app, 60)
+    before = similar_table(app)
+
+    payload = {'title': 'Novo', 'type': 'movie', 'year': 2001, 'genre': 'Drama', 'streaming_ids': [1]}
+    response = client.post('/api/content', json=payload, headers=admin_headers)
+    assert response.status_code == 201
+    created = response.get_json()['id']
+    assert client.delete(f'/api/content/{content_ids[0]}', headers=admin_headers).status_code == 200
+    assert similar_table(app) == before
+    assert client.get(f'/api/content/{created}?include=similar').get_json()['similar'] == []
+
+    with app.app_context():
+        assert refresh_similar_index()['mode'] != 'unchanged'
+    assert client.get(f'/api/content/{created}?include=similar').get_json()['similar']
+
+    with app.app_context():
+        assert refresh_similar_index()['mode'] == 'unchanged'
+
+def test_incremental_refresh_matches_full_rebuild(app, client, admin_headers):
+    content_ids = seed_catalog(app, 600)
+
+    payload = {'title': 'Novo', 'type': 'anime', 'year': 2005, 'genre': 'Animação/Comédia', 'streaming_ids': [1, 2]}
+    assert client.post('/api/content', json=payload, headers=admin_headers).status_code == 201
+    assert client.put(f'/api/content/{content_ids[1]}', json={'genre': 'Terror', 'streaming_ids': [3]},
+                      headers=admin_headers).status_code == 200
+    assert client.patch(f'/api/content/{content_ids[2]}/toggle', headers=admin_headers).status_code == 200
+    assert client.delete(f'/api/content/{content_ids[3]}', headers=admin_headers).status_code == 200
+    with app.app_context():
+        linked = {link.streaming_id for link in ContentStreaming.query.filter_by(content_id=content_ids[5])}
+        changes = [{'content_id': content_ids[4], 'streaming_id': link.streaming_id, 'available': False}
+                   for link in ContentStreaming.query.filter_by(content_id=content_ids[4]).limit(1)]
+        changes.append({'content_id': content_ids[5], 'streaming_id': min({1, 2, 3, 4} - linked), 'available': True})
+    assert client.patch('/api/content/availability', json={'changes': changes},
+                        headers=admin_headers).status_code == 200
+
+    with app.app_context():
+        report = refresh_similar_index()
+    assert report['mode'] == 'incremental'
+    assert report['changed'] == 6
+    incremental = similar_table(app)
+
+    with app.app_context():
+        rebuild_similar_index()
+    assert similar_table(app) == incremental
+
+def test_large_changes_fall_back_to_rebuild(app):
+    content_ids = seed_catalog(app, 100)
+    with app.app_context():
+        Content.query.filter(Content.id.in_(content_ids[:50])).update({Content.genre: 'Terror'})
+        bump_catalog_version(contents=content_ids[:50])
+        db.session.commit()
+        report = refresh_similar_index()
+    assert report['mode'] == 'rebuild'
+    assert report['recomputed'] == 100
+    rebuilt = similar_table(app)
+
+    with app.app_context():
+        rebuild_similar_index()
+    assert similar_table(app) == rebuilt
+
+def test_refresh_invalidates_cached_responses(tmp_path, admin_headers):
+    from src.main import create_app
+    from src.models.migrations import upgrade_schema
+
+    app = create_app('testing', {'IMAGE_CACHE_DIR': str(tmp_path / 'images'), 'RESPONSE_CACHE_SIZE': 64})
+    with app.app_context():
+        upgrade_schema()
+    client = app.test_client()
+    seed_catalog(app, 60)
+    payload = {'title': 'Novo', 'type': 'movie', 'year': 2001, 'genre': 'Drama', 'streaming_ids': [1]}
+    created = client.post('/api/content', json=payload, headers=admin_headers).get_json()['id']
+
+    url = f'/api/content/{created}?include=similar'
+    response = client.get(url)
+    assert response.get_json()['similar'] == []
+    etag = response.headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        refresh_similar_index()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['similar']
+    assert response.headers['ETag'] != etag
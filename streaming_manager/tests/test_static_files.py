@@ -0,0 +1,43 @@
+import gzip
+import os
+
+from src.routes.static_files import StaticFiles
+
+def write(path, data, mtime):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+
+def test_stale_variants_are_ignored(app, tmp_path):
+    root = tmp_path / 'static'
+    # Build novo copiado sem rodar compress-static: as variantes são do build anterior
+    write(root / 'index.html', b'<script src="/assets/app-NOVO1234.js"></script>', 2000)
+    write(root / 'index.html.gz', gzip.compress(b'<script src="/assets/app-ANTIGO12.js"></script>'), 1000)
+    write(root / 'app.css', b'body { color: red }' * 50, 2000)
+    write(root / 'app.css.gz', gzip.compress(b'antigo'), 1000)
+    write(root / 'other.css', b'body { color: blue }' * 50, 1000)
+    write(root / 'other.css.gz', gzip.compress(b'body { color: blue }' * 50), 2000)
+
+    static_files = StaticFiles(str(root))
+    assert static_files.files['app.css'].variants == {}
+    assert set(static_files.files['other.css'].variants) == {'gzip'}
+
+    with app.test_request_context('/', headers={'Accept-Encoding': 'gzip'}):
+        response = static_files.serve_index()
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert b'NOVO1234' in gzip.decompress(response.get_data())
+
+def test_missing_assets_are_404_but_dotted_routes_reach_the_app(app, tmp_path):
+    root = tmp_path / 'static'
+    write(root / 'index.html', b'<div id="root"></div>', 1000)
+    write(root / 'assets' / 'index-AbCd1234.js', b'console.log(1)', 1000)
+    static_files = StaticFiles(str(root))
+
+    for path in ('title/Mr.Robot', 'title/42', 'busca/v1.2'):
+        with app.test_request_context(f'/{path}'):
+            response = static_files.serve(path)
+            assert response.status_code == 200 and b'id="root"' in response.get_data()
+
+    for path in ('assets/index-Velho123.js', 'assets/sem-extensao', 'favicon.ico', 'css/app.css'):
+        with app.test_request_context(f'/{path}'):
+            assert static_files.serve(path) == ('Not found', 404)
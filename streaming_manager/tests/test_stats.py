@@ -0,0 +1,60 @@
+from src.init_data import init_streaming_platforms
+from src.models.content import db
+from src.models.stats import BUILT_KEY, CatalogStat, aggregate_counters, load_counters
+
+def assert_counters_match(app):
+    """Os contadores materializados batem com as consultas agrupadas"""
+    with app.app_context():
+        stored = {key: value for key, value in load_counters(materialized=True).items() if value}
+        live = {key: value for key, value in aggregate_counters().items() if value}
+        assert db.session.get(CatalogStat, BUILT_KEY) is not None
+    assert stored == live
+
+def test_materialized_counters_follow_every_write(app, client, admin_headers):
+    app.config['STATS_MATERIALIZED'] = True
+    with app.app_context():
+        init_streaming_platforms()
+
+    ids = []
+    for number, (content_type, streaming_ids) in enumerate([('movie', [1, 2]), ('series', [2]), ('anime', [])]):
+        payload = {'title': f'Título {number}', 'type': content_type, 'streaming_ids': streaming_ids}
+        response = client.post('/api/content', json=payload, headers=admin_headers)
+        assert response.status_code == 201
+        ids.append(response.get_json()['id'])
+    assert_counters_match(app)
+
+    response = client.put(f'/api/content/{ids[0]}', json={'type': 'series', 'streaming_ids': [3]},
+                          headers=admin_headers)
+    assert response.status_code == 200
+    assert_counters_match(app)
+
+    assert client.patch(f'/api/content/{ids[1]}/toggle', headers=admin_headers).status_code == 200
+    assert_counters_match(app)
+
+    changes = [{'content_id': ids[0], 'streaming_id': 3, 'available': False},
+               {'content_id': ids[2], 'streaming_id': 4, 'available': True}]
+    assert client.patch('/api/content/availability', json={'changes': changes},
+                        headers=admin_headers).status_code == 200
+    assert_counters_match(app)
+
+    assert client.delete(f'/api/content/{ids[2]}', headers=admin_headers).status_code == 200
+    assert_counters_match(app)
+
+    stats = client.get('/api/content/stats').get_json()
+    assert stats['total_content'] == 1 and stats['total_inactive'] == 1
+    assert stats['by_type'] == {'movies': 0, 'series': 1, 'animes': 0}
+
+def test_stats_read_never_builds_the_table(app, client, admin_headers):
+    app.config['STATS_MATERIALIZED'] = True
+    with app.app_context():
+        init_streaming_platforms()
+        CatalogStat.query.delete()
+        db.session.commit()
+    payload = {'title': 'Título', 'type': 'movie', 'streaming_ids': [1]}
+    assert client.post('/api/content', json=payload, headers=admin_headers).status_code == 201
+
+    # Sem a tabela a rota lê as consultas agrupadas e não grava nada
+    stats = client.get('/api/content/stats').get_json()
+    assert stats['total_content'] == 1 and stats['by_type']['movies'] == 1
+    with app.app_context():
+        assert CatalogStat.query.count() == 0